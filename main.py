@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 """
 Run: python main.py
-
-This is the entrypoint for the Recipe Suggestion Helper CLI.
+     python main.py --batch[=requests.jsonl] [--output=results.jsonl] [--workers=N] [--no-ai]
+     python main.py --serve[=127.0.0.1:8080] [--workers=N] [--no-ai]
+     python main.py --plan=K [--max-time=MINUTES]
+
+This is the entrypoint for the Recipe Suggestion Helper CLI. --batch
+answers one JSON request per line from stdin or a file without prompting
+(see src/batch.py); --serve keeps the catalog warm behind a local HTTP/JSON
+API (see src/server.py). --workers is the number of matching processes in
+batch mode and of request threads in serve mode. --plan picks K recipes
+that share your pantry and prints one combined shopping list (see
+src/planner.py).
 """
 from dotenv import load_dotenv
 
@@ -10,20 +19,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.recipe_helper import parse_ingredients, match_recipes, explain_recipe, suggest_substitute, get_available_diets
-from src.openai_helper import ask_openai, generate_recipes_from_ingredients
+from src.openai_helper import ask_openai, start_generation
+from src.recipe_ingest import ingest_generated
+# Batch, serve, planning and saving helpers are imported where they are used,
+# so a run only loads the modules its mode needs
 import os
 import sys
-import json
 import re
-from datetime import datetime
 from rich import print 
 
 
-def _safe_filename(title: str) -> str:
-    # make a simple safe filename from title
-    return re.sub(r"[^0-9a-zA-Z_-]", "_", title).strip("_")
-
-
 def ask_user(prompt: str) -> str:
     return input(prompt + "\n> ").strip()
 
@@ -47,6 +52,75 @@ def _get_arg_value(args, flag: str, default: int) -> int:
     return default
 
 
+def _get_str_arg(args, flag: str) -> str:
+    """Return the value of a --flag=value argument, or None when absent."""
+    for a in args:
+        if a.startswith(flag + "="):
+            return a.split("=", 1)[1]
+    return None
+
+
+def _run_batch_mode(max_results: int, allow_ai: bool):
+    from src.batch import run_batch
+
+    source = _get_str_arg(sys.argv, "--batch")
+    target = _get_str_arg(sys.argv, "--output")
+    workers = _get_arg_value(sys.argv, "--workers", default=1)
+    infile = open(source, encoding="utf-8") if source and source != "-" else sys.stdin
+    outfile = open(target, "w", encoding="utf-8") if target and target != "-" else sys.stdout
+    try:
+        stats = run_batch(infile, outfile, workers=workers, allow_ai=allow_ai, default_max=max_results)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    # Results go to stdout, so the summary goes to stderr
+    print(
+        f"Answered {stats['requests']} request(s): {stats['local']} local and {stats['ai']} AI option(s), "
+        f"{stats['errors']} error(s)",
+        file=sys.stderr,
+    )
+
+
+def _run_serve_mode(max_results: int, allow_ai: bool):
+    from src.server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+    address = _get_str_arg(sys.argv, "--serve") or ""
+    host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+    try:
+        port = int(port) if port else DEFAULT_PORT
+    except ValueError:
+        print(f"Invalid --serve address: {address!r} (expected host:port)", file=sys.stderr)
+        return
+    workers = _get_arg_value(sys.argv, "--workers", default=8)
+    serve(host or DEFAULT_HOST, port, workers=max(1, workers), allow_ai=allow_ai, default_max=max_results)
+
+
+def _print_plan(plan):
+    if not plan["recipes"]:
+        print("[pink1]Sorry, I couldn't plan any meals with those ingredients.[/pink1]")
+        return
+    print(f"[cyan]Meal plan ({len(plan['recipes'])} recipe(s)):[/cyan]")
+    for i, r in enumerate(plan["recipes"], 1):
+        print(f"{i}. {r.get('title')} ({r.get('time', 'time n/a')})")
+    print("\nShopping list:")
+    if plan["shopping_list"]:
+        for item in plan["shopping_list"]:
+            print(f" - {item['ingredient']} (for {', '.join(item['recipes'])})")
+    else:
+        print(" - nothing, you have everything!")
+    if plan["pantry_unused"]:
+        print(f"[dim]Not used: {', '.join(plan['pantry_unused'])}[/dim]")
+
+
+def _print_options(options, start: int = 1):
+    for i, (r, count, source) in enumerate(options, start):
+        diets_str = f" — {', '.join(r.get('diets', []))}" if r.get('diets') else ""
+        match_note = f" — matches {count} ingredient(s)" if count is not None else ""
+        print(f"{i}. {r.get('title')} ({r.get('time', 'time n/a')}){diets_str}{match_note}")
+
+
 def main():
     # support quick check: `python main.py --show-key`
     if "--show-key" in sys.argv:
@@ -60,6 +134,15 @@ def main():
     max_results = _get_arg_value(sys.argv, "--max-results", default=5)
     max_results = _get_arg_value(sys.argv, "--max", default=max_results)
     allow_ai = "--no-ai" not in sys.argv
+    plan_size = _get_arg_value(sys.argv, "--plan", default=0)
+    max_minutes = _get_arg_value(sys.argv, "--max-time", default=0)
+
+    if any(a == "--batch" or a.startswith("--batch=") for a in sys.argv):
+        _run_batch_mode(max_results, allow_ai)
+        return
+    if any(a == "--serve" or a.startswith("--serve=") for a in sys.argv):
+        _run_serve_mode(max_results, allow_ai)
+        return
 
     print("[bold underline blue]Hi! I'm your Recipe Suggestion Helper.[/bold underline blue]")
     print()
@@ -93,25 +176,48 @@ def main():
         else:
             print(f"[green]Great! You've entered {len(ingredients)} ingredients.[/green]")
 
-    # Local recipe matches first
-    matches = match_recipes(ingredients, min_match=2, diet=diet_filter)
-    options = [(r, count, "local") for r, count in matches[:max_results]]
+    if plan_size > 0:
+        from src.planner import plan_meals
+        _print_plan(plan_meals(ingredients, plan_size, diet=diet_filter, max_minutes=max_minutes or None))
+        return
+
+    # Local recipe matches first (top-k only; we never show more than max_results)
+    matches = match_recipes(ingredients, min_match=2, diet=diet_filter, limit=max_results)
+    options = [(r, count, "local") for r, count in matches]
 
-    # If we need more options, auto-generate with OpenAI (if allowed and key present)
+    # Generate only the missing slots, in the background while the local
+    # options are printed, and never a recipe that is already listed
+    generation = None
     if allow_ai and len(options) < max_results:
+        generation = start_generation(
+            ingredients=ingredients, diet=diet_filter, meal_type=meal_type,
+            count=max_results - len(options), avoid_titles=[r.get("title", "") for r, _, _ in options],
+        )
+
+    if options:
+        print(f"[cyan]Great! Here are {len(options)} recipe option(s) from the cookbook:[/cyan]")
+        _print_options(options)
+
+    # If we need more options, merge in the AI recipes once they are ready
+    if generation:
         print(f"[yellow]Generating {max_results - len(options)} more recipe(s)...[/yellow]")
         print("[dim](This may take a few seconds, especially during high API usage)[/dim]")
-        ai_recipes = generate_recipes_from_ingredients(
-            ingredients=ingredients,
-            diet=diet_filter,
-            meal_type=meal_type,
-        )
-        if ai_recipes:
-            print(f"[green]✓ Generated {len(ai_recipes)} recipe(s)[/green]")
-            for r in ai_recipes:
-                options.append((r, None, "ai"))
-                if len(options) >= max_results:
-                    break
+        # Show each recipe as soon as it has been generated
+        generated = 0
+        for r in generation.iter_recipes():
+            options.append((r, None, "ai"))
+            generated += 1
+            _print_options(options[-1:], start=len(options))
+            if len(options) >= max_results:
+                generation.cancel()
+                break
+        if generated:
+            print(f"[green]✓ Generated {generated} recipe(s)[/green]")
+            # Keep new generated recipes in the local catalog for future sessions
+            try:
+                ingest_generated([r for r, _, source in options if source == "ai"])
+            except OSError:
+                pass
         else:
             print("[pink1]⚠ Reecipe generation was unavailable.[/pink1]")
             print("[dim]This may be due to rate limits or network issues. Showing local matches only.[/dim]")
@@ -126,12 +232,6 @@ def main():
             print("[cyan]Try adding more ingredients or removing dietary filters.[/cyan]")
         sys.exit(0)
 
-    print(f"[cyan]Great! Here are up to {len(options)} recipe options:[/cyan]")
-    for i, (r, count, source) in enumerate(options, 1):
-        diets_str = f" — {', '.join(r.get('diets', []))}" if r.get('diets') else ""
-        match_note = f" — matches {count} ingredient(s)" if count is not None else ""
-        print(f"{i}. {r.get('title')} ({r.get('time', 'time n/a')}){diets_str}{match_note}")
-
     choice = ask_user("Which number would you like to know more about, or type a recipe name? (or 'no' to exit)")
     if choice.lower() in ('no', 'n', 'exit', 'quit'):
         print("[pink1]Okay, bye![/pink1]")
@@ -190,13 +290,14 @@ def main():
         # New: handle confirmation flow
         if "want to make this" in q.lower() or q.lower().strip() == "want to make this":
             # Show shopping list vs available ingredients
-            have = [i.lower() for i in ingredients]
+            # Same rule as matching: "chicken" covers "chicken breast"
+            from src.planner import has_ingredient
             recipe_ings = selected.get("ingredients", [])
-            missing = [ing for ing in recipe_ings if ing.lower() not in have]
+            missing = [ing for ing in recipe_ings if not has_ingredient(ingredients, ing)]
             print("\nGreat — preparing this recipe for you.")
             print("Shopping list:")
             for ing in recipe_ings:
-                mark = "(have)" if ing.lower() in have else "(missing)"
+                mark = "(missing)" if ing in missing else "(have)"
                 print(f" - {ing} {mark}")
 
             # Estimate cost (very rough heuristic)
@@ -206,47 +307,12 @@ def main():
             # Offer to save recipe and write a printable recipe card
             save = ask_user("Save this recipe to your saved list and create a recipe card? (y/n)")
             if save.lower() in ("y", "yes"):
-                saved_path = os.path.join("saved_recipes.json")
-                try:
-                    if os.path.exists(saved_path):
-                        with open(saved_path, "r", encoding="utf-8") as f:
-                            saved = json.load(f)
-                    else:
-                        saved = []
-                except Exception:
-                    saved = []
-                entry = {"title": selected.get("title"), "saved_at": datetime.utcnow().isoformat(), "allergens": selected.get("allergens", [])}
-                saved.append(entry)
-                with open(saved_path, "w", encoding="utf-8") as f:
-                    json.dump(saved, f, indent=2)
-                # create a simple recipe card file
-                card_dir = os.path.join("saved_cards")
-                os.makedirs(card_dir, exist_ok=True)
-                fname = _safe_filename(selected.get("title", "recipe")) + ".txt"
-                card_path = os.path.join(card_dir, fname)
-                with open(card_path, "w", encoding="utf-8") as f:
-                    f.write(f"{selected.get('title')}\n")
-                    f.write("Ingredients:\n")
-                    for ing in recipe_ings:
-                        f.write(f" - {ing}\n")
-                    f.write("\nAllergens:\n")
-                    if selected.get("allergens"):
-                        for a in selected.get("allergens"):
-                            f.write(f" - {a}\n")
-                    else:
-                        f.write(" - (none detected)\n")
-                    f.write("\nSteps:\n")
-                    for step in selected.get("steps", []):
-                        f.write(f" - {step}\n")
-                    f.write(f"\nTime: {selected.get('time')}\n")
-                    f.write("\nNutrition (rough estimate):\n")
-                    nutrition = selected.get("nutrition", {})
-                    if nutrition:
-                        f.write(f" - Calories: {nutrition.get('calories')}\n")
-                        f.write(f" - Protein: {nutrition.get('protein_g')}g\n")
-                        f.write(f" - Carbs: {nutrition.get('carbs_g')}g\n")
-                        f.write(f" - Fat: {nutrition.get('fat_g')}g\n")
-                    f.write("\n(Nutrition estimates are best-effort and should NOT be used for medical/diet purposes.)\n")
+                from src.recipe_cards import DEFAULT_CARD_DIR, write_card
+                from src.saved_store import SavedStore
+                saved = SavedStore()
+                saved.save(selected)
+                saved_path = saved.path
+                card_path, _ = write_card(selected, DEFAULT_CARD_DIR)
                 print(f"Saved to {saved_path} and created recipe card at {card_path}")
 
             # Timers suggestion based on recipe time
@@ -274,14 +340,15 @@ def main():
             print(explain_recipe(selected))
             continue
         # Try OpenAI for richer free-form follow-ups when configured
+        # (the answer is printed token by token as it streams in)
         openai_answer = None
         try:
-            openai_answer = ask_openai(q, selected)
+            openai_answer = ask_openai(q, selected, stream=True)
         except Exception:
             openai_answer = None
 
         if openai_answer:
-            print(openai_answer)
+            print()
             continue
 
         print("Sorry — I can answer substitution and time questions. For richer answers, set GROQ_API_KEY and run again.")
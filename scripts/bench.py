@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recipe helper against synthetic catalogs of increasing size.
+
+Run:
+  python scripts/bench.py                          # 10k and 100k recipes
+  python scripts/bench.py --sizes 10000,1000000 --queries 500
+  python scripts/bench.py --json bench_results.json
+
+For each size a seeded catalog is generated into bench_data/ (reused if it
+already exists) and the following are measured:
+- catalog load: JSON parse + index build, snapshot compile, snapshot open,
+  title index build
+- match_recipes, validate_ingredients, find_recipe_by_title_or_index and
+  parse_ingredients latency (p50/p95/p99) and throughput
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from scripts.generate_recipes import write_catalog
+from src import recipe_helper
+from src.recipe_helper import RecipeCatalog
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def summarize(samples):
+    """Latency percentiles (ms) and throughput (ops/s) for per-call timings in seconds."""
+    total = sum(samples)
+    return {
+        "calls": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "ops_per_s": len(samples) / total if total else 0.0,
+    }
+
+
+def time_calls(func, inputs):
+    samples = []
+    for args in inputs:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_size(path: Path, queries: int, seed: int):
+    results = {}
+
+    # Catalog load: cold JSON parse + index build vs. compiled snapshot
+    results["load_json_s"] = timed(lambda: RecipeCatalog(str(path), use_snapshot=False).warm())
+    results["compile_snapshot_s"] = timed(lambda: RecipeCatalog(str(path)).compile())
+    results["open_snapshot_s"] = timed(lambda: RecipeCatalog(str(path)).recipes)
+    results["open_snapshot_warm_s"] = timed(lambda: RecipeCatalog(str(path)).warm())
+
+    recipe_helper.load_catalog(str(path))
+    catalog = recipe_helper.CATALOG.warm()
+    results["title_index_s"] = timed(lambda: catalog.title_index)
+    rng = random.Random(seed)
+    vocab = catalog.index.terms
+    diets = [None, None] + list(catalog.diets.names)
+    titles = catalog.titles
+
+    # Pantries draw from the real vocabulary, with the odd unknown item
+    pantries = []
+    for _ in range(queries):
+        pantry = rng.sample(vocab, min(len(vocab), rng.randint(3, 8)))
+        if rng.random() < 0.2:
+            pantry.append("unobtainium")
+        pantries.append(pantry)
+
+    results["match_recipes"] = summarize(time_calls(
+        recipe_helper.match_recipes,
+        [(p, 2, rng.choice(diets), 5) for p in pantries],
+    ))
+    results["match_recipes_unlimited"] = summarize(time_calls(
+        recipe_helper.match_recipes,
+        [(p, 2, rng.choice(diets)) for p in pantries],
+    ))
+    results["validate_ingredients"] = summarize(time_calls(
+        recipe_helper.validate_ingredients, [(p,) for p in pantries]
+    ))
+
+    lookups = []
+    for _ in range(queries):
+        roll = rng.random()
+        if roll < 0.2:
+            lookups.append((str(rng.randint(1, len(titles))),))
+        elif roll < 0.9:
+            title = titles[rng.randrange(len(titles))].lower()
+            start = rng.randrange(max(1, len(title) - 4))
+            lookups.append((title[start:start + rng.randint(3, 10)],))
+        else:
+            lookups.append(("no such recipe",))
+    results["find_recipe_by_title_or_index"] = summarize(time_calls(
+        recipe_helper.find_recipe_by_title_or_index, lookups
+    ))
+
+    texts = [(", ".join(p),) if i % 2 else (" ".join(w.split()[0] for w in p),) for i, p in enumerate(pantries)]
+    results["parse_ingredients"] = summarize(time_calls(recipe_helper.parse_ingredients, texts))
+    return results
+
+
+def print_report(size: int, results):
+    print(f"\n=== {size:,} recipes ===")
+    print(f"load (json + index): {results['load_json_s']:.3f}s | compile snapshot: {results['compile_snapshot_s']:.3f}s | "
+          f"open snapshot: {results['open_snapshot_s'] * 1000:.1f}ms (warm indexes: {results['open_snapshot_warm_s']:.3f}s) | "
+          f"title index: {results['title_index_s']:.3f}s")
+    print(f"{'operation':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"{name:<32}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['ops_per_s']:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--queries", type=int, default=300, help="calls per measured operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=BASE / "bench_data")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    report = {}
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        path = args.data_dir / f"catalog_{size}.json"
+        if not path.exists():
+            print(f"Generating {size:,} recipes into {path} ...")
+            write_catalog(path, size, seed=args.seed)
+        results = bench_size(path, args.queries, args.seed)
+        print_report(size, results)
+        report[size] = results
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
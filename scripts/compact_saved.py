@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compact the saved-recipes store (saved_recipes.jsonl).
+
+Run: python scripts/compact_saved.py [path/to/saved_recipes.jsonl] [--dedupe]
+Rewrites the file without corrupt or torn lines; with --dedupe, only the
+latest save of each title is kept. Safe to run while the CLI is in use:
+saves wait for the rewrite and land in the compacted file.
+"""
+import os
+import sys
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from src.saved_store import DEFAULT_SAVED_PATH, SavedStore
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    path = args[0] if args else DEFAULT_SAVED_PATH
+    if not os.path.exists(path):
+        print(f"{path} not found; nothing to compact")
+        return
+
+    before = os.path.getsize(path)
+    stats = SavedStore(path, legacy_path=None).compact(dedupe="--dedupe" in sys.argv)
+    after = os.path.getsize(path)
+    print(f"Kept {stats['kept']} saved recipes, dropped {stats['corrupt']} corrupt line(s) and "
+          f"{stats['duplicates']} duplicate(s); {path} went from {before} to {after} bytes")
+
+
+if __name__ == '__main__':
+    main()
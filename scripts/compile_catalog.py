@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compile recipes.json into its memory-mappable snapshot (recipes.rcat).
+
+Run: python scripts/compile_catalog.py [path/to/recipes.json]
+The CLI also rebuilds the snapshot automatically when recipes.json changes;
+run this after editing the catalog so the first query doesn't pay for it.
+"""
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from src.recipe_helper import RecipeCatalog, RECIPES_PATH
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else RECIPES_PATH
+    if not Path(path).exists():
+        print(f"{path} not found; aborting")
+        return
+
+    start = time.perf_counter()
+    catalog = RecipeCatalog(path)
+    out = catalog.compile()
+    elapsed = time.perf_counter() - start
+
+    print(f"Compiled {len(catalog.recipes)} recipes ({len(catalog.index.terms)} ingredients, "
+          f"{len(catalog.diets.names)} diets) into {out} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
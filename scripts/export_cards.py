@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Export printable recipe cards in bulk, rewriting only cards whose content changed.
+
+Run:
+  python scripts/export_cards.py                         # every saved recipe
+  python scripts/export_cards.py --query "stir"          # recipes with "stir" in the title
+  python scripts/export_cards.py --ingredients "tofu, rice, garlic" --limit 20
+  python scripts/export_cards.py --all --out cards/      # the whole catalog
+
+Cards are rendered and written on a thread pool (see src/recipe_cards.py).
+A card whose content hash matches the one already on disk is skipped, so
+re-running after a catalog enrichment (allergens, nutrition) only rewrites
+the cards that actually changed.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from src.recipe_cards import DEFAULT_CARD_DIR, export_cards
+from src.recipe_helper import CATALOG, match_recipes, normalize, parse_ingredients, search_recipes_by_title
+from src.saved_store import DEFAULT_SAVED_PATH, SavedStore
+
+
+def saved_recipes(path: str):
+    """Catalog recipes for the saved titles (each title once); returns (recipes, titles not found)."""
+    recipes, missing, seen = [], [], set()
+    for entry in SavedStore(path).entries():
+        title = normalize(str(entry.get("title") or ""))
+        if not title or title in seen:
+            continue
+        seen.add(title)
+        hits = search_recipes_by_title(title, limit=1)
+        if hits and normalize(hits[0].get("title", "")) == title:
+            recipes.append(hits[0])
+        else:
+            missing.append(entry.get("title"))
+    return recipes, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--saved", default=DEFAULT_SAVED_PATH, help="saved-recipes store to export (default)")
+    source.add_argument("--query", help="export recipes whose title contains this text")
+    source.add_argument("--ingredients", help="export the best matches for these comma-separated ingredients")
+    source.add_argument("--all", action="store_true", help="export the whole catalog")
+    parser.add_argument("--limit", type=int, default=None, help="maximum recipes for --query/--ingredients")
+    parser.add_argument("--out", default=DEFAULT_CARD_DIR, help="card directory")
+    parser.add_argument("--workers", type=int, default=None, help="writer threads")
+    args = parser.parse_args()
+
+    missing = []
+    if args.all:
+        recipes = CATALOG.recipes
+    elif args.query:
+        recipes = search_recipes_by_title(args.query, limit=args.limit)
+    elif args.ingredients:
+        recipes = [r for r, _ in match_recipes(parse_ingredients(args.ingredients), limit=args.limit)]
+    else:
+        recipes, missing = saved_recipes(args.saved)
+
+    start = time.perf_counter()
+    stats = export_cards(recipes, args.out, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['written']} card(s) written, {stats['unchanged']} unchanged, "
+          f"{stats['duplicates']} duplicate file name(s) skipped in {args.out}/ ({elapsed:.2f}s)")
+    if missing:
+        print(f"{len(missing)} saved recipe(s) not in the catalog: {', '.join(map(str, missing[:10]))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 """
-Generate and append 100 simple recipe entries to `recipes.json`.
+Generate synthetic recipe catalogs (seeded, Zipf-distributed ingredients).
 
-Run: python scripts/generate_recipes.py
+Run:
+  python scripts/generate_recipes.py --count 100000 --out bench_data/catalog_100000.json
+  python scripts/generate_recipes.py --append        # old behaviour: add 100 recipes to recipes.json
+
+Ingredient popularity follows a Zipf distribution over the vocabulary (a few
+staples like salt and oil appear everywhere, most ingredients are rare), and
+diets are drawn from a weighted mix. Catalogs are streamed to disk, so 10M
+recipe files can be written without holding them in memory. The same seed
+always produces the same catalog.
 """
+import argparse
+import bisect
+import itertools
 import json
 import random
 from pathlib import Path
@@ -34,9 +45,20 @@ BASE_INGREDIENTS = [
     "sesame seeds", "spring onion", "chili flakes", "coriander"
 ]
 
+# Staples that show up in most real recipes; they head the Zipf ranking
+STAPLES = ["salt", "olive oil", "garlic", "onion", "pepper", "butter", "egg", "tomato"]
+
+# Modifiers used to grow the vocabulary beyond the base list for large catalogs
+MODIFIERS = [
+    "fresh", "dried", "smoked", "ground", "chopped", "roasted", "frozen", "canned",
+    "organic", "baby", "wild", "grated", "sliced", "pickled", "toasted", "minced",
+]
+
 DIETS = [
     ["vegan"], ["vegetarian"], ["pescatarian"], ["halal"], ["kosher"], ["vegetarian", "kosher"], []
 ]
+# Most recipes carry no diet tag; vegetarian and kosher tags are the most common
+DIET_WEIGHTS = [6, 14, 5, 8, 9, 8, 50]
 
 TEMPLATES = [
     ("{A} with {B}", [0,1]),
@@ -48,26 +70,89 @@ TEMPLATES = [
     ("{A} Bowl", [1,7])
 ]
 
-def make_recipe(i: int):
-    # pick 4-7 random ingredients
-    ings = random.sample(BASE_INGREDIENTS, k=random.randint(4,7))
-    title = f"{ings[0].capitalize()} {random.choice(['Delight','Special','Bowl','Sauté','Medley','Salad','Skillet'])}"
-    time = f"{random.choice([10,15,20,25,30,35,40,45])} minutes"
-    diets = random.choice(DIETS)
-    steps = [f"Prepare the {ings[0]} and other ingredients.", f"Cook {', '.join(ings[1:3])} until ready.", "Combine ingredients and serve."]
-    tags = [ings[0]]
+STYLES = ['Delight', 'Special', 'Bowl', 'Sauté', 'Medley', 'Salad', 'Skillet']
+
+
+def build_vocabulary(size: int, rng: random.Random):
+    """Return `size` ingredient names ordered from most to least popular."""
+    rest = [i for i in BASE_INGREDIENTS if i not in STAPLES]
+    rng.shuffle(rest)
+    vocab = STAPLES + rest
+    if size > len(vocab):
+        extra = [f"{m} {i}" for m, i in itertools.product(MODIFIERS, BASE_INGREDIENTS)]
+        rng.shuffle(extra)
+        vocab += extra
+        n = 1
+        while len(vocab) < size:
+            # Beyond the modifier combinations, fall back to numbered varieties
+            vocab += [f"{i} variety {n}" for i in BASE_INGREDIENTS]
+            n += 1
+    return vocab[:size]
+
+
+class ZipfSampler:
+    """Draw distinct ingredients with Zipf(s) popularity by vocabulary rank."""
+
+    def __init__(self, vocab, s: float, rng: random.Random):
+        self.vocab = vocab
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, len(vocab) + 1)))
+
+    def sample(self, k: int):
+        k = min(k, len(self.vocab))
+        picked = []
+        seen = set()
+        total = self.cum[-1]
+        while len(picked) < k:
+            idx = bisect.bisect_left(self.cum, self.rng.random() * total)
+            if idx not in seen:
+                seen.add(idx)
+                picked.append(self.vocab[idx])
+        return picked
+
+
+def make_recipe(i: int, rng: random.Random = random, sampler: ZipfSampler = None):
+    # pick 4-7 ingredients (Zipf-weighted when a sampler is given)
+    k = rng.randint(4, 7)
+    ings = sampler.sample(k) if sampler else rng.sample(BASE_INGREDIENTS, k=k)
+    # Title after the least common ingredient, which is what makes a dish distinctive
+    lead = ings[-1] if sampler else ings[0]
+    title = f"{lead.capitalize()} {rng.choice(STYLES)}"
+    time = f"{rng.choice([10,15,20,25,30,35,40,45])} minutes"
+    diets = rng.choices(DIETS, weights=DIET_WEIGHTS)[0] if sampler else rng.choice(DIETS)
+    steps = [f"Prepare the {lead} and other ingredients.", f"Cook {', '.join(ings[1:3])} until ready.", "Combine ingredients and serve."]
+    tags = [lead]
     return {
         "title": title,
         "ingredients": ings,
         "time": time,
-        "diets": diets,
+        "diets": list(diets),
         "steps": steps,
         "tags": tags
     }
 
-def main():
-    repo = Path(__file__).resolve().parents[1]
-    rpath = repo / "recipes.json"
+
+def write_catalog(path: Path, count: int, seed: int = 0, vocab_size: int = None, zipf_s: float = 1.1):
+    """Stream a synthetic catalog of `count` recipes to `path` as a JSON array."""
+    rng = random.Random(seed)
+    if vocab_size is None:
+        # Vocabulary grows sublinearly with catalog size, as it does in real data
+        vocab_size = max(len(BASE_INGREDIENTS), min(50000, int(count ** 0.6)))
+    sampler = ZipfSampler(build_vocabulary(vocab_size, rng), zipf_s, rng)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(count):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(make_recipe(i, rng, sampler), ensure_ascii=False))
+        f.write("\n]\n")
+    tmp.replace(path)
+
+
+def append_to_recipes(rpath: Path, to_add: int = 100):
     if not rpath.exists():
         print("recipes.json not found; aborting")
         return
@@ -79,7 +164,6 @@ def main():
             return
 
     start = len(data) + 1
-    to_add = 100
     for i in range(to_add):
         rec = make_recipe(start + i)
         data.append(rec)
@@ -89,5 +173,25 @@ def main():
 
     print(f"Appended {to_add} recipes to {rpath}")
 
+
+def main():
+    repo = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="number of recipes to generate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (same seed, same catalog)")
+    parser.add_argument("--out", type=Path, help="output JSON file (default: bench_data/catalog_<count>.json)")
+    parser.add_argument("--vocab-size", type=int, help="number of distinct ingredients (default grows with --count)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for ingredient popularity")
+    parser.add_argument("--append", action="store_true", help="append 100 random recipes to recipes.json instead")
+    args = parser.parse_args()
+
+    if args.append:
+        append_to_recipes(repo / "recipes.json")
+        return
+
+    out = args.out or repo / "bench_data" / f"catalog_{args.count}.json"
+    write_catalog(out, args.count, seed=args.seed, vocab_size=args.vocab_size, zipf_s=args.zipf)
+    print(f"Wrote {args.count} recipes to {out}")
+
 if __name__ == '__main__':
     main()
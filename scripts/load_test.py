@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Load-test the CLI's recipe flow end to end against the stub Groq server.
+
+Run:
+  python scripts/load_test.py                                  # 200 sessions, 16 concurrent
+  python scripts/load_test.py --sessions 1000 --concurrency 64 --rate-limit 0.05
+  python scripts/load_test.py --base-url http://127.0.0.1:8787 # an already running stub
+
+Each simulated session follows main.py's flow: parse the pantry, match
+locally, start the background generation of the missing recipes, take
+them as they arrive until the list is full, ingest them into the
+catalog, then ask one streamed follow-up question. Sessions run concurrently on threads and share the
+process-wide LLM client, response cache, retry policies and circuit
+breaker, just as the CLI does.
+
+Unless --base-url is given, a stub server (scripts/stub_groq_server.py) is
+started in-process with the latency and failure options below. The catalog
+is copied to a temporary directory, so ingested recipes and the response
+cache never touch the repository.
+
+Reported per metric: p50/p95/p99 latency, plus overall session throughput,
+cache hit rates, breaker state and the stub's request counters.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from scripts.bench import summarize
+from scripts.stub_groq_server import add_config_arguments, config_from_args, start_in_thread
+
+QUESTIONS = [
+    "Can I freeze this?",
+    "What can I serve with it?",
+    "Can I make it ahead of time?",
+    "Is this spicy?",
+    "How do I make it vegetarian?",
+]
+
+
+def make_pantries(vocab, count: int, repeat: float, rng: random.Random):
+    """Pantry texts; a `repeat` share comes from a small pool of popular pantries."""
+    popular = [", ".join(rng.sample(vocab, 3)) for _ in range(10)]
+    pantries = []
+    for _ in range(count):
+        if rng.random() < repeat:
+            pantries.append(rng.choice(popular))
+        else:
+            pantries.append(", ".join(rng.sample(vocab, rng.randint(3, 6))))
+    return pantries
+
+
+def run_session(text: str, diet, question: str, max_results: int, ingest: bool):
+    """One CLI session; returns timings in seconds (None where a stage didn't happen)."""
+    from src.openai_helper import ask_openai, start_generation
+    from src.recipe_helper import match_recipes, parse_ingredients
+    from src.recipe_ingest import ingest_generated
+
+    start = time.perf_counter()
+    ingredients = parse_ingredients(text)
+    matches = match_recipes(ingredients, min_match=2, diet=diet, limit=max_results)
+    options = [(r, count, "local") for r, count in matches]
+    first = time.perf_counter() - start if options else None
+
+    generation = None
+    if len(options) < max_results:
+        generation = start_generation(
+            ingredients=ingredients, diet=diet, meal_type=None,
+            count=max_results - len(options), avoid_titles=[r.get("title", "") for r, _, _ in options],
+        )
+    first_ai = None
+    if generation:
+        for r in generation.iter_recipes():
+            options.append((r, None, "ai"))
+            if first_ai is None:
+                first_ai = time.perf_counter() - start
+            if len(options) >= max_results:
+                generation.cancel()
+                break
+    if first is None:
+        first = first_ai
+    generated = [r for r, _, source in options if source == "ai"]
+    if ingest and generated:
+        ingest_generated(generated)
+    listed = time.perf_counter() - start
+
+    ask = None
+    if options:
+        ask_start = time.perf_counter()
+        ask_openai(question, options[0][0], stream=True, on_token=lambda text: None)
+        ask = time.perf_counter() - ask_start
+
+    return {
+        "first_suggestion": first,
+        "first_ai_recipe": first_ai,
+        "options_listed": listed,
+        "follow_up": ask,
+        "session": time.perf_counter() - start,
+        "local": len(options) - len(generated),
+        "generated": len(generated),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="total simulated sessions")
+    parser.add_argument("--concurrency", type=int, default=16, help="sessions running at once")
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--repeat", type=float, default=0.3, help="share of sessions reusing a popular pantry")
+    parser.add_argument("--catalog", type=Path, default=BASE / "recipes.json", help="recipes JSON to copy and serve")
+    parser.add_argument("--base-url", help="use a running stub server instead of starting one")
+    parser.add_argument("--no-ingest", action="store_true", help="don't write generated recipes back")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="recipe-load-")
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server, base_url = start_in_thread(config_from_args(args))
+    # Must be set before the helpers are imported: the cache path is read at import
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "stub")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite3")
+
+    from src import openai_helper, recipe_helper
+
+    catalog_path = os.path.join(workdir, "recipes.json")
+    shutil.copyfile(args.catalog, catalog_path)
+    recipe_helper.load_catalog(catalog_path).warm()
+
+    rng = random.Random(args.seed)
+    vocab = [t for t in recipe_helper.CATALOG.index.terms if t]
+    diets = [None, None, None] + list(recipe_helper.CATALOG.diets.names)
+    pantries = make_pantries(vocab, args.sessions, args.repeat, rng)
+    plans = [(p, rng.choice(diets), rng.choice(QUESTIONS)) for p in pantries]
+
+    print(f"Running {args.sessions} sessions ({args.concurrency} concurrent) against {base_url} ...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(
+            lambda plan: run_session(*plan, max_results=args.max_results, ingest=not args.no_ingest), plans
+        ))
+    wall = time.perf_counter() - start
+
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "wall_s": wall,
+        "sessions_per_s": args.sessions / wall if wall else 0.0,
+        "generated_recipes": sum(r["generated"] for r in results),
+        "sessions_without_options": sum(1 for r in results if r["first_suggestion"] is None),
+        "latency": {},
+        "cache": openai_helper.cache_stats(),
+        "breaker": openai_helper.LLM_BREAKER.state,
+        "catalog_size": len(recipe_helper.CATALOG.recipes),
+    }
+    for metric in ("first_suggestion", "first_ai_recipe", "options_listed", "follow_up", "session"):
+        samples = [r[metric] for r in results if r[metric] is not None]
+        report["latency"][metric] = summarize(samples)
+    if server is not None:
+        with server.config.lock:
+            report["stub"] = dict(server.config.stats)
+        server.shutdown()
+
+    print(f"\n{report['sessions']} sessions in {wall:.2f}s ({report['sessions_per_s']:.1f} sessions/s), "
+          f"{report['generated_recipes']} generated recipes, catalog now {report['catalog_size']} recipes")
+    print(f"{'metric':<20}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for metric, stats in report["latency"].items():
+        print(f"{metric:<20}{stats['calls']:>8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    for namespace, stats in report["cache"].items():
+        print(f"cache[{namespace}]: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})")
+    print(f"circuit breaker: {report['breaker']}")
+    if "stub" in report:
+        print("stub: " + ", ".join(f"{k}={v}" for k, v in report["stub"].items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote results to {args.json}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Groq chat-completions endpoint, for load and latency testing.
+
+Run:
+  python scripts/stub_groq_server.py --port 8787
+  python scripts/stub_groq_server.py --latency lognormal:-1.2,0.6 --rate-limit 0.1 --retry-after 0.5
+  GROQ_BASE_URL=http://127.0.0.1:8787 GROQ_API_KEY=stub python main.py
+
+Serves POST /openai/v1/chat/completions the way src/openai_helper.py calls it:
+- recipe generation prompts ("Generate 3-5 complete recipes using these
+  ingredients: ..." or "Generate 2 complete recipes ...") get a JSON array
+  of that many recipes built from those ingredients
+- any other prompt gets a short canned cooking answer
+- "stream": true responses are sent as server-sent events, one small chunk
+  of content per event, ending with "data: [DONE]"
+
+Failure injection (each a per-request probability):
+- --rate-limit: 429 with a Retry-After header (--retry-after seconds)
+- --server-error: 503
+- --malformed: a generation answer with prose around it and a truncated last recipe
+
+Latency is drawn per request from --latency:
+  fixed:S | uniform:LO,HI | exp:MEAN | lognormal:MU,SIGMA   (seconds)
+and streamed chunks are additionally spaced by --chunk-delay seconds.
+GET /stats returns request and outcome counters as JSON.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+STYLES = ["Skillet", "Bowl", "Stir-Fry", "Bake", "Salad", "Soup"]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec like "uniform:0.1,0.4" into a sampler returning seconds."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"unknown latency distribution: {spec!r}")
+
+
+class StubConfig:
+    """Behaviour of the stub server; all probabilities are per request."""
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        chunk_delay: float = 0.0,
+        rate_limit: float = 0.0,
+        retry_after: float = 1.0,
+        server_error: float = 0.0,
+        malformed: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = parse_latency(latency)
+        self.chunk_delay = chunk_delay
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.server_error = server_error
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0, "generate": 0, "ask": 0, "streamed": 0,
+            "rate_limited": 0, "server_errors": 0, "malformed": 0,
+        }
+
+    def roll(self) -> Dict[str, Any]:
+        """Draw this request's latency and injected failure under the shared RNG."""
+        with self.lock:
+            r = self.rng.random()
+            if r < self.rate_limit:
+                outcome = "rate_limited"
+            elif r < self.rate_limit + self.server_error:
+                outcome = "server_error"
+            else:
+                outcome = "ok"
+            return {
+                "latency": max(0.0, self.latency(self.rng)),
+                "outcome": outcome,
+                "malformed": self.rng.random() < self.malformed,
+                "seed": self.rng.randrange(1 << 30),
+            }
+
+    def count(self, *names: str):
+        with self.lock:
+            for name in names:
+                self.stats[name] += 1
+
+
+def generated_recipes(ingredients: List[str], rng: random.Random, count: int = None) -> List[Dict[str, Any]]:
+    """`count` (default 3-5) plausible recipes built from the requested ingredients."""
+    recipes = []
+    for _ in range(count or rng.randint(3, 5)):
+        picked = rng.sample(ingredients, min(len(ingredients), rng.randint(2, 4)))
+        recipes.append({
+            "title": f"{picked[0].title()} {rng.choice(STYLES)} #{rng.randrange(10000)}",
+            "ingredients": picked + rng.sample(["salt", "olive oil", "garlic", "pepper"], 2),
+            "steps": [f"Prepare the {', '.join(picked)}.", "Cook until done.", "Season and serve."],
+            "time": f"{rng.choice([10, 15, 20, 30, 40])} minutes",
+            "diets": [],
+            "allergens": [],
+            "nutrition": {"calories": rng.randint(200, 700), "protein_g": 20, "carbs_g": 40, "fat_g": 12},
+        })
+    return recipes
+
+
+def completion_content(messages: List[Dict[str, Any]], roll: Dict[str, Any]) -> Tuple[str, str]:
+    """Return (kind, content) for a chat request: a recipe JSON array or an answer."""
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    rng = random.Random(roll["seed"])
+    match = re.search(r"using these ingredients: (.*)", prompt)
+    if not match:
+        return "ask", "1. Yes. 2. Let it cool, then store it airtight for up to 3 days. 3. Reheat gently."
+    ingredients = [i.strip() for i in match.group(1).split(",") if i.strip()] or ["rice"]
+    count = re.search(r"Generate (\d+) complete recipe", prompt)
+    content = json.dumps(generated_recipes(ingredients, rng, int(count.group(1)) if count else None), indent=2)
+    if roll["malformed"]:
+        # Prose around the array and the last recipe cut off mid-object
+        content = "Here are some ideas!\n```json\n" + content[: int(len(content) * 0.85)]
+    return "generate", content
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "StubGroq/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self) -> StubConfig:
+        return self.server.config
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.config.lock:
+                stats = dict(self.config.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            request = json.loads(raw)
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        config = self.config
+        roll = config.roll()
+        config.count("requests")
+        time.sleep(roll["latency"])
+
+        if roll["outcome"] == "rate_limited":
+            config.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{config.retry_after:g}"},
+            )
+            return
+        if roll["outcome"] == "server_error":
+            config.count("server_errors")
+            self._send_json(503, {"error": {"message": "Service unavailable", "type": "internal_server_error"}})
+            return
+
+        kind, content = completion_content(request.get("messages", []), roll)
+        config.count(kind)
+        if kind == "generate" and roll["malformed"]:
+            config.count("malformed")
+        model = request.get("model", "stub")
+        created = int(time.time())
+        rid = f"chatcmpl-stub-{roll['seed']}"
+
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": rid, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+            })
+            return
+
+        config.count("streamed")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            # Roughly token-sized pieces
+            for piece in re.findall(r"\s*\S{1,12}|\s+", content):
+                chunk = {
+                    "id": rid, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if config.chunk_delay:
+                    time.sleep(config.chunk_delay)
+            done = {
+                "id": rid, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled mid-stream
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, config: StubConfig = None, verbose: bool = False):
+    """Create (but don't start) a stub server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+    """Serve on a daemon thread; returns (server, base_url)."""
+    server = make_server(host, port, config)
+    threading.Thread(target=server.serve_forever, name="stub-groq", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="lognormal:-1.0,0.5", help="per-request latency distribution (seconds)")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="seconds between streamed chunks")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--server-error", type=float, default=0.0, help="probability of a 503 response")
+    parser.add_argument("--malformed", type=float, default=0.0, help="probability of a malformed generation answer")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(
+        latency=args.latency, chunk_delay=args.chunk_delay, rate_limit=args.rate_limit,
+        retry_after=args.retry_after, server_error=args.server_error, malformed=args.malformed, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, config_from_args(args), verbose=args.verbose)
+    print(f"Stub Groq server on http://{args.host}:{server.server_address[1]} "
+          f"(set GROQ_BASE_URL to this and GROQ_API_KEY to anything)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
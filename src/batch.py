@@ -0,0 +1,204 @@
+"""
+src/batch.py
+============
+Non-interactive batch mode: one JSON request per input line, one JSON result per output line.
+
+Run through main.py:
+  python main.py --batch < requests.jsonl > results.jsonl
+  python main.py --batch=requests.jsonl --output=results.jsonl --workers=4 --no-ai
+
+Request lines (only "ingredients" is required):
+  {"id": "a1", "ingredients": "chicken, rice, broccoli", "diet": "halal",
+   "meal_type": "dinner", "max_results": 5}
+"ingredients" may be a comma-separated string (parsed like the CLI input)
+or a list, whose items are kept whole ("bell pepper" stays one
+ingredient). Blank lines are skipped.
+
+Result lines, in input order:
+  {"id": "a1", "line": 1, "ingredients": [...],
+   "options": [{"source": "local", "matches": 3, "recipe": {...}},
+               {"source": "ai", "matches": null, "recipe": {...}}]}
+A line that can't be used yields {"id": ..., "line": n, "error": "..."}
+and the batch carries on.
+
+Every request uses the one warm catalog. Input is processed in chunks of
+BATCH_CHUNK lines. Local matching for a chunk goes through
+match_recipes_many, with one call per diet, on `workers` processes
+started once per run (before any AI threads, see MatchPool). When
+AI is on, requests with open slots have their missing recipes generated
+concurrently on AI_CONCURRENCY threads (need-sized fan-out, see
+openai_helper). The generated recipes are ingested into the catalog, as
+in the interactive flow.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional
+
+from src.openai_helper import generate_recipes_from_ingredients
+from src.recipe_helper import MatchPool, match_recipes_many, normalize, parse_ingredients
+from src.recipe_ingest import ingest_generated
+
+BATCH_CHUNK = 1000    # requests matched (and written) together
+AI_CONCURRENCY = 8    # requests generating AI recipes at once
+
+
+def parse_request(line: str, number: int, default_max: int = 5) -> Dict[str, Any]:
+    """Turn one input line into a request dict, or an error result when it is unusable."""
+    try:
+        raw = json.loads(line)
+    except ValueError as e:
+        return {"line": number, "error": f"invalid JSON: {e}"}
+    return validate_request(raw, number, default_max)
+
+
+def validate_request(raw: Any, number: int, default_max: int = 5) -> Dict[str, Any]:
+    """Check a decoded request object; returns the request dict or an error result."""
+    if not isinstance(raw, dict):
+        return {"line": number, "error": "request must be a JSON object"}
+
+    request_id = raw.get("id")
+    ingredients = raw.get("ingredients")
+    if isinstance(ingredients, str):
+        ingredients = parse_ingredients(ingredients)
+    elif isinstance(ingredients, list) and all(isinstance(i, str) for i in ingredients):
+        ingredients = [normalize(i) for i in ingredients if i.strip()]
+    else:
+        return {"id": request_id, "line": number, "error": "ingredients must be a string or a list of strings"}
+    if not ingredients:
+        return {"id": request_id, "line": number, "error": "no ingredients"}
+
+    max_results = raw.get("max_results", default_max)
+    if not isinstance(max_results, int) or isinstance(max_results, bool) or max_results < 1:
+        return {"id": request_id, "line": number, "error": "max_results must be a positive integer"}
+    diet = raw.get("diet") or None
+    meal_type = raw.get("meal_type") or None
+    if not isinstance(diet, (str, type(None))) or not isinstance(meal_type, (str, type(None))):
+        return {"id": request_id, "line": number, "error": "diet and meal_type must be strings"}
+
+    return {
+        "id": request_id,
+        "line": number,
+        "ingredients": ingredients,
+        "diet": diet,
+        "meal_type": meal_type,
+        "max_results": max_results,
+    }
+
+
+def _generate_missing(request: Dict[str, Any], options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    recipes = generate_recipes_from_ingredients(
+        request["ingredients"],
+        diet=request["diet"],
+        meal_type=request["meal_type"],
+        count=request["max_results"] - len(options),
+        avoid_titles=[o["recipe"].get("title", "") for o in options],
+    )
+    return recipes or []
+
+
+def ingest_recipes(recipes: List[Dict[str, Any]]) -> None:
+    """Keep new generated recipes in the local catalog, as the CLI does."""
+    try:
+        ingest_generated(recipes)
+    except OSError:
+        pass
+
+
+def run_chunk(
+    requests: List[Dict[str, Any]],
+    workers: Optional[int] = 1,
+    allow_ai: bool = True,
+    pool: Optional[ThreadPoolExecutor] = None,
+    processes: Optional[MatchPool] = None,
+    ingest: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Answer parsed requests (error results pass through); returns results in order.
+
+    Matching uses `processes` when given, else `workers` (see match_recipes_many);
+    AI generation runs on `pool` when given, else inline. Generated recipes
+    go to `ingest` (default: ingest_recipes, inline).
+    """
+    valid = [r for r in requests if "error" not in r]
+
+    # One match_recipes_many call per diet; the largest max_results in the
+    # group is the limit, and each request keeps its own top entries
+    options: Dict[int, List[Dict[str, Any]]] = {}
+    groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for r in valid:
+        groups.setdefault(r["diet"], []).append(r)
+    for diet, group in groups.items():
+        limit = max(r["max_results"] for r in group)
+        pantries = [r["ingredients"] for r in group]
+        ranked = match_recipes_many(pantries, diet=diet, workers=workers, limit=limit, pool=processes)
+        for r, matches in zip(group, ranked):
+            options[r["line"]] = [
+                {"source": "local", "matches": count, "recipe": recipe} for recipe, count in matches[: r["max_results"]]
+            ]
+
+    if allow_ai:
+        short = [r for r in valid if len(options[r["line"]]) < r["max_results"]]
+        if pool is not None:
+            futures = [pool.submit(_generate_missing, r, options[r["line"]]) for r in short]
+            filled = [(r["line"], future.result()) for r, future in zip(short, futures)]
+        else:
+            filled = [(r["line"], _generate_missing(r, options[r["line"]])) for r in short]
+        generated = []
+        for line, recipes in filled:
+            options[line].extend({"source": "ai", "matches": None, "recipe": recipe} for recipe in recipes)
+            generated.extend(recipes)
+        if generated:
+            (ingest or ingest_recipes)(generated)
+
+    results = []
+    for r in requests:
+        if "error" in r:
+            results.append(r)
+        else:
+            results.append({"id": r["id"], "line": r["line"], "ingredients": r["ingredients"], "options": options[r["line"]]})
+    return results
+
+
+def run_batch(
+    lines: Iterable[str],
+    out: IO[str],
+    workers: Optional[int] = 1,
+    allow_ai: bool = True,
+    default_max: int = 5,
+) -> Dict[str, int]:
+    """Answer every request line, writing one JSON result line each (flushed per chunk).
+
+    Returns:
+        Counts of requests, errors and options written
+    """
+    stats = {"requests": 0, "errors": 0, "local": 0, "ai": 0}
+    # Fork the matching processes first: no AI threads may be running yet
+    processes = MatchPool(workers) if workers is None or workers > 1 else None
+    pool = ThreadPoolExecutor(AI_CONCURRENCY, thread_name_prefix="batch-ai") if allow_ai else None
+
+    def flush(chunk):
+        for result in run_chunk(chunk, workers=workers, allow_ai=allow_ai, pool=pool, processes=processes):
+            stats["requests"] += 1
+            if "error" in result:
+                stats["errors"] += 1
+            for option in result.get("options", ()):
+                stats[option["source"]] += 1
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+    try:
+        chunk = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            chunk.append(parse_request(line, number, default_max))
+            if len(chunk) >= BATCH_CHUNK:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if processes is not None:
+            processes.close()
+    return stats
@@ -0,0 +1,304 @@
+"""
+src/catalog_snapshot.py
+=======================
+Compiled, memory-mappable snapshot of the recipe catalog.
+
+recipes.json has to be parsed in full by every process that reads it. A
+snapshot holds the same catalog in a binary layout that is mmap'd and used
+without parsing:
+
+- interned ingredient vocabulary (term id -> normalized ingredient)
+- ingredient postings (term id -> ascending recipe ids)
+- diet names, raw diet labels and one recipe bitmap per diet
+- recipe titles, and each full recipe record (ingredients, steps, ...) as a
+  compact JSON blob that is only decoded when that recipe is accessed
+
+The header records the source JSON's mtime, size and SHA-256 so a stale
+snapshot is detected and rebuilt by the caller. Processes mapping the same
+snapshot file share its pages through the OS page cache.
+
+All integers are stored in native byte order; a snapshot written on a host
+with a different byte order is treated as stale.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+MAGIC = b"RCAT"
+VERSION = 1
+_BYTE_ORDER_MARK = 0x01020304
+
+_SECTIONS = (
+    "term_offsets", "term_blob",
+    "post_offsets", "post_ids",
+    "diets", "diet_bitmaps",
+    "title_offsets", "title_blob",
+    "record_offsets", "record_blob",
+)
+
+# magic, version, byte order mark, source mtime_ns, source size, source sha256,
+# recipe count, term count, diet count, then (offset, length) per section
+_HEADER = struct.Struct("=4sIIQQ32sIII" + "QQ" * len(_SECTIONS))
+_STAMP_OFFSET = 12  # position of (mtime_ns, size) inside the header
+_ALIGN = 8
+
+
+def source_stamp(path: str) -> Tuple[int, int]:
+    """Return (mtime_ns, size) of a file, used to detect catalog edits cheaply."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def file_sha256(path: str) -> bytes:
+    """Return the SHA-256 digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def default_snapshot_path(json_path: str) -> str:
+    """Snapshot location for a catalog JSON file: recipes.json -> recipes.rcat."""
+    return os.path.splitext(json_path)[0] + ".rcat"
+
+
+class _StringTable(Sequence):
+    """Read-only sequence of UTF-8 strings backed by an offsets array and a blob."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _raw(self, i: int) -> bytes:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return self._raw(i).decode("utf-8")
+
+
+class _RecordTable(_StringTable):
+    """Recipe records stored as JSON blobs, decoded (and cached) on access.
+
+    Decoded dicts are cached so repeated lookups return the same object, like
+    indexing into a list loaded from recipes.json.
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        super().__init__(offsets, blob)
+        self._cache: Dict[int, Dict[str, Any]] = {}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        record = self._cache.get(i)
+        if record is None:
+            if not 0 <= i < len(self):
+                raise IndexError("recipe index out of range")
+            record = json.loads(self._raw(i))
+            self._cache[i] = record
+        return record
+
+
+class _Postings(Sequence):
+    """Per-term recipe id lists, each a zero-copy slice of the mapped file."""
+
+    def __init__(self, offsets: memoryview, ids: memoryview):
+        self.offsets = offsets
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, tid: int) -> memoryview:
+        return self.ids[self.offsets[tid]:self.offsets[tid + 1]]
+
+
+class Snapshot:
+    """A mapped catalog snapshot file.
+
+    Attributes mirror what recipe_helper needs to serve queries: `terms`,
+    `postings`, `diet_names`, `diet_labels`, `diet_bitmaps`, `titles` and
+    `recipes` (lazily decoded records).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if len(buf) < _HEADER.size:
+            raise ValueError("snapshot file is truncated")
+
+        fields = _HEADER.unpack_from(buf)
+        magic, version, bom = fields[0:3]
+        if magic != MAGIC or version != VERSION or bom != _BYTE_ORDER_MARK:
+            raise ValueError("not a compatible recipe snapshot")
+        self.source_mtime_ns, self.source_size, self.source_sha256 = fields[3:6]
+        self.n_recipes, self.n_terms, self.n_diets = fields[6:9]
+
+        sections = {}
+        for i, name in enumerate(_SECTIONS):
+            offset, length = fields[9 + 2 * i], fields[10 + 2 * i]
+            if offset + length > len(buf):
+                raise ValueError("snapshot file is truncated")
+            sections[name] = buf[offset:offset + length]
+
+        self.terms: List[str] = list(_StringTable(sections["term_offsets"].cast("Q"), sections["term_blob"]))
+        self.postings = _Postings(sections["post_offsets"].cast("Q"), sections["post_ids"].cast("I"))
+
+        diets = json.loads(bytes(sections["diets"]))
+        self.diet_names: List[str] = diets["names"]
+        self.diet_labels: List[str] = diets["labels"]
+        nbytes = (self.n_recipes + 7) // 8
+        bitmaps = sections["diet_bitmaps"]
+        self.diet_bitmaps = [bitmaps[i * nbytes:(i + 1) * nbytes] for i in range(self.n_diets)]
+
+        self.titles = _StringTable(sections["title_offsets"].cast("Q"), sections["title_blob"])
+        self.recipes = _RecordTable(sections["record_offsets"].cast("Q"), sections["record_blob"])
+
+    def refresh_stamp(self, mtime_ns: int, size: int) -> None:
+        """Record a new source mtime after confirming the content hash is unchanged."""
+        with open(self.path, "r+b") as f:
+            f.seek(_STAMP_OFFSET)
+            f.write(struct.pack("=QQ", mtime_ns, size))
+
+
+def open_snapshot(path: str, source_path: str) -> Optional[Snapshot]:
+    """Open a snapshot if it exists and still matches its source JSON.
+
+    The source's mtime and size are compared first; if they differ, the
+    content hash decides, so a touched-but-unchanged file is not rebuilt.
+
+    Returns:
+        Snapshot, or None when it is missing, unreadable or stale
+    """
+    try:
+        snap = Snapshot(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    try:
+        mtime_ns, size = source_stamp(source_path)
+    except OSError:
+        # Source JSON not present (snapshot-only deployment): trust the snapshot
+        return snap
+
+    if (mtime_ns, size) == (snap.source_mtime_ns, snap.source_size):
+        return snap
+    if size == snap.source_size:
+        try:
+            if file_sha256(source_path) == snap.source_sha256:
+                try:
+                    snap.refresh_stamp(mtime_ns, size)
+                except OSError:
+                    pass
+                return snap
+        except OSError:
+            pass
+    return None
+
+
+def _string_table(strings: Iterable[str]) -> Tuple[array, bytes]:
+    offsets = array("Q", [0])
+    chunks = []
+    total = 0
+    for s in strings:
+        b = s.encode("utf-8")
+        chunks.append(b)
+        total += len(b)
+        offsets.append(total)
+    return offsets, b"".join(chunks)
+
+
+def write_snapshot(
+    path: str,
+    *,
+    stamp: Tuple[int, int],
+    source_sha256: bytes,
+    terms: List[str],
+    postings: List[Iterable[int]],
+    diet_names: List[str],
+    diet_labels: List[str],
+    diet_bitmaps: List[bytes],
+    titles: List[str],
+    recipes: List[Dict[str, Any]],
+) -> None:
+    """Write a catalog snapshot atomically (temp file + rename).
+
+    Readers that already mapped an older snapshot keep using it untouched.
+    """
+    term_offsets, term_blob = _string_table(terms)
+
+    post_offsets = array("Q", [0])
+    post_ids = array("I")
+    for ids in postings:
+        post_ids.extend(ids)
+        post_offsets.append(len(post_ids))
+
+    diets_blob = json.dumps({"names": diet_names, "labels": diet_labels}).encode("utf-8")
+    bitmaps_blob = b"".join(bytes(b) for b in diet_bitmaps)
+    title_offsets, title_blob = _string_table(titles)
+    record_offsets, record_blob = _string_table(
+        json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in recipes
+    )
+
+    payloads = {
+        "term_offsets": term_offsets.tobytes(), "term_blob": term_blob,
+        "post_offsets": post_offsets.tobytes(), "post_ids": post_ids.tobytes(),
+        "diets": diets_blob, "diet_bitmaps": bitmaps_blob,
+        "title_offsets": title_offsets.tobytes(), "title_blob": title_blob,
+        "record_offsets": record_offsets.tobytes(), "record_blob": record_blob,
+    }
+
+    layout = []
+    offset = _HEADER.size
+    for name in _SECTIONS:
+        offset += -offset % _ALIGN
+        layout.append((offset, len(payloads[name])))
+        offset += len(payloads[name])
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, _BYTE_ORDER_MARK,
+        stamp[0], stamp[1], source_sha256,
+        len(recipes), len(terms), len(diet_names),
+        *[v for pair in layout for v in pair],
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".rcat-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            pos = _HEADER.size
+            for name, (offset, _) in zip(_SECTIONS, layout):
+                f.write(b"\0" * (offset - pos))
+                f.write(payloads[name])
+                pos = offset + len(payloads[name])
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,265 @@
+"""
+src/llm_cache.py
+================
+Two-tier cache for LLM responses.
+
+Identical requests (the same pantry, diet, meal type and model) come up over
+and over, and each one costs a multi-second completion. ResponseCache keeps:
+
+- an in-memory LRU of the most recently used entries, for sub-millisecond hits
+  within a process
+- an on-disk SQLite tier shared by every process and kept across runs
+
+Entries expire after a TTL, and the disk tier is trimmed to a maximum number
+of entries by evicting the least recently used ones. Memory hits refresh
+the disk access times in batches, so hot entries are not evicted first.
+Writes keep a running row count instead of counting the table, and expired
+rows are swept (and the count resynced) every SWEEP_INTERVAL. Values are
+anything JSON-serializable. Keys are grouped into namespaces so unrelated
+callers (e.g. recipe generation and follow-up answers) can share one
+database, and hit/miss counters are kept per namespace (see `hit_rates`).
+
+The cache is best-effort: if the database cannot be opened or written, it
+quietly degrades to memory-only.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+BASE = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE, ".cache", "llm_cache.sqlite3")
+
+# Sentinel for "not cached", since None is a valid cached value
+MISSING = object()
+
+TOUCH_BATCH = 64          # memory hits buffered before their disk access times are written
+TOUCH_INTERVAL = 30.0     # seconds; buffered access times are written at least this often
+SWEEP_INTERVAL = 300.0    # seconds between sweeps of expired disk entries
+
+
+def make_key(*parts: Any) -> str:
+    """Stable SHA-256 key for a tuple of JSON-serializable parts."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU memory tier in front of a SQLite disk tier, with TTL and size-based eviction.
+
+    Args:
+        path: SQLite database file (None for a memory-only cache)
+        ttl: Seconds an entry stays valid (None: never expires)
+        max_memory: Maximum entries held in the in-memory LRU
+        max_entries: Maximum entries kept on disk; the least recently used
+            are evicted beyond this
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_memory: int = 256,
+        max_entries: int = 10000,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self.stats: Dict[str, int] = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._namespace_stats: Dict[str, Dict[str, int]] = {}
+        # Disk rows as of the last count plus this process's inserts since
+        self._rows = 0
+        self._last_sweep = 0.0
+        # Access times of memory hits not yet written to the disk tier
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._last_touch = 0.0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # Called with the lock held
+        if self._db is not None or self._db_failed or not self.path:
+            return self._db
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+            (self._rows,) = db.execute("SELECT COUNT(*) FROM entries").fetchone()
+            self._last_sweep = self._last_touch = time.time()
+            self._db = db
+        except sqlite3.Error:
+            self._db_failed = True
+        return self._db
+
+    def _count(self, namespace: str, *fields: str):
+        # Called with the lock held
+        counters = self._namespace_stats.setdefault(
+            namespace, {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+        for field in fields:
+            self.stats[field] += 1
+            counters[field] += 1
+
+    def hit_rates(self) -> Dict[str, Dict[str, float]]:
+        """Counters and hit rate since startup, overall ("total") and per namespace."""
+        with self._lock:
+            report = {"total": dict(self.stats)}
+            report.update({ns: dict(c) for ns, c in self._namespace_stats.items()})
+        for counters in report.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return report
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, mkey: Tuple[str, str], created: float, value: Any):
+        self._memory[mkey] = (created, value)
+        self._memory.move_to_end(mkey)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def get(self, namespace: str, key: str, default: Any = MISSING) -> Any:
+        """Return the cached value, or `default` when missing or expired."""
+        now = time.time()
+        mkey = (namespace, key)
+        with self._lock:
+            entry = self._memory.get(mkey)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(mkey)
+                    self._count(namespace, "hits", "memory_hits")
+                    self._touch(mkey, now)
+                    return entry[1]
+                del self._memory[mkey]
+
+            db = self._connect()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, created FROM entries WHERE namespace = ? AND key = ?", mkey
+                    ).fetchone()
+                    if row is not None and not self._expired(row[1], now):
+                        db.execute(
+                            "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (now, *mkey)
+                        )
+                        value = json.loads(row[0])
+                        self._remember(mkey, row[1], value)
+                        self._count(namespace, "hits", "disk_hits")
+                        return value
+                    if row is not None:
+                        db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", mkey)
+                        self._rows -= 1
+                except (sqlite3.Error, ValueError):
+                    pass
+
+            self._count(namespace, "misses")
+            return default
+
+    def set(self, namespace: str, key: str, value: Any):
+        """Store a JSON-serializable value in both tiers."""
+        now = time.time()
+        mkey = (namespace, key)
+        blob = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(mkey, now, value)
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                self._touched.pop(mkey, None)
+                exists = db.execute("SELECT 1 FROM entries WHERE namespace = ? AND key = ?", mkey).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, blob, now, now),
+                )
+                if exists is None:
+                    self._rows += 1
+                self._evict(db, now)
+            except sqlite3.Error:
+                pass
+
+    def _touch(self, mkey: Tuple[str, str], now: float):
+        # Called with the lock held
+        db = self._connect()
+        if db is None:
+            return
+        self._touched[mkey] = now
+        if len(self._touched) >= TOUCH_BATCH or now - self._last_touch >= TOUCH_INTERVAL:
+            try:
+                self._flush_touches(db, now)
+            except sqlite3.Error:
+                pass
+
+    def _flush_touches(self, db: sqlite3.Connection, now: float):
+        if self._touched:
+            db.executemany(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                [(accessed, *mkey) for mkey, accessed in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_touch = now
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            # Expired rows are otherwise only dropped when read; the sweep
+            # also picks up rows written by other processes
+            if self.ttl is not None:
+                db.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+            (self._rows,) = db.execute("SELECT COUNT(*) FROM entries").fetchone()
+            self._last_sweep = now
+        if self._rows > self.max_entries:
+            # Trim by the true least recently used, memory hits included
+            self._flush_touches(db, now)
+            db.execute(
+                "DELETE FROM entries WHERE rowid IN"
+                " (SELECT rowid FROM entries ORDER BY accessed LIMIT ?)",
+                (self._rows - self.max_entries,),
+            )
+            self._rows = self.max_entries
+
+    def clear(self, namespace: Optional[str] = None):
+        """Drop all entries, or only those in `namespace`."""
+        with self._lock:
+            if namespace is None:
+                self._memory.clear()
+            else:
+                for mkey in [k for k in self._memory if k[0] == namespace]:
+                    del self._memory[mkey]
+            db = self._connect()
+            if db is not None:
+                try:
+                    if namespace is None:
+                        db.execute("DELETE FROM entries")
+                    else:
+                        db.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+                    (self._rows,) = db.execute("SELECT COUNT(*) FROM entries").fetchone()
+                except sqlite3.Error:
+                    pass
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._flush_touches(self._db, time.time())
+                except sqlite3.Error:
+                    pass
+                self._db.close()
+                self._db = None
@@ -4,62 +4,384 @@ Wrapper around the Groq API for fast, free cooking assistance.
 This module provides:
 - ask_openai(): Answer free-form questions about a recipe (uses Groq)
 - generate_recipes_from_ingredients(): Generate full recipes from user ingredients (uses Groq)
+- iter_generated_recipes(): Stream generation, yielding each recipe as it is parsed
+- start_generation(): Run streamed generation in the background (GenerationJob)
+- get_client() / reset_client(): The shared Groq client used by both helpers
+- RESPONSE_CACHE: Memory + SQLite cache of generated recipes and answers (see llm_cache)
+- cache_stats(): Cache hit/miss counters and hit rates
+- ASK_RETRY / GENERATE_RETRY / LLM_BREAKER: Retry policies and the shared circuit breaker
+- get_rate_limiter(): Client-side RPM/TPM limiter shared across processes (see rate_limiter)
 
 Note: Despite the filename, this now uses Groq API for fast, free inference.
+
+One Groq client (and with it one pooled, kept-alive HTTP connection set) is
+shared by every call in the process. It is rebuilt only when GROQ_API_KEY or
+GROQ_BASE_URL changes; set GROQ_BASE_URL to point the helpers at a local stub
+server (e.g. http://127.0.0.1:8000 for load testing).
+
+Generated recipes (by pantry, diet, meal type and model) and follow-up answers
+(by recipe and normalized question) are cached in .cache/llm_cache.sqlite3; set LLM_CACHE_PATH to move the database, or to an
+empty string to keep the cache in memory only.
+
+Transient failures (429, 5xx, timeouts) are retried with jittered backoff,
+honouring Retry-After, within a per-call deadline. After repeated failures
+the shared circuit breaker skips the LLM entirely for a cool-off period, so
+the CLI falls back to local results at once (see retry_policy).
+
+Asked for an exact number of recipes (count=...), generation fans out into
+small concurrent requests and keeps those finished within FANOUT_DEADLINE,
+instead of waiting on one long completion.
+
+Set GROQ_RPM and/or GROQ_TPM to the account's quota to have every request
+wait for capacity in a token bucket shared by all processes using the key,
+instead of being sent and rejected with 429 (see rate_limiter).
 """
+import copy
 import os
 import json
+import queue
+import re
+import sys
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from concurrent.futures import CancelledError, Future
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
+
+from src.llm_cache import DEFAULT_CACHE_PATH, MISSING, ResponseCache, make_key
+from src.rate_limiter import CHARS_PER_TOKEN, NoCapacity, estimate_tokens, limiter_from_env
+from src.recipe_helper import normalize
+from src.retry_policy import CircuitBreaker, CircuitOpenError, RetryCancelled, RetryPolicy
 
 try:
-    from groq import Groq, RateLimitError, APIError
+    from groq import Groq, RateLimitError, APIError, DefaultHttpxClient
+    import httpx
 except Exception:
     Groq = None
     RateLimitError = None
     APIError = None
+    DefaultHttpxClient = None
+    httpx = None
 
 
-def _retry_with_backoff(func, max_retries=3, initial_delay=1.0):
-    """Retry a function with exponential backoff for rate limit errors.
-    
+class _ClientManager:
+    """Process-wide Groq client, rebuilt only when its configuration changes.
+
+    Creating a client per call throws away its connection pool, so every
+    request would pay for a new TCP + TLS handshake. The manager keeps one
+    client per (api_key, base_url) and closes the old one when either changes.
+    """
+
+    # Connection pool sizing; enough for a handful of concurrent generations
+    MAX_CONNECTIONS = 20
+    MAX_KEEPALIVE = 10
+    KEEPALIVE_EXPIRY = 120.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._config: Optional[Tuple[str, Optional[str]]] = None
+
+    def get(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """Return the shared client, or None when the key or library is missing."""
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        if not api_key or Groq is None:
+            return None
+
+        config = (api_key, base_url)
+        with self._lock:
+            if self._client is not None and self._config == config:
+                return self._client
+            self._close()
+            try:
+                http_client = DefaultHttpxClient(limits=httpx.Limits(
+                    max_connections=self.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MAX_KEEPALIVE,
+                    keepalive_expiry=self.KEEPALIVE_EXPIRY,
+                ))
+                # Retries are handled by our RetryPolicy, not by the SDK
+                self._client = Groq(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+            except Exception:
+                return None
+            self._config = config
+            return self._client
+
+    def reset(self):
+        """Close the shared client; the next call builds a fresh one."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+        self._client = None
+        self._config = None
+
+
+_CLIENTS = _ClientManager()
+
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """Return the shared Groq client (None when GROQ_API_KEY or groq is missing).
+
     Args:
-        func: Function to retry
-        max_retries: Maximum number of retry attempts
-        initial_delay: Initial delay in seconds (doubles each retry)
-        
+        api_key: Override for GROQ_API_KEY
+        base_url: Override for GROQ_BASE_URL (default: the Groq API)
+    """
+    return _CLIENTS.get(api_key, base_url)
+
+
+def reset_client():
+    """Drop the shared client, e.g. after rotating the API key."""
+    _CLIENTS.reset()
+
+
+def get_rate_limiter():
+    """Return the rate limiter for GROQ_API_KEY (None unless GROQ_RPM or GROQ_TPM is set)."""
+    return limiter_from_env(os.getenv("GROQ_API_KEY") or "")
+
+
+RESPONSE_CACHE = ResponseCache(os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None)
+
+GENERATE_NAMESPACE = "generate"
+# Recipes from count-based fan-out requests. Kept apart from the complete
+# 3-5 recipe answers so a partial set never answers a plain request.
+FANOUT_NAMESPACE = "generate-fanout"
+
+
+def _generation_key(ingredients: List[str], diet: Optional[str], meal_type: Optional[str], model: str) -> str:
+    """Cache key for a generation request; ingredient order, case and duplicates don't matter."""
+    pantry = sorted({" ".join(normalize(i).split()) for i in ingredients} - {""})
+    return make_key(pantry, normalize(diet or "") or None, normalize(meal_type or "") or None, model)
+
+
+ASK_NAMESPACE = "ask"
+
+# Filler words dropped from questions before keying the answer cache. Negations
+# and prepositions like "without" are kept since they change the answer.
+QUESTION_STOPWORDS = frozenset("""
+    a an the i im i'm me my we our you your it its it's this that these those
+    is are am was be been do does did can could would should will shall may might
+    please pls just hey hi ok okay so um uh also really
+""".split())
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a follow-up question: lowercased, no punctuation, no filler words.
+
+    "Can I freeze this?" and "can i freeze it" both become "freeze".
+    """
+    words = re.findall(r"[a-z0-9']+", question.lower())
+    kept = [w for w in (w.strip("'") for w in words) if w and w not in QUESTION_STOPWORDS]
+    # A question made only of filler words keys on its full wording instead
+    return " ".join(kept or words)
+
+
+def _answer_key(question: str, recipe_summary: str, system_prompt: str, model: str) -> str:
+    """Cache key for a follow-up; the recipe is identified by the context sent to the model."""
+    return make_key(normalize_question(question), recipe_summary, system_prompt, model)
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    """Hit/miss counters and hit rate of the LLM response cache, overall and per namespace."""
+    return RESPONSE_CACHE.hit_rates()
+
+
+class JsonArrayParser:
+    """Incremental parser yielding each element of a streamed JSON array of objects.
+
+    Text is fed in arbitrary chunks (e.g. streamed tokens). Anything before
+    the first '[' (prose, a ```json fence) is skipped; after it, every
+    top-level {...} element is decoded as soon as its closing brace arrives.
+    Only the element being read is buffered, and braces inside strings
+    (including escaped quotes) are ignored. Elements that fail to decode are
+    dropped.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._buffer: List[str] = []
+
+    @property
+    def finished(self) -> bool:
+        """True once the array's closing ']' has been read."""
+        return self._finished
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume the next chunk and return the elements it completed."""
+        items = []
+        start = 0
+        for i, ch in enumerate(text):
+            if self._finished:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    start = i
+                    self._buffer = []
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(text[start:i + 1])
+                    try:
+                        items.append(json.loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        pass
+                    self._buffer = []
+            elif ch == "]" and self._depth == 0:
+                self._finished = True
+        if self._depth > 0:
+            self._buffer.append(text[start:])
+        return items
+
+
+# One breaker for the whole LLM path: once the provider keeps failing, both
+# generation and follow-up answers skip it for the cool-off period
+LLM_BREAKER = CircuitBreaker(failure_threshold=3, cool_off=30.0)
+ASK_RETRY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=4.0, deadline=20.0, breaker=LLM_BREAKER)
+GENERATE_RETRY = RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=8.0, deadline=45.0, breaker=LLM_BREAKER)
+
+# Need-sized generation (count=...) fans out into concurrent small requests
+# rather than one long completion, whose length dominates tail latency
+FANOUT_DEADLINE = 20.0      # seconds; recipes still pending after this are dropped
+MAX_FANOUT = 8              # concurrent requests per generation
+RECIPE_MAX_TOKENS = 1000    # completion budget per requested recipe
+MAX_AVOID_TITLES = 20       # titles listed in a prompt as "do not repeat"
+# A different angle per concurrent request keeps identical prompts from
+# coming back with the same recipe
+FANOUT_STYLES = (
+    "one-pan", "soup or stew", "salad or bowl", "oven-baked",
+    "stir-fry", "pasta or grain", "wrap or sandwich", "breakfast-style",
+)
+
+
+def _timeout_option(timeout: Optional[float]) -> Dict[str, float]:
+    """Per-request timeout argument for the time left in a call's budget."""
+    return {"timeout": max(timeout, 1.0)} if timeout is not None else {}
+
+
+def _create_completion(client, timeout: Optional[float], cancel_event: Optional[threading.Event] = None, **request):
+    """client.chat.completions.create(**request), once the rate limiter has capacity for it.
+
+    Waiting counts against the call's budget. A non-streamed reply gives
+    back the reserved tokens its reported usage did not need.
+
+    Raises:
+        NoCapacity: no capacity freed up within `timeout` (the request was not sent)
+    """
+    limiter = get_rate_limiter()
+    reserved = 0
+    if limiter is not None:
+        reserved = estimate_tokens(request.get("messages", []), request.get("max_tokens", 0))
+        start = time.monotonic()
+        if not limiter.acquire(reserved, timeout, cancel_event):
+            raise NoCapacity("no rate-limit capacity within the call's budget")
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - start))
+    response = client.chat.completions.create(**request, **_timeout_option(timeout))
+    if limiter is not None and not request.get("stream"):
+        used = getattr(getattr(response, "usage", None), "total_tokens", None)
+        if isinstance(used, int):
+            limiter.refund(reserved - used)
+    return response
+
+
+def _call_llm(
+    policy: RetryPolicy,
+    func,
+    cancel_event: Optional[threading.Event] = None,
+    deadline: Optional[float] = None,
+):
+    """Run func(timeout) under a retry policy (deadline overrides the policy's budget).
+
     Returns:
-        Function result or None on failure
+        Function result, or None on failure, cancellation or an open circuit
     """
-    delay = initial_delay
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except Exception as e:
-            error_name = type(e).__name__
-            
-            # Check if it's a rate limit error
-            if RateLimitError and isinstance(e, RateLimitError):
-                if attempt < max_retries - 1:
-                    import sys
-                    print(f"[Debug] Rate limit hit. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})", file=sys.stderr)
-                    time.sleep(delay)
-                    delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    import sys
-                    print(f"[Debug] Rate limit exceeded after {max_retries} retries", file=sys.stderr)
-                    return None
-            
-            # For other errors, don't retry
-            import sys
-            print(f"[Debug] OpenAI error: {error_name}", file=sys.stderr)
-            return None
-    
-    return None
+    try:
+        return policy.call(func, deadline=deadline, cancel_event=cancel_event)
+    except NoCapacity:
+        print("[Debug] Rate limit budget exhausted; skipping request", file=sys.stderr)
+        return None
+    except RetryCancelled:
+        return None
+    except CircuitOpenError:
+        print("[Debug] LLM provider unavailable; skipping request during cool-off", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"[Debug] OpenAI error: {type(e).__name__}", file=sys.stderr)
+        return None
+
+
+def _stream_text(client, policy: RetryPolicy, cancel_event=None, **request) -> Iterator[str]:
+    """Yield the content deltas of a streamed chat completion.
+
+    Opening the stream is retried like a regular request; an error once
+    tokens are flowing ends the stream early (the caller keeps what it got).
+    Streams report no usage, so unused reserved tokens are estimated from
+    the streamed text's length.
+    """
+    stream = _call_llm(
+        policy,
+        lambda timeout: _create_completion(client, timeout, cancel_event, stream=True, **request),
+        cancel_event,
+    )
+    if stream is None:
+        return
+    streamed = 0
+    try:
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if chunk.choices:
+                text = chunk.choices[0].delta.content
+                if text:
+                    streamed += len(text)
+                    yield text
+    except Exception as e:
+        print(f"[Debug] Stream interrupted: {type(e).__name__}", file=sys.stderr)
+    finally:
+        limiter = get_rate_limiter()
+        if limiter is not None:
+            limiter.refund(request.get("max_tokens", 0) - streamed // CHARS_PER_TOKEN)
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
 
 
-def ask_openai(question: str, recipe: Dict[str, Any], system_prompt: Optional[str] = None, model: str = "llama-3.3-70b-versatile") -> Optional[str]:
+def _print_token(text: str):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def ask_openai(
+    question: str,
+    recipe: Dict[str, Any],
+    system_prompt: Optional[str] = None,
+    model: str = "llama-3.3-70b-versatile",
+    stream: bool = False,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> Optional[str]:
     """Ask Groq (fast Llama model) for a richer, contextual answer about a recipe.
 
     Args:
@@ -67,20 +389,14 @@ def ask_openai(question: str, recipe: Dict[str, Any], system_prompt: Optional[st
         recipe: The selected recipe dictionary (title, ingredients, steps, time, diets)
         system_prompt: Optional system prompt to guide the model
         model: Model name to use (default: Llama 3.3 70B)
+        stream: Stream the answer, passing each piece of text to `on_token` as it arrives
+        on_token: Callback for streamed text (default: write to stdout). A cached
+            answer is passed to it in one piece.
 
     Returns:
         Answer text when successful, or None when API key/library is missing or on error.
+        Answers are cached per recipe and normalized question (see normalize_question).
     """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or Groq is None:
-        return None
-
-    # Initialize Groq client with API key
-    try:
-        client = Groq(api_key=api_key)
-    except Exception:
-        return None
-
     # Build context for the model
     sys_p = system_prompt or (
         "You are a helpful cooking assistant. Answer concisely and use numbered steps when describing actions."
@@ -88,14 +404,40 @@ def ask_openai(question: str, recipe: Dict[str, Any], system_prompt: Optional[st
 
     # Add recipe summary as context
     recipe_summary = f"Title: {recipe.get('title')}\nTime: {recipe.get('time')}\nIngredients: {', '.join(recipe.get('ingredients', []))}\nSteps: {' | '.join(recipe.get('steps', []))}"
-    
-    def _make_request():
-        response = client.chat.completions.create(
+
+    cache_key = _answer_key(question, recipe_summary, sys_p, model)
+    cached = RESPONSE_CACHE.get(ASK_NAMESPACE, cache_key)
+    emit = (on_token or _print_token) if stream else None
+    if cached is not MISSING:
+        if emit:
+            emit(cached)
+        return cached
+
+    client = get_client()
+    if client is None:
+        return None
+
+    messages = [
+        {"role": "system", "content": sys_p},
+        {"role": "user", "content": f"Recipe context:\n{recipe_summary}\n\nUser question: {question}"}
+    ]
+
+    if stream:
+        parts = []
+        for text in _stream_text(client, ASK_RETRY, model=model, messages=messages, max_tokens=500, temperature=0.6):
+            parts.append(text)
+            emit(text)
+        answer = "".join(parts).strip() or None
+        if answer:
+            RESPONSE_CACHE.set(ASK_NAMESPACE, cache_key, answer)
+        return answer
+
+    def _make_request(timeout):
+        response = _create_completion(
+            client,
+            timeout,
             model=model,
-            messages=[
-                {"role": "system", "content": sys_p},
-                {"role": "user", "content": f"Recipe context:\n{recipe_summary}\n\nUser question: {question}"}
-            ],
+            messages=messages,
             max_tokens=500,
             temperature=0.6,
         )
@@ -104,47 +446,36 @@ def ask_openai(question: str, recipe: Dict[str, Any], system_prompt: Optional[st
             return text.strip() if text else None
         return None
     
-    return _retry_with_backoff(_make_request, max_retries=3, initial_delay=1.0)
+    answer = _call_llm(ASK_RETRY, _make_request)
+    if answer:
+        RESPONSE_CACHE.set(ASK_NAMESPACE, cache_key, answer)
+    return answer
 
 
-def generate_recipes_from_ingredients(
+def _generation_messages(
     ingredients: List[str],
-    diet: Optional[str] = None,
-    meal_type: Optional[str] = None,
-    model: str = "llama-3.3-70b-versatile"
-) -> Optional[List[Dict[str, Any]]]:
-    """Generate 3-5 complete recipes from user ingredients using Groq (fast & free).
-    
-    Args:
-        ingredients: List of user ingredients (e.g., ["chicken", "rice", "broccoli"])
-        diet: Optional dietary filter (e.g., "vegan", "halal", "kosher")
-        meal_type: Optional meal type (e.g., "breakfast", "lunch", "dinner", "snack")
-        model: Model to use (default: Llama 3.3 70B - fast and capable)
-    
-    Returns:
-        List of recipe dicts with title, ingredients, steps, time, diets, allergens, nutrition
-        or None if API key missing/error occurs.
-    """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or Groq is None:
-        return None
-    
-    try:
-        client = Groq(api_key=api_key)
-    except Exception:
-        return None
-        
-    # Build the prompt for recipe generation
+    diet: Optional[str],
+    meal_type: Optional[str],
+    count: Optional[int] = None,
+    avoid_titles: Optional[List[str]] = None,
+    style: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """Chat messages asking the model for a JSON array of `count` recipes (default: 3-5)."""
     ing_str = ", ".join(ingredients)
     constraints = []
     if diet:
         constraints.append(f"must be {diet}")
     if meal_type:
         constraints.append(f"suitable for {meal_type}")
+    if style:
+        constraints.append(f"a {style} dish")
     constraint_str = " and ".join(constraints) if constraints else ""
-    
-    prompt = f"""Generate 3-5 complete recipes using these ingredients: {ing_str}
+    amount = "3-5 complete recipes" if count is None else f"{count} complete recipe{'s' if count != 1 else ''}"
+    avoid_str = "; ".join(avoid_titles[:MAX_AVOID_TITLES]) if avoid_titles else ""
+
+    prompt = f"""Generate {amount} using these ingredients: {ing_str}
 {f'Constraints: {constraint_str}' if constraint_str else ''}
+{f'Do not repeat these recipes: {avoid_str}' if avoid_str else ''}
 
 Return ONLY a valid JSON array with no additional text. Each recipe must have this exact structure:
 [
@@ -172,40 +503,339 @@ Ensure:
 5. Nutrition is a reasonable estimate
 6. diets array lists applicable dietary categories (vegan, vegetarian, halal, kosher, pescatarian, etc.)
 """
+    return [
+        {"role": "system", "content": "You are a professional chef and nutritionist. Generate practical recipes in valid JSON format. Return ONLY the JSON array, no other text."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _parse_recipes(response_text: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Recipes from a completion's text: a JSON array, or the objects salvaged from around it."""
+    response_text = (response_text or "").strip()
+    try:
+        recipes = json.loads(response_text)
+        if isinstance(recipes, list) and len(recipes) > 0:
+            return recipes
+    except json.JSONDecodeError:
+        # If JSON parsing fails, pull the recipe objects out of the text
+        recipes = [r for r in JsonArrayParser().feed(response_text) if isinstance(r, dict)]
+        if recipes:
+            return recipes
+    return None
+
+
+def generate_recipes_from_ingredients(
+    ingredients: List[str],
+    diet: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    model: str = "llama-3.3-70b-versatile",
+    cancel_event: Optional[threading.Event] = None,
+    stream: bool = False,
+    count: Optional[int] = None,
+    avoid_titles: Optional[List[str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Generate 3-5 (or exactly `count`) complete recipes from user ingredients using Groq (fast & free).
     
-    def _make_request():
-        response = client.chat.completions.create(
+    Args:
+        ingredients: List of user ingredients (e.g., ["chicken", "rice", "broccoli"])
+        diet: Optional dietary filter (e.g., "vegan", "halal", "kosher")
+        meal_type: Optional meal type (e.g., "breakfast", "lunch", "dinner", "snack")
+        model: Model to use (default: Llama 3.3 70B - fast and capable)
+        cancel_event: Optional event that abandons the request (and its retries) once set
+        stream: Stream the completion and parse recipes as they arrive (see
+            iter_generated_recipes, which also yields them one by one)
+        count: Number of recipes needed; generated by concurrent per-recipe
+            requests, keeping those done within FANOUT_DEADLINE
+        avoid_titles: Titles (e.g. the local matches) the new recipes must not repeat
+    
+    Returns:
+        List of recipe dicts with title, ingredients, steps, time, diets, allergens, nutrition
+        or None if API key missing/error occurs. Successful results are cached in
+        RESPONSE_CACHE, so a repeated pantry is answered without an API call.
+    """
+    if stream or count is not None:
+        recipes = iter_generated_recipes(ingredients, diet, meal_type, model, cancel_event, count, avoid_titles)
+        return list(recipes) or None
+
+    cache_key = _generation_key(ingredients, diet, meal_type, model)
+    cached = RESPONSE_CACHE.get(GENERATE_NAMESPACE, cache_key)
+    if cached is not MISSING:
+        return copy.deepcopy(cached)
+
+    client = get_client()
+    if client is None:
+        return None
+
+    messages = _generation_messages(ingredients, diet, meal_type)
+
+    def _make_request(timeout):
+        response = _create_completion(
+            client,
+            timeout,
+            cancel_event,
             model=model,
-            messages=[
-                {"role": "system", "content": "You are a professional chef and nutritionist. Generate practical recipes in valid JSON format. Return ONLY the JSON array, no other text."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=messages,
             max_tokens=4000,
             temperature=0.7,
         )
         
         if not response.choices or len(response.choices) == 0:
             return None
-        
-        response_text = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON from the response
+        return _parse_recipes(response.choices[0].message.content)
+
+    recipes = _call_llm(GENERATE_RETRY, _make_request, cancel_event)
+    if recipes:
+        RESPONSE_CACHE.set(GENERATE_NAMESPACE, cache_key, recipes)
+        return copy.deepcopy(recipes)
+    return recipes
+
+
+def iter_generated_recipes(
+    ingredients: List[str],
+    diet: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    model: str = "llama-3.3-70b-versatile",
+    cancel_event: Optional[threading.Event] = None,
+    count: Optional[int] = None,
+    avoid_titles: Optional[List[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream recipe generation, yielding each recipe as soon as its JSON object is complete.
+
+    Same prompt and cache as generate_recipes_from_ingredients: a cached
+    pantry yields its stored recipes at once, and a stream that runs to the
+    end of the array is cached. Nothing is yielded when the API key or
+    library is missing or the request fails.
+
+    With `count`, exactly that many recipes are wanted: cached ones (complete
+    answers and earlier fan-out recipes) are used first and the rest come
+    from concurrent per-recipe requests (see _iter_fanned_out). Recipes
+    titled like `avoid_titles` are never yielded.
+    """
+    cache_key = _generation_key(ingredients, diet, meal_type, model)
+    cached = RESPONSE_CACHE.get(GENERATE_NAMESPACE, cache_key)
+    if count is not None:
+        pooled = RESPONSE_CACHE.get(FANOUT_NAMESPACE, cache_key)
+        pooled = [] if pooled is MISSING else pooled
+        stored = ([] if cached is MISSING else list(cached)) + list(pooled)
+        yield from _iter_fanned_out(
+            ingredients, diet, meal_type, model, cancel_event, count, avoid_titles, cache_key, stored, pooled
+        )
+        return
+    if cached is not MISSING:
+        yield from copy.deepcopy(cached)
+        return
+
+    client = get_client()
+    if client is None:
+        return
+
+    parser = JsonArrayParser()
+    recipes = []
+    request = dict(model=model, messages=_generation_messages(ingredients, diet, meal_type), max_tokens=4000, temperature=0.7)
+    for text in _stream_text(client, GENERATE_RETRY, cancel_event, **request):
+        for item in parser.feed(text):
+            if isinstance(item, dict):
+                recipes.append(item)
+                yield copy.deepcopy(item)
+
+    if recipes and parser.finished and not (cancel_event is not None and cancel_event.is_set()):
+        RESPONSE_CACHE.set(GENERATE_NAMESPACE, cache_key, recipes)
+
+
+def _iter_fanned_out(
+    ingredients: List[str],
+    diet: Optional[str],
+    meal_type: Optional[str],
+    model: str,
+    cancel_event: Optional[threading.Event],
+    count: int,
+    avoid_titles: Optional[List[str]],
+    cache_key: str,
+    stored: List[Dict[str, Any]],
+    pooled: List[Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """Yield `count` new-titled recipes: cached ones first, then concurrent requests in finishing order.
+
+    The missing recipes are split over up to MAX_FANOUT requests, each asking
+    for its share with a small completion budget and its own FANOUT_STYLES
+    angle. Requests run on daemon threads (see GenerationJob) and share one
+    stop event; whatever has not arrived by FANOUT_DEADLINE is abandoned.
+    Each new recipe is added to the pantry's FANOUT_NAMESPACE entry
+    (`pooled`) as it arrives.
+    """
+    seen = {normalize(t) for t in avoid_titles or ()}
+    produced = 0
+
+    def fresh(recipe) -> bool:
+        if not isinstance(recipe, dict):
+            return False
+        title = normalize(str(recipe.get("title") or ""))
+        if not title or title in seen:
+            return False
+        seen.add(title)
+        return True
+
+    for recipe in stored:
+        if produced >= count:
+            return
+        if fresh(recipe):
+            produced += 1
+            yield copy.deepcopy(recipe)
+    missing = count - produced
+    if missing <= 0:
+        return
+
+    client = get_client()
+    if client is None:
+        return
+
+    avoid = [t for t in list(avoid_titles or ()) + [str(r.get("title")) for r in stored if isinstance(r, dict)] if t]
+    workers = min(missing, MAX_FANOUT)
+    shares = [missing // workers + (1 if i < missing % workers else 0) for i in range(workers)]
+    stop = threading.Event()
+    arrivals: "queue.Queue[Any]" = queue.Queue()
+
+    def run(share: int, style: str):
+        messages = _generation_messages(ingredients, diet, meal_type, count=share, avoid_titles=avoid, style=style)
+
+        def _make_request(timeout):
+            response = _create_completion(
+                client,
+                timeout,
+                stop,
+                model=model,
+                messages=messages,
+                max_tokens=RECIPE_MAX_TOKENS * share,
+                temperature=0.8,
+            )
+            if not response.choices:
+                return None
+            return _parse_recipes(response.choices[0].message.content)
+
+        arrivals.put(_call_llm(GENERATE_RETRY, _make_request, stop, deadline=FANOUT_DEADLINE))
+
+    for i, share in enumerate(shares):
+        style = FANOUT_STYLES[i % len(FANOUT_STYLES)]
+        threading.Thread(target=run, args=(share, style), name=f"recipe-generation-{i}", daemon=True).start()
+
+    end = time.monotonic() + FANOUT_DEADLINE
+    pending = workers
+    recipes = []
+    try:
+        while pending and produced < count:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                # Short waits so a cancellation is noticed promptly
+                result = arrivals.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                continue
+            pending -= 1
+            for recipe in result or ():
+                if produced < count and fresh(recipe):
+                    produced += 1
+                    recipes.append(recipe)
+                    # Every recipe is complete on its own: cache it before the
+                    # consumer gets a chance to stop iterating
+                    RESPONSE_CACHE.set(FANOUT_NAMESPACE, cache_key, list(pooled) + recipes)
+                    yield copy.deepcopy(recipe)
+    finally:
+        # Abandon requests (and retries) still in flight
+        stop.set()
+
+
+_DONE = object()
+
+
+class GenerationJob:
+    """Streamed recipe generation (iter_generated_recipes) running on a daemon thread.
+
+    The CLI starts one as soon as the pantry is known, so the LLM call
+    overlaps local matching and printing. Recipes can be consumed one by one
+    as they arrive (`iter_recipes`) or all at once (`result`). A daemon thread
+    (rather than an executor) is used so an abandoned request never delays
+    interpreter exit.
+    """
+
+    def __init__(self, **kwargs):
+        self._cancel = threading.Event()
+        self._future: Future = Future()
+        self._arrivals: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(kwargs,), name="recipe-generation", daemon=True)
+        self._thread.start()
+
+    def _run(self, kwargs):
+        if not self._future.set_running_or_notify_cancel():
+            self._arrivals.put(_DONE)
+            return
+        recipes = []
         try:
-            recipes = json.loads(response_text)
-            if isinstance(recipes, list) and len(recipes) > 0:
-                return recipes
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract JSON from the text
-            import re
-            match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if match:
-                try:
-                    recipes = json.loads(match.group())
-                    if isinstance(recipes, list) and len(recipes) > 0:
-                        return recipes
-                except json.JSONDecodeError:
-                    pass
-        
-        return None
-    
-    return _retry_with_backoff(_make_request, max_retries=3, initial_delay=2.0)
+            for recipe in iter_generated_recipes(cancel_event=self._cancel, **kwargs):
+                if self._cancel.is_set():
+                    break
+                recipes.append(recipe)
+                self._arrivals.put(recipe)
+        except Exception as e:
+            self._future.set_exception(e)
+            return
+        finally:
+            self._arrivals.put(_DONE)
+        self._future.set_result(None if self._cancel.is_set() or not recipes else recipes)
+
+    def cancel(self):
+        """Abandon the request; retries stop and result() returns None."""
+        self._cancel.set()
+        self._future.cancel()
+        self._arrivals.put(_DONE)
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def iter_recipes(self) -> Iterator[Dict[str, Any]]:
+        """Yield generated recipes as they arrive, until generation ends or is cancelled.
+
+        Meant for a single consumer; use result() to get them all at once.
+        """
+        while not self._cancel.is_set():
+            recipe = self._arrivals.get()
+            if recipe is _DONE or self._cancel.is_set():
+                return
+            yield recipe
+
+    def result(self, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """Wait for all generated recipes (None if unavailable or cancelled).
+
+        Raises:
+            concurrent.futures.TimeoutError: if not done within `timeout` seconds
+        """
+        if self._cancel.is_set():
+            return None
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            return None
+
+
+def start_generation(
+    ingredients: List[str],
+    diet: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    model: str = "llama-3.3-70b-versatile",
+    count: Optional[int] = None,
+    avoid_titles: Optional[List[str]] = None,
+) -> GenerationJob:
+    """Start generate_recipes_from_ingredients in the background and return its job.
+
+    Pass `count` (the open result slots) and `avoid_titles` (the recipes
+    already shown) for need-sized, fanned-out generation.
+    """
+    return GenerationJob(
+        ingredients=list(ingredients), diet=diet, meal_type=meal_type, model=model,
+        count=count, avoid_titles=list(avoid_titles or ()),
+    )
@@ -0,0 +1,191 @@
+"""
+src/planner.py
+==============
+Multi-meal planner: pick k recipes for a pantry and build one combined shopping list.
+
+A plan is scored as
+
+    pantry ingredients used - distinct ingredients to buy
+
+so a recipe is worth adding when it uses pantry items the plan doesn't use
+yet, and costs only what it adds to the shopping list. An ingredient that
+another planned recipe already needs is free. A pantry item covers an
+ingredient when the words of one appear, in order, in the other: "soba"
+covers "soba noodles" and "chicken breast" covers "chicken", but "egg"
+does not cover "eggplant" and "oil" does not cover "boiled ham". Words
+are compared in singular form, so "eggs" covers "egg".
+
+Choosing the best k-subset is a weighted set-cover problem, so the
+planner does not enumerate combinations:
+1. candidates: the CANDIDATES recipes sharing the most ingredients with
+   the pantry, ranked through the inverted index (with the diet and time
+   limits applied) and rescored with the word rule
+2. greedy: add the candidate with the best marginal score until k recipes
+   are chosen (ties: more pantry matches, fewer ingredients, match rank)
+3. local search: swap a chosen recipe for an unchosen candidate while that
+   improves the plan's score
+
+Each step only handles small ingredient sets over a few hundred
+candidates, so planning stays interactive on large catalogs.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from src import recipe_helper
+from src.recipe_helper import iter_matches, normalize
+
+CANDIDATES = 200      # recipes considered per plan
+MAX_SWAP_ROUNDS = 10  # local-search passes after the greedy pick
+
+
+def recipe_minutes(recipe: Dict[str, Any]) -> Optional[int]:
+    """Total time in minutes from a "time" field like "25 minutes" or "1 hour 10 min"."""
+    text = str(recipe.get("time") or "").lower()
+    hours = re.search(r"(\d+(?:\.\d+)?)\s*(?:h|hr|hour)", text)
+    minutes = re.search(r"(\d+)\s*(?:m|min)", text)
+    if hours or minutes:
+        return round(float(hours.group(1)) * 60 if hours else 0) + (int(minutes.group(1)) if minutes else 0)
+    number = re.search(r"\d+", text)
+    return int(number.group(0)) if number else None
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _words(text: str) -> tuple:
+    """Singular words of a normalized ingredient ("Cherry Tomatoes" -> ("cherry", "tomato"))."""
+    return tuple(_singular(w) for w in re.findall(r"[a-z0-9]+", normalize(text)))
+
+
+def _within(inner: tuple, outer: tuple) -> bool:
+    n = len(inner)
+    return n > 0 and any(outer[i:i + n] == inner for i in range(len(outer) - n + 1))
+
+
+def covers(item: str, ingredient: str) -> bool:
+    """True if the words of one appear, in order, in the other ("chicken" / "chicken breast")."""
+    a, b = _words(item), _words(ingredient)
+    return _within(a, b) or _within(b, a)
+
+
+def has_ingredient(pantry: List[str], ingredient: str) -> bool:
+    """True if some pantry item covers the ingredient (whole words, not bare substrings)."""
+    return any(covers(p, ingredient) for p in pantry)
+
+
+def _plan_score(chosen) -> int:
+    used = set()
+    needed = set()
+    for c in chosen:
+        used |= c["pantry"]
+        needed |= c["missing"]
+    return len(used) - len(needed)
+
+
+def plan_meals(
+    pantry: List[str],
+    meals: int,
+    diet: Optional[str] = None,
+    max_minutes: Optional[int] = None,
+    min_match: int = 1,
+) -> Dict[str, Any]:
+    """Choose `meals` recipes that use the pantry well and need few distinct purchases.
+
+    Args:
+        pantry: The user's ingredients
+        meals: Number of recipes to plan (k)
+        diet: Optional dietary filter (e.g. "vegan")
+        max_minutes: Optional limit on each recipe's total time
+        min_match: Pantry ingredients a recipe must use to be considered
+
+    Returns:
+        Dict with "recipes" (the plan, in pick order), "shopping_list" (one
+        {"ingredient", "recipes"} entry per distinct item to buy, sorted),
+        "pantry_used" and "pantry_unused" (the user's items), and "score"
+    """
+    catalog = recipe_helper.CATALOG
+    tokens = [t for t in dict.fromkeys(normalize(p) for p in pantry) if t]
+    if meals <= 0 or not tokens:
+        return {"recipes": [], "shopping_list": [], "pantry_used": [], "pantry_unused": tokens, "score": 0}
+
+    # Over-fetch: the time limit and the word rule discard some ranked recipes
+    limit = CANDIDATES * 4
+    candidates = []
+    with catalog.reading():
+        # Pantry token -> the catalog terms it covers; the index's substring
+        # matches are a superset, narrowed to whole words here
+        index = catalog.index
+        covered = {t: {index.terms[tid] for tid in index.related_terms(t) if covers(t, index.terms[tid])} for t in tokens}
+        have_terms = set().union(*covered.values())
+
+        for recipe, _ in iter_matches(tokens, min_match=min_match, diet=diet, limit=limit):
+            if max_minutes is not None:
+                minutes = recipe_minutes(recipe)
+                if minutes is None or minutes > max_minutes:
+                    continue
+            terms = {normalize(i) for i in recipe.get("ingredients", [])} - {""}
+            matches = len(terms & have_terms)
+            if matches < min_match:
+                continue
+            candidates.append({
+                "rank": len(candidates),
+                "recipe": recipe,
+                "matches": matches,
+                "pantry": {t for t in tokens if covered[t] & terms},
+                "missing": terms - have_terms,
+                "size": len(terms),
+            })
+            if len(candidates) >= CANDIDATES:
+                break
+
+    # Greedy: best marginal (new pantry items used - new items to buy)
+    chosen: List[Dict[str, Any]] = []
+    used, needed = set(), set()
+    remaining = list(candidates)
+    while remaining and len(chosen) < meals:
+        best = min(
+            remaining,
+            key=lambda c: (
+                -(len(c["pantry"] - used) - len(c["missing"] - needed)),
+                -c["matches"], c["size"], c["rank"],
+            ),
+        )
+        chosen.append(best)
+        remaining.remove(best)
+        used |= best["pantry"]
+        needed |= best["missing"]
+
+    # Local search: single swaps while they improve the score
+    score = _plan_score(chosen)
+    for _ in range(MAX_SWAP_ROUNDS):
+        improved = False
+        for i in range(len(chosen)):
+            for j, candidate in enumerate(remaining):
+                trial = chosen[:i] + [candidate] + chosen[i + 1:]
+                trial_score = _plan_score(trial)
+                if trial_score > score:
+                    remaining[j], chosen[i] = chosen[i], candidate
+                    score = trial_score
+                    improved = True
+        if not improved:
+            break
+
+    shopping: Dict[str, List[str]] = {}
+    for c in chosen:
+        for item in sorted(c["missing"]):
+            shopping.setdefault(item, []).append(c["recipe"].get("title"))
+    used = set().union(*(c["pantry"] for c in chosen)) if chosen else set()
+    return {
+        "recipes": [c["recipe"] for c in chosen],
+        "shopping_list": [{"ingredient": item, "recipes": titles} for item, titles in sorted(shopping.items())],
+        "pantry_used": [t for t in tokens if t in used],
+        "pantry_unused": [t for t in tokens if t not in used],
+        "score": score,
+    }
@@ -0,0 +1,207 @@
+"""
+src/rate_limiter.py
+===================
+Client-side token-bucket rate limiter shared by every process on the host.
+
+Several CLI instances using one API key share one provider quota. Backing
+off independently after 429s wastes requests. Instead, each request first
+takes capacity from two token buckets:
+
+- requests per minute (RPM): one token per request
+- tokens per minute (TPM): the request's estimated prompt + completion tokens
+
+Each bucket holds up to a minute's quota and refills continuously. When a
+bucket is short, the caller sleeps until it has refilled enough, rather
+than sending a request that would be rejected.
+
+The bucket levels live in a 24-byte state file: the two levels plus the
+wall-clock time of the last update. The file is guarded by an exclusive
+flock, so every process using the same file draws from the same buckets.
+There is one file per API key in the temp directory by default. Without
+fcntl (Windows), the buckets are shared by threads of one process only.
+
+Opt in with GROQ_RPM and/or GROQ_TPM; see `limiter_from_env`.
+"""
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.retry_policy import RetryCancelled
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+_STATE = struct.Struct("=ddd")  # request level, token level, updated at (epoch seconds)
+
+
+# Rough prompt size: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+_LIMITERS: Dict[Tuple[Any, ...], "RateLimiter"] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+class NoCapacity(RetryCancelled):
+    """Raised when rate-limit capacity did not free up within the caller's time budget.
+
+    A RetryCancelled: the request was never sent, so it is neither retried
+    nor counted against the circuit breaker.
+    """
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared through a locked state file.
+
+    Args:
+        rpm: Requests per minute (None: unlimited)
+        tpm: Tokens per minute (None: unlimited)
+        path: State file; processes sharing it share the buckets (None: this process only)
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path if fcntl is not None else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory = None  # state tuple when not file-backed
+
+    def _refill(self, state, now: float):
+        requests, tokens, updated = state
+        elapsed = max(0.0, now - updated)
+        if self.rpm:
+            requests = min(self.rpm, requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            tokens = min(self.tpm, tokens + elapsed * self.tpm / 60.0)
+        return requests, tokens, now
+
+    def _update(self, change):
+        """Apply change(state, now) -> (new_state, result) atomically across processes."""
+        with self._lock:
+            if self.path is None:
+                now = self._clock()
+                state = self._memory or (self.rpm or 0.0, self.tpm or 0.0, now)
+                self._memory, result = change(self._refill(state, now), now)
+                return result
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                now = self._clock()
+                raw = os.pread(fd, _STATE.size, 0)
+                # A new (or foreign) file starts with full buckets
+                state = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.rpm or 0.0, self.tpm or 0.0, now)
+                state, result = change(self._refill(state, now), now)
+                os.pwrite(fd, _STATE.pack(*state), 0)
+                return result
+            finally:
+                os.close(fd)  # also releases the lock
+
+    def try_acquire(self, tokens: float = 0.0) -> float:
+        """Take capacity for one request of `tokens` tokens if available.
+
+        Returns:
+            0.0 when acquired, else the seconds to wait before trying again
+        """
+        # A request larger than the whole bucket could never be admitted
+        tokens = min(tokens, self.tpm) if self.tpm else 0.0
+
+        def change(state, now):
+            requests, level, _ = state
+            wait = 0.0
+            if self.rpm and requests < 1.0:
+                wait = max(wait, (1.0 - requests) * 60.0 / self.rpm)
+            if self.tpm and level < tokens:
+                wait = max(wait, (tokens - level) * 60.0 / self.tpm)
+            if wait > 0.0:
+                return state, wait
+            return (requests - 1.0 if self.rpm else requests, level - tokens, now), 0.0
+
+        return self._update(change)
+
+    def acquire(
+        self,
+        tokens: float = 0.0,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """Wait until one request of `tokens` tokens fits, then take the capacity.
+
+        Returns:
+            True when acquired; False on timeout or cancellation
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0.0:
+                return True
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= wait:
+                    return False
+            # Re-check at least every second: other processes may refund capacity
+            wait = min(wait, 1.0)
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def refund(self, tokens: float) -> None:
+        """Return unused token capacity, e.g. when a reply used fewer tokens than reserved."""
+        if not self.tpm or tokens <= 0:
+            return
+
+        def change(state, now):
+            requests, level, updated = state
+            return (requests, min(self.tpm, level + tokens), updated), None
+
+        self._update(change)
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: int = 0) -> int:
+    """Tokens a chat request may use: its prompt estimated from length, plus max_tokens."""
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // CHARS_PER_TOKEN + max_tokens
+
+
+def default_state_path(api_key: str) -> str:
+    """Per-key state file in the temp directory (the key itself is never written)."""
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"groq-ratelimit-{digest}.state")
+
+
+def limiter_from_env(api_key: str) -> Optional[RateLimiter]:
+    """Build the limiter configured by GROQ_RPM / GROQ_TPM, or None when neither is set.
+
+    GROQ_RATE_LIMIT_FILE overrides where the shared bucket state is kept.
+    Limiters are reused while the configuration is unchanged.
+    """
+    def number(name):
+        value = os.getenv(name)
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    rpm, tpm = number("GROQ_RPM"), number("GROQ_TPM")
+    if not rpm and not tpm:
+        return None
+    path = os.getenv("GROQ_RATE_LIMIT_FILE") or default_state_path(api_key)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get((rpm, tpm, path))
+        if limiter is None:
+            limiter = _LIMITERS[(rpm, tpm, path)] = RateLimiter(rpm=rpm, tpm=tpm, path=path)
+        return limiter
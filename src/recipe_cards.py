@@ -0,0 +1,184 @@
+"""
+src/recipe_cards.py
+===================
+Printable recipe cards (saved_cards/<Title>.txt): rendering and incremental bulk export.
+
+- render_card(): the card text for one recipe
+- write_card(): write one card, skipping it when its content is unchanged
+- export_cards(): write many cards on a thread pool (scripts/export_cards.py)
+
+Each card is written atomically, to a temporary file that is then renamed
+over the old card, so a reader never sees half a card. A manifest in the
+card directory (.cards-manifest.json) records each card's content hash
+with the file's size and mtime. An unchanged card is skipped after one
+stat() call. If the file was touched since (edited, restored, deleted),
+the hash of its actual content is compared instead. Regenerating the
+whole set after a catalog enrichment run only rewrites the cards whose
+text changed.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_CARD_DIR = "saved_cards"
+MANIFEST_NAME = ".cards-manifest.json"
+
+
+def safe_filename(title: str) -> str:
+    # make a simple safe filename from title
+    return re.sub(r"[^0-9a-zA-Z_-]", "_", title).strip("_")
+
+
+def card_filename(recipe: Dict[str, Any]) -> str:
+    return safe_filename(recipe.get("title") or "recipe") + ".txt"
+
+
+def render_card(recipe: Dict[str, Any]) -> str:
+    """Card text: title, ingredients, allergens, steps, time and a rough nutrition estimate."""
+    lines = [f"{recipe.get('title')}", "Ingredients:"]
+    lines.extend(f" - {ing}" for ing in recipe.get("ingredients", []))
+    lines.append("")
+    lines.append("Allergens:")
+    if recipe.get("allergens"):
+        lines.extend(f" - {a}" for a in recipe.get("allergens"))
+    else:
+        lines.append(" - (none detected)")
+    lines.append("")
+    lines.append("Steps:")
+    lines.extend(f" - {step}" for step in recipe.get("steps", []))
+    lines.append("")
+    lines.append(f"Time: {recipe.get('time')}")
+    lines.append("")
+    lines.append("Nutrition (rough estimate):")
+    nutrition = recipe.get("nutrition", {})
+    if nutrition:
+        lines.append(f" - Calories: {nutrition.get('calories')}")
+        lines.append(f" - Protein: {nutrition.get('protein_g')}g")
+        lines.append(f" - Carbs: {nutrition.get('carbs_g')}g")
+        lines.append(f" - Fat: {nutrition.get('fat_g')}g")
+    lines.append("")
+    lines.append("(Nutrition estimates are best-effort and should NOT be used for medical/diet purposes.)")
+    return "\n".join(lines) + "\n"
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomically(path: str, data: bytes):
+    tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class CardManifest:
+    """Content hash, size and mtime of each card written to a directory."""
+
+    def __init__(self, card_dir: str):
+        self.path = os.path.join(card_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            self.entries: Dict[str, list] = entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def unchanged(self, path: str, name: str, digest: str) -> bool:
+        """True if the card file already holds content with this digest."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        known = self.entries.get(name)
+        if known == [digest, stat.st_size, stat.st_mtime_ns]:
+            return True
+        # Not recorded, or the file changed behind our back: check its content
+        with open(path, "rb") as f:
+            if _digest(f.read()) != digest:
+                return False
+        self.record(path, name, digest)
+        return True
+
+    def record(self, path: str, name: str, digest: str):
+        stat = os.stat(path)
+        with self._lock:
+            self.entries[name] = [digest, stat.st_size, stat.st_mtime_ns]
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries, sort_keys=True).encode("utf-8")
+        _write_atomically(self.path, data)
+
+
+def write_card(
+    recipe: Dict[str, Any],
+    card_dir: str = DEFAULT_CARD_DIR,
+    manifest: Optional[CardManifest] = None,
+) -> Tuple[str, bool]:
+    """Write a recipe's card unless it already has this content.
+
+    With no manifest given, the directory's manifest is loaded and saved.
+
+    Returns:
+        (card path, whether the file was written)
+    """
+    own_manifest = manifest is None
+    if own_manifest:
+        os.makedirs(card_dir, exist_ok=True)
+        manifest = CardManifest(card_dir)
+    name = card_filename(recipe)
+    path = os.path.join(card_dir, name)
+    data = render_card(recipe).encode("utf-8")
+    digest = _digest(data)
+    if manifest.unchanged(path, name, digest):
+        written = False
+    else:
+        _write_atomically(path, data)
+        manifest.record(path, name, digest)
+        written = True
+    if own_manifest:
+        manifest.save()
+    return path, written
+
+
+def export_cards(
+    recipes: Iterable[Dict[str, Any]],
+    card_dir: str = DEFAULT_CARD_DIR,
+    workers: Optional[int] = None,
+) -> Dict[str, int]:
+    """Write cards for many recipes in parallel, skipping unchanged ones.
+
+    Recipes whose titles map to the same file name are written once (the first wins).
+
+    Returns:
+        Counts of cards written, unchanged and skipped as duplicate file names
+    """
+    os.makedirs(card_dir, exist_ok=True)
+    manifest = CardManifest(card_dir)
+    unique: Dict[str, Dict[str, Any]] = {}
+    duplicates = 0
+    for recipe in recipes:
+        name = card_filename(recipe)
+        if name in unique:
+            duplicates += 1
+        else:
+            unique[name] = recipe
+
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(lambda r: write_card(r, card_dir, manifest)[1], unique.values()))
+    manifest.save()
+    written = sum(results)
+    return {"written": written, "unchanged": len(results) - written, "duplicates": duplicates}
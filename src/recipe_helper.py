@@ -11,31 +11,33 @@ This module provides:
 - Ingredient substitution suggestions
 - Recipe lookup by index or title
 
-The recipe database is loaded from recipes.json on module import.
+The recipe database (recipes.json) is loaded lazily by CATALOG on first use,
+preferably from its memory-mapped compiled snapshot (recipes.rcat), and an
+inverted ingredient index is built from it once for fast matching.
+RECIPES and VALID_INGREDIENTS remain available as module attributes.
 """
+import bisect
+import hashlib
+import heapq
 import json
 import os
-from typing import List, Dict, Any, Tuple
-
-# Load recipe database from JSON file in project root
-BASE = os.path.dirname(os.path.dirname(__file__))
-RECIPES_PATH = os.path.join(BASE, "recipes.json")
-
-with open(RECIPES_PATH, "r", encoding="utf-8") as f:
-    RECIPES = json.load(f)
+import threading
+from array import array
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional, Iterator, Iterable
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows; appends are then unlocked
+    fcntl = None
 
-# Build set of all known ingredients from recipe database
-def _get_valid_ingredients() -> set:
-    """Extract all ingredients from recipe database for validation."""
-    valid = set()
-    for recipe in RECIPES:
-        for ing in recipe.get("ingredients", []):
-            valid.add(normalize(ing))
-    return valid
+from src import vector_match
+from src.catalog_snapshot import default_snapshot_path, open_snapshot, write_snapshot
 
-
-VALID_INGREDIENTS = _get_valid_ingredients()
+# Default recipe database: JSON file in project root
+BASE = os.path.dirname(os.path.dirname(__file__))
+RECIPES_PATH = os.path.join(BASE, "recipes.json")
 
 
 def normalize(text: str) -> str:
@@ -50,6 +52,870 @@ def normalize(text: str) -> str:
     return text.lower().strip()
 
 
+class _Appendable(Sequence):
+    """A read-only base sequence (e.g. a snapshot table) followed by appended items."""
+
+    def __init__(self, base):
+        self.base = base
+        self.extra: list = []
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self.base)
+        if i < 0:
+            i += len(self)
+        if i < 0:
+            raise IndexError(i)
+        return self.base[i] if i < n else self.extra[i - n]
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.extra
+
+    def append(self, item) -> None:
+        self.extra.append(item)
+
+
+def _appendable(seq):
+    """Return seq itself if it is a list, else an _Appendable view over it."""
+    return seq if isinstance(seq, (list, _Appendable)) else _Appendable(seq)
+
+
+class _SubstringLookup:
+    """Substring-aware lookup over the normalized ingredient vocabulary.
+
+    Answers "which known ingredients equal, contain, or are contained in this
+    token" without scanning the vocabulary:
+    - terms contained in the token are found by probing the token's own
+      substrings (only at lengths that occur in the vocabulary)
+    - terms containing the token are found through an n-gram index mapping
+      every 1..GRAM character substring to the ids of terms that include it;
+      the rarest n-gram of the token gives a small candidate list to verify
+    """
+
+    GRAM = 3
+
+    def __init__(self, terms: List[str]):
+        self.terms = terms
+        self.term_ids: Dict[str, int] = {t: i for i, t in enumerate(terms)}
+        self.lengths = sorted(set(len(t) for t in terms))
+        self.grams: Dict[str, array] = {}
+        for tid, term in enumerate(terms):
+            self._index_grams(tid, term)
+
+    def _index_grams(self, tid: int, term: str) -> None:
+        seen = set()
+        for n in range(1, self.GRAM + 1):
+            for i in range(len(term) - n + 1):
+                gram = term[i:i + n]
+                if gram not in seen:
+                    seen.add(gram)
+                    self.grams.setdefault(gram, array("I")).append(tid)
+
+    def add(self, tid: int) -> None:
+        """Register term `tid`, just appended to `terms`."""
+        term = self.terms[tid]
+        self.term_ids[term] = tid
+        if len(term) not in self.lengths:
+            bisect.insort(self.lengths, len(term))
+        self._index_grams(tid, term)
+
+    def _contained_in(self, token: str):
+        """Yield ids of known terms that are substrings of token (including equal)."""
+        for n in self.lengths:
+            if n > len(token):
+                break
+            for i in range(len(token) - n + 1):
+                tid = self.term_ids.get(token[i:i + n])
+                if tid is not None:
+                    yield tid
+
+    def _containing(self, token: str):
+        """Yield ids of known terms that contain token as a substring."""
+        if not token:
+            yield from range(len(self.terms))
+            return
+        if len(token) <= self.GRAM:
+            # Short tokens are n-grams themselves, so the postings are exact
+            yield from self.grams.get(token, ())
+            return
+        postings = []
+        for i in range(len(token) - self.GRAM + 1):
+            ids = self.grams.get(token[i:i + self.GRAM])
+            if ids is None:
+                return  # some n-gram never occurs, so no term can contain token
+            postings.append(ids)
+        for tid in min(postings, key=len):
+            if token in self.terms[tid]:
+                yield tid
+
+    def related(self, token: str) -> set:
+        """Return ids of known terms where token == term, token in term, or term in token."""
+        related = set(self._contained_in(token))
+        related.update(self._containing(token))
+        return related
+
+    def matches_any(self, token: str) -> bool:
+        """Return True if at least one known term is related to token."""
+        if token in self.term_ids:
+            return True
+        for _ in self._contained_in(token):
+            return True
+        for _ in self._containing(token):
+            return True
+        return False
+
+
+class _IngredientIndex:
+    """Inverted ingredient -> recipe index built once from the recipe database.
+
+    Every distinct normalized ingredient is interned as a term id, and each
+    term keeps a postings list of the recipe ids (positions in RECIPES) that
+    use it. Scoring a pantry then only touches recipes that share at least
+    one ingredient with it instead of walking the whole catalog.
+
+    Postings may be in-memory arrays or zero-copy slices of a catalog snapshot.
+    """
+
+    def __init__(self, terms: List[str], postings):
+        self.terms = terms
+        self.postings = postings
+        self._lookup: Optional[_SubstringLookup] = None
+        self._term_ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_recipes(cls, recipes: List[Dict[str, Any]]) -> "_IngredientIndex":
+        terms: List[str] = []
+        term_ids: Dict[str, int] = {}
+        postings: List[array] = []
+
+        for rid, recipe in enumerate(recipes):
+            seen = set()
+            for ing in recipe.get("ingredients", []):
+                term = normalize(ing)
+                tid = term_ids.get(term)
+                if tid is None:
+                    tid = len(terms)
+                    term_ids[term] = tid
+                    terms.append(term)
+                    postings.append(array("I"))
+                if tid not in seen:
+                    seen.add(tid)
+                    postings[tid].append(rid)
+
+        return cls(terms, postings)
+
+    @property
+    def lookup(self) -> _SubstringLookup:
+        if self._lookup is None:
+            self._lookup = _SubstringLookup(self.terms)
+        return self._lookup
+
+    def related_terms(self, token: str) -> set:
+        """Return ids of known ingredients equal to, containing, or contained in token."""
+        return self.lookup.related(token)
+
+    def add(self, rid: int, ingredients: Iterable[str]) -> List[int]:
+        """Add recipe `rid` (the next recipe id) to the postings of its ingredients.
+
+        Unknown ingredients become new terms. Snapshot-backed terms and
+        postings are immutable, so they are wrapped on first use and only the
+        postings lists actually touched are copied.
+
+        Returns:
+            Sorted ids of the recipe's distinct ingredient terms
+        """
+        self.terms = _appendable(self.terms)
+        if not isinstance(self.postings, list):
+            self.postings = list(self.postings)
+        if self._lookup is not None:
+            self._lookup.terms = self.terms
+        elif self._term_ids is None:
+            self._term_ids = {t: i for i, t in enumerate(self.terms)}
+        term_ids = self._lookup.term_ids if self._lookup is not None else self._term_ids
+
+        tids = set()
+        for ing in ingredients:
+            term = normalize(ing)
+            tid = term_ids.get(term)
+            if tid is None:
+                tid = len(self.terms)
+                self.terms.append(term)
+                self.postings.append(array("I"))
+                if self._lookup is not None:
+                    self._lookup.add(tid)
+                else:
+                    term_ids[term] = tid
+            tids.add(tid)
+
+        for tid in tids:
+            ids = self.postings[tid]
+            if not isinstance(ids, array):
+                ids = self.postings[tid] = array("I", ids)
+            ids.append(rid)
+        return sorted(tids)
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Return the id of a normalized ingredient, or None if unknown."""
+        if self._lookup is not None:
+            return self._lookup.term_ids.get(term)
+        if self._term_ids is None:
+            self._term_ids = {t: i for i, t in enumerate(self.terms)}
+        return self._term_ids.get(term)
+
+    def score(self, tokens) -> Dict[int, int]:
+        """Count distinct matched ingredients per recipe for normalized tokens.
+
+        Returns:
+            Dict of recipe id -> number of that recipe's ingredients matched
+            by at least one token (recipes with no match are omitted)
+        """
+        matched = set()
+        for token in tokens:
+            matched.update(self.related_terms(token))
+
+        counts: Dict[int, int] = {}
+        for tid in matched:
+            for rid in self.postings[tid]:
+                counts[rid] = counts.get(rid, 0) + 1
+        return counts
+
+
+class _DietIndex:
+    """Diet tag -> recipe partition built once from the catalog.
+
+    Each normalized diet name owns a bitmap (one bit per recipe id) for O(1)
+    membership tests and an ascending recipe id list (its partition), so
+    diet-filtered queries only walk the recipes carrying that diet. `labels`
+    keeps the raw tags as written in recipes.json, sorted, for display.
+    """
+
+    def __init__(self, names: List[str], labels: List[str], bitmaps, members: Optional[List[array]] = None):
+        self.names = names
+        self.ids: Dict[str, int] = {n: i for i, n in enumerate(names)}
+        self.labels = labels
+        self.bitmaps = bitmaps
+        # Partitions are derived from the bitmaps on first use for snapshots
+        self._members: Dict[int, array] = dict(enumerate(members)) if members else {}
+
+    @classmethod
+    def from_recipes(cls, recipes: List[Dict[str, Any]]) -> "_DietIndex":
+        nbytes = (len(recipes) + 7) // 8
+        names: List[str] = []
+        ids: Dict[str, int] = {}
+        labels = set()
+        bitmaps: List[bytearray] = []
+        members: List[array] = []
+
+        for rid, recipe in enumerate(recipes):
+            for d in recipe.get("diets", []):
+                labels.add(d)
+                name = normalize(d)
+                did = ids.get(name)
+                if did is None:
+                    did = len(names)
+                    ids[name] = did
+                    names.append(name)
+                    bitmaps.append(bytearray(nbytes))
+                    members.append(array("I"))
+                bit = 1 << (rid & 7)
+                if not bitmaps[did][rid >> 3] & bit:
+                    bitmaps[did][rid >> 3] |= bit
+                    members[did].append(rid)
+
+        return cls(names, sorted(labels), bitmaps, members)
+
+    def add(self, rid: int, diets: Iterable[str]) -> None:
+        """Tag recipe `rid` (the next recipe id) with its diets, growing every bitmap to cover it."""
+        nbytes = (rid >> 3) + 1
+        self.names = list(self.names)
+        self.labels = list(self.labels)
+        self.bitmaps = list(self.bitmaps)
+        for did, bits in enumerate(self.bitmaps):
+            if len(bits) < nbytes:
+                bits = bytearray(bits)
+                bits.extend(bytes(nbytes - len(bits)))
+                self.bitmaps[did] = bits
+
+        for d in diets:
+            if d not in self.labels:
+                bisect.insort(self.labels, d)
+            name = normalize(d)
+            did = self.ids.get(name)
+            if did is None:
+                did = len(self.names)
+                self.ids[name] = did
+                self.names.append(name)
+                self.bitmaps.append(bytearray(nbytes))
+                self._members[did] = array("I")
+            bits = self.bitmaps[did]
+            if not isinstance(bits, bytearray):
+                bits = self.bitmaps[did] = bytearray(bits)
+            bit = 1 << (rid & 7)
+            if not bits[rid >> 3] & bit:
+                bits[rid >> 3] |= bit
+                if did in self._members:
+                    self._members[did].append(rid)
+
+    def has(self, diet: str, rid: int) -> bool:
+        """Return True if recipe `rid` is tagged with the normalized diet name."""
+        did = self.ids.get(diet)
+        if did is None:
+            return False
+        return bool(self.bitmaps[did][rid >> 3] & (1 << (rid & 7)))
+
+    def members(self, diet: str) -> array:
+        """Ascending ids of the recipes tagged with the normalized diet name."""
+        did = self.ids.get(diet)
+        if did is None:
+            return array("I")
+        ids = self._members.get(did)
+        if ids is None:
+            ids = array("I")
+            for i, byte in enumerate(self.bitmaps[did]):
+                if byte:
+                    base = i << 3
+                    ids.extend(base + bit for bit in range(8) if byte & (1 << bit))
+            self._members[did] = ids
+        return ids
+
+
+class _TitleIndex:
+    """Substring and prefix index over normalized recipe titles.
+
+    Distinct normalized titles get a title id in order of first appearance,
+    each with the ascending ids of the recipes using it. A trigram index
+    (trigram -> title ids) narrows substring queries to the titles sharing
+    the query's rarest trigram, and a sorted title list answers prefix
+    queries by binary search. Queries shorter than a trigram scan the
+    distinct titles.
+    """
+
+    GRAM = 3
+
+    def __init__(self, titles):
+        self.titles: List[str] = []
+        self.groups: List[array] = []
+        self.ids: Dict[str, int] = {}
+        for rid, title in enumerate(titles):
+            t = normalize(title)
+            tid = self.ids.get(t)
+            if tid is None:
+                tid = len(self.titles)
+                self.ids[t] = tid
+                self.titles.append(t)
+                self.groups.append(array("I"))
+            self.groups[tid].append(rid)
+
+        self.grams: Dict[str, array] = {}
+        for tid, t in enumerate(self.titles):
+            self._index_grams(tid, t)
+
+        self.sorted_ids = sorted(range(len(self.titles)), key=self.titles.__getitem__)
+        self.sorted_titles = [self.titles[tid] for tid in self.sorted_ids]
+
+    def _index_grams(self, tid: int, t: str) -> None:
+        for gram in {t[i:i + self.GRAM] for i in range(len(t) - self.GRAM + 1)}:
+            self.grams.setdefault(gram, array("I")).append(tid)
+
+    def add(self, rid: int, title: str) -> None:
+        """Index recipe `rid` (the next recipe id) under its title."""
+        t = normalize(title)
+        tid = self.ids.get(t)
+        if tid is None:
+            tid = len(self.titles)
+            self.ids[t] = tid
+            self.titles.append(t)
+            self.groups.append(array("I"))
+            self._index_grams(tid, t)
+            pos = bisect.bisect_left(self.sorted_titles, t)
+            self.sorted_titles.insert(pos, t)
+            self.sorted_ids.insert(pos, tid)
+        self.groups[tid].append(rid)
+
+    def containing(self, q: str) -> Iterator[int]:
+        """Yield ids of titles containing q, in ascending title id (catalog) order."""
+        if len(q) < self.GRAM:
+            return (tid for tid, t in enumerate(self.titles) if q in t)
+        postings = []
+        for i in range(len(q) - self.GRAM + 1):
+            ids = self.grams.get(q[i:i + self.GRAM])
+            if ids is None:
+                return iter(())
+            postings.append(ids)
+        return (tid for tid in min(postings, key=len) if q in self.titles[tid])
+
+    def with_prefix(self, q: str) -> List[int]:
+        """Return ids of titles starting with q, in title order."""
+        lo = bisect.bisect_left(self.sorted_titles, q)
+        hi = bisect.bisect_left(self.sorted_titles, q + "\U0010ffff", lo)
+        return self.sorted_ids[lo:hi]
+
+    def first(self, q: str) -> Optional[int]:
+        """Return the lowest recipe id whose title contains q, or None."""
+        for tid in self.containing(q):
+            # Title ids follow first appearance, so the first hit holds the lowest recipe id
+            return self.groups[tid][0]
+        return None
+
+    def search(self, q: str, prefix: bool = False) -> List[int]:
+        """Return ranked recipe ids for titles containing (or starting with) q.
+
+        Ranking: exact title, then title prefix, then a word starting with q,
+        then any other substring; ties go to shorter titles, then title order.
+        """
+        hits = self.with_prefix(q) if prefix else list(self.containing(q))
+
+        def rank(tid):
+            t = self.titles[tid]
+            if t == q:
+                tier = 0
+            elif t.startswith(q):
+                tier = 1
+            elif (" " + q) in t:
+                tier = 2
+            else:
+                tier = 3
+            return (tier, len(t), t, self.groups[tid][0])
+
+        return [rid for tid in sorted(hits, key=rank) for rid in self.groups[tid]]
+
+
+class _ReadWriteLock:
+    """Many concurrent readers or one writer; a waiting writer blocks new readers.
+
+    Reads nest within a thread (and inside that thread's write), so helpers
+    that rank under the read lock can call each other.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        depth = getattr(self._local, "depth", 0)
+        nested = depth > 0 or self._writer == threading.get_ident()
+        if not nested:
+            with self._cond:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if not nested:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            yield
+            return
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+
+def default_overlay_path(source_path: str) -> str:
+    """Generated-recipe overlay stored next to a recipes JSON file (recipes.generated.jsonl)."""
+    root, _ = os.path.splitext(source_path)
+    return root + ".generated.jsonl"
+
+
+def _read_overlay(path: str) -> List[Dict[str, Any]]:
+    """Read overlay recipes (one JSON object per line), skipping torn or corrupt lines."""
+    recipes = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    recipe = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(recipe, dict):
+                    recipes.append(recipe)
+    except FileNotFoundError:
+        pass
+    return recipes
+
+
+def _append_overlay(path: str, recipes: List[Dict[str, Any]]) -> None:
+    """Append recipes to an overlay file as one locked, fsynced write.
+
+    Readers never see a partial batch as valid: a line cut short by a crash
+    fails to parse and is skipped, and the next append starts a fresh line.
+    """
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in recipes).encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        size = os.fstat(fd).st_size
+        if size:
+            with open(path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    payload = b"\n" + payload
+        os.write(fd, payload)
+        os.fsync(fd)
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+class RecipeCatalog:
+    """Recipe database that is read from disk on first use, not on import.
+
+    When NumPy is installed, `scorer` scores pantries as sparse matrix-vector
+    products (see src/vector_match.py).
+
+    On first access the catalog maps its compiled snapshot (see
+    src/catalog_snapshot.py) if one exists and still matches the JSON file;
+    otherwise it parses the JSON and rewrites the snapshot for the next
+    process. Without a snapshot the ingredient index is built lazily, so
+    importing this module (e.g. for `--show-key`) costs nothing regardless of
+    catalog size. Call `use()` to point the catalog at another JSON file; it
+    reloads on next access.
+
+    Recipes added at runtime (`add_recipes`, e.g. ingested AI recipes) are
+    appended to an overlay file (recipes.generated.jsonl) that is loaded on
+    top of the JSON/snapshot, and every index already built is extended in
+    place rather than rebuilt. Extending happens under the write side of a
+    reader/writer lock; ranking and title lookups hold the read side
+    (`reading()`), so they never see an index halfway through growing.
+    """
+
+    def __init__(
+        self,
+        path: str = RECIPES_PATH,
+        snapshot_path: Optional[str] = None,
+        use_snapshot: bool = True,
+        vectorize: bool = True,
+        overlay_path: Optional[str] = None,
+    ):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.overlay_path = overlay_path
+        self.use_snapshot = use_snapshot
+        self.vectorize = vectorize
+        self._lock = threading.RLock()
+        self._rw = _ReadWriteLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._snapshot = None
+        self._recipes = None
+        self._titles: Optional[List[str]] = None
+        self._index: Optional[_IngredientIndex] = None
+        self._diets: Optional[_DietIndex] = None
+        self._valid_ingredients: Optional[set] = None
+        self._scorer = None
+        self._title_index: Optional[_TitleIndex] = None
+
+    def use(self, path: str, snapshot_path: Optional[str] = None, overlay_path: Optional[str] = None) -> None:
+        """Point the catalog at another recipes JSON file and drop cached data."""
+        with self._rw.write(), self._lock:
+            self.path = path
+            self.snapshot_path = snapshot_path
+            self.overlay_path = overlay_path
+            self._reset()
+
+    @property
+    def snapshot_file(self) -> str:
+        return self.snapshot_path or default_snapshot_path(self.path)
+
+    @property
+    def overlay_file(self) -> str:
+        return self.overlay_path or default_overlay_path(self.path)
+
+    @property
+    def loaded(self) -> bool:
+        return self._recipes is not None
+
+    def _staged(self) -> "RecipeCatalog":
+        """An unshared catalog for the same files, to build into before publishing."""
+        return RecipeCatalog(
+            self.path, self.snapshot_path, self.use_snapshot, vectorize=False, overlay_path=self.overlay_path
+        )
+
+    def _publish(self, staged: "RecipeCatalog") -> None:
+        """Take over a fully built staged catalog; `recipes` is assigned last.
+
+        Readers check `_recipes` (and the lazily built indexes) without
+        locks, so nothing may become visible while it is still growing.
+        """
+        self._snapshot = staged._snapshot
+        self._index = staged._index
+        self._diets = staged._diets
+        self._titles = staged._titles
+        self._recipes = staged._recipes
+
+    def _load(self) -> None:
+        """Load the base catalog and the overlay file's recipes, then publish them together."""
+        staged = self._staged()
+        staged._load_base()
+        for recipe in _read_overlay(self.overlay_file):
+            staged._add(recipe)
+        self._publish(staged)
+
+    def _load_base(self) -> None:
+        """Map a fresh snapshot, or parse the JSON (and refresh the snapshot)."""
+        if self.use_snapshot:
+            snap = open_snapshot(self.snapshot_file, self.path)
+            if snap is not None:
+                self._snapshot = snap
+                self._index = _IngredientIndex(snap.terms, snap.postings)
+                self._diets = _DietIndex(snap.diet_names, snap.diet_labels, snap.diet_bitmaps)
+                self._titles = snap.titles
+                self._recipes = snap.recipes
+                return
+
+        with open(self.path, "rb") as f:
+            stamp = os.fstat(f.fileno())
+            data = f.read()
+        recipes = json.loads(data)
+
+        if self.use_snapshot:
+            try:
+                self._write_snapshot(recipes, (stamp.st_mtime_ns, stamp.st_size), hashlib.sha256(data).digest())
+            except OSError:
+                pass  # read-only location: keep serving from the parsed JSON
+        self._recipes = recipes
+
+    def _write_snapshot(self, recipes: List[Dict[str, Any]], stamp: Tuple[int, int], sha256: bytes) -> None:
+        self._index = _IngredientIndex.from_recipes(recipes)
+        self._diets = _DietIndex.from_recipes(recipes)
+        self._titles = [str(r.get("title") or "") for r in recipes]
+        write_snapshot(
+            self.snapshot_file,
+            stamp=stamp,
+            source_sha256=sha256,
+            terms=self._index.terms,
+            postings=self._index.postings,
+            diet_names=self._diets.names,
+            diet_labels=self._diets.labels,
+            diet_bitmaps=self._diets.bitmaps,
+            titles=self._titles,
+            recipes=recipes,
+        )
+
+    def compile(self) -> str:
+        """Rebuild the snapshot from the JSON file now and return its path."""
+        with self._rw.write(), self._lock:
+            with open(self.path, "rb") as f:
+                stamp = os.fstat(f.fileno())
+                data = f.read()
+            recipes = json.loads(data)
+            staged = self._staged()
+            staged._write_snapshot(recipes, (stamp.st_mtime_ns, stamp.st_size), hashlib.sha256(data).digest())
+            staged._recipes = recipes
+            for recipe in _read_overlay(self.overlay_file):
+                staged._add(recipe)
+            self._reset()
+            self._publish(staged)
+        return self.snapshot_file
+
+    def _add(self, recipe: Dict[str, Any]) -> int:
+        """Append one loaded recipe and extend every index that is already built.
+
+        Indexes that are not built yet need nothing: they are built from
+        `recipes` (which now includes this one) on first use.
+        """
+        self._recipes = _appendable(self._recipes)
+        rid = len(self._recipes)
+        self._recipes.append(recipe)
+        title = str(recipe.get("title") or "")
+        if self._titles is not None:
+            self._titles = _appendable(self._titles)
+            self._titles.append(title)
+        tids: List[int] = []
+        if self._index is not None:
+            tids = self._index.add(rid, recipe.get("ingredients", []))
+            if self._valid_ingredients is not None:
+                self._valid_ingredients.update(self._index.terms[t] for t in tids)
+        if self._diets is not None:
+            self._diets.add(rid, recipe.get("diets", []))
+        if self._title_index is not None:
+            self._title_index.add(rid, title)
+        if self._scorer is not None:
+            self._scorer.titles = self._titles
+            self._scorer.add_recipe(rid, tids)
+        return rid
+
+    def add_recipes(self, recipes: List[Dict[str, Any]], persist: bool = True) -> List[int]:
+        """Append recipes to the catalog and update the built indexes in place.
+
+        Args:
+            recipes: Recipe dicts (title, ingredients, diets, ...)
+            persist: Also append them to the overlay file first, so other and
+                later processes load them
+
+        Returns:
+            The new recipe ids
+        """
+        with self._rw.write(), self._lock:
+            self.recipes
+            if persist and recipes:
+                _append_overlay(self.overlay_file, recipes)
+            return [self._add(r) for r in recipes]
+
+    def reading(self):
+        """Context manager holding off `add_recipes` (and reloads) while the indexes are read."""
+        return self._rw.read()
+
+    def find_duplicate(self, recipe: Dict[str, Any]) -> Optional[int]:
+        """Return the id of a recipe with the same normalized title or ingredient set, or None."""
+        with self.reading():
+            return self._find_duplicate(recipe)
+
+    def _find_duplicate(self, recipe: Dict[str, Any]) -> Optional[int]:
+        title = normalize(str(recipe.get("title") or ""))
+        if title:
+            tid = self.title_index.ids.get(title)
+            if tid is not None:
+                return self.title_index.groups[tid][0]
+
+        terms = {normalize(i) for i in recipe.get("ingredients", [])}
+        index = self.index
+        tids = [index.term_id(t) for t in terms]
+        if not tids or None in tids:
+            return None
+        # Recipes using every ingredient; a duplicate also uses no others
+        postings = sorted((index.postings[t] for t in tids), key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return None
+        for rid in sorted(candidates):
+            if {normalize(i) for i in self.recipes[rid].get("ingredients", [])} == terms:
+                return rid
+        return None
+
+    @property
+    def recipes(self):
+        if self._recipes is None:
+            with self._lock:
+                if self._recipes is None:
+                    self._load()
+        return self._recipes
+
+    @property
+    def titles(self) -> List[str]:
+        if self._titles is None:
+            recipes = self.recipes
+            with self._lock:
+                if self._titles is None:
+                    self._titles = [str(r.get("title") or "") for r in recipes]
+        return self._titles
+
+    @property
+    def index(self) -> _IngredientIndex:
+        if self._index is None:
+            recipes = self.recipes
+            with self._lock:
+                if self._index is None:
+                    self._index = _IngredientIndex.from_recipes(recipes)
+        return self._index
+
+    @property
+    def diets(self) -> _DietIndex:
+        if self._diets is None:
+            recipes = self.recipes
+            with self._lock:
+                if self._diets is None:
+                    self._diets = _DietIndex.from_recipes(recipes)
+        return self._diets
+
+    @property
+    def valid_ingredients(self) -> set:
+        if self._valid_ingredients is None:
+            self._valid_ingredients = set(self.index.terms)
+        return self._valid_ingredients
+
+    @property
+    def title_index(self) -> _TitleIndex:
+        if self._title_index is None:
+            titles = self.titles
+            with self._lock:
+                if self._title_index is None:
+                    self._title_index = _TitleIndex(titles)
+        return self._title_index
+
+    def warm(self) -> "RecipeCatalog":
+        """Build the lazy matching structures now, e.g. before forking workers.
+
+        Forked workers then share the loaded catalog (and the mapped snapshot
+        pages) copy-on-write instead of rebuilding or receiving it per task.
+        """
+        self.recipes
+        self.titles
+        self.diets
+        self.index.lookup
+        scorer = self.scorer
+        if scorer is not None:
+            scorer.title_rank
+            if vector_match.has_sparse():
+                scorer.matrix
+        return self
+
+    @property
+    def scorer(self) -> Optional["vector_match.VectorScorer"]:
+        """Sparse-matrix scorer over the index, or None without NumPy (or if disabled)."""
+        if self._scorer is None and self.vectorize and vector_match.available():
+            index, diets, titles = self.index, self.diets, self.titles
+            with self._lock:
+                if self._scorer is None:
+                    self._scorer = vector_match.VectorScorer(index, diets, titles)
+        return self._scorer
+
+
+# Shared catalog used by all helpers below (loads on first use)
+CATALOG = RecipeCatalog()
+
+
+def load_catalog(path: Optional[str] = None) -> RecipeCatalog:
+    """Point the shared catalog at a recipes JSON file (default: recipes.json).
+
+    Loading is still deferred until the recipes are first needed.
+    """
+    CATALOG.use(path or RECIPES_PATH)
+    return CATALOG
+
+
+def __getattr__(name: str):
+    # Keep the historical module-level names working without loading at import
+    if name == "RECIPES":
+        return CATALOG.recipes
+    if name == "VALID_INGREDIENTS":
+        return CATALOG.valid_ingredients
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def parse_ingredients(text: str) -> List[str]:
     """Parse comma or semicolon-separated ingredient input into normalized list.
     
@@ -78,53 +944,283 @@ def parse_ingredients(text: str) -> List[str]:
     return normalized
 
 
-def match_recipes(ingredients: List[str], min_match: int = 2, diet: str = None) -> List[Tuple[Dict[str, Any], int]]:
+def _rank_matches(
+    catalog: "RecipeCatalog",
+    ing_set: set,
+    min_match: int,
+    diet: Optional[str],
+    limit: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    """Score normalized pantry tokens against a catalog and rank recipe ids.
+
+    Uses the vectorized sparse scorer when NumPy is available, otherwise the
+    pure-Python postings walk; both produce the same ordering. With `limit`,
+    only the top `limit` recipes are selected (bounded heap / partial sort),
+    so the cost no longer grows with the number of qualifying recipes.
+
+    Returns:
+        List of (recipe_id, match_count) sorted by (-count, title, recipe_id)
+    """
+    with catalog.reading():
+        return _rank_ids(catalog, ing_set, min_match, diet, limit)
+
+
+def _rank_ids(
+    catalog: "RecipeCatalog",
+    ing_set: set,
+    min_match: int,
+    diet: Optional[str],
+    limit: Optional[int],
+) -> List[Tuple[int, int]]:
+    if limit is not None and limit <= 0:
+        return []
+
+    scorer = catalog.scorer
+    if scorer is not None:
+        ids, counts = scorer.score(ing_set, diet=diet)
+        return scorer.rank(ids, counts, min_match, diet, limit=limit)
+
+    # Score only recipes sharing at least one ingredient via the inverted index.
+    counts = catalog.index.score(ing_set)
+    diets = catalog.diets
+    titles = catalog.titles
+
+    check_diet = False
+    if diet:
+        partition = diets.members(diet)
+        if min_match <= 0 or len(partition) <= len(counts):
+            # Walk the diet's partition and look up each recipe's score
+            candidates = partition
+        else:
+            # Fewer scored recipes than diet members: test each against the bitmap
+            candidates = counts.keys()
+            check_diet = True
+    elif min_match <= 0:
+        # Recipes with zero overlap also qualify, so every recipe is a candidate
+        candidates = range(len(catalog.recipes))
+    else:
+        candidates = counts.keys()
+
+    def qualifying():
+        for rid in candidates:
+            count = counts.get(rid, 0)
+            # Keep recipe if it meets minimum threshold
+            if count < min_match:
+                continue
+            # Apply dietary filter if specified (precomputed diet bitmaps)
+            if check_diet and not diets.has(diet, rid):
+                continue  # Skip recipes that don't match user's diet
+            yield rid, count
+
+    # Sort: most matches first, then alphabetical (catalog order breaks ties)
+    def sort_key(x):
+        return (-x[1], titles[x[0]], x[0])
+
+    if limit is not None:
+        return heapq.nsmallest(limit, qualifying(), key=sort_key)
+    return sorted(qualifying(), key=sort_key)
+
+
+def match_recipes(
+    ingredients: List[str],
+    min_match: int = 2,
+    diet: str = None,
+    limit: Optional[int] = None,
+) -> List[Tuple[Dict[str, Any], int]]:
     """Find recipes matching user ingredients with optional dietary filtering.
     
     Algorithm:
-    1. Filter recipes by diet (if specified)
+    1. Look up recipes sharing ingredients in the inverted ingredient index
     2. Count matching ingredients per recipe (intersection of ingredient sets)
     3. Keep only recipes with >= min_match matching ingredients
-    4. Sort by match count (descending) then title (ascending)
+    4. Filter recipes by diet (if specified)
+    5. Sort by match count (descending) then title (ascending), keeping only
+       the best `limit` results when a limit is given
     
     Args:
         ingredients: List of user ingredients
         min_match: Minimum required ingredient matches (default: 2)
         diet: Optional dietary filter string (e.g., "vegan", "halal")
+        limit: Optional maximum number of results (top-k selection)
         
     Returns:
         List of (recipe_dict, match_count) tuples, sorted by best matches
     """
-    # Normalize user-provided ingredients
+    return list(iter_matches(ingredients, min_match=min_match, diet=diet, limit=limit))
+
+
+def iter_matches(
+    ingredients: List[str],
+    min_match: int = 2,
+    diet: str = None,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """Generator variant of match_recipes yielding (recipe, match_count) best-first.
+
+    Ranking happens up front (top-k when `limit` is set); recipe records are
+    only materialized as they are consumed, which matters for snapshot-backed
+    catalogs where each record is decoded on access.
+    """
+    # Normalize user-provided ingredients.
+    # Substring and exact matches both count: e.g., user 'soba' matches 'soba noodles'
     ing_set = set([normalize(i) for i in ingredients])
-    matches = []
-    
-    for r in RECIPES:
-        # Apply dietary filter if specified
-        if diet:
-            diets = [normalize(d) for d in r.get("diets", [])]
-            if normalize(diet) not in diets:
-                continue  # Skip recipes that don't match user's diet
-        
-        # Count ingredient overlap
-        recipe_ings_list = [normalize(i) for i in r.get("ingredients", [])]
+    diet_norm = normalize(diet) if diet else None
 
-        # Allow substring and exact matches: e.g., user 'soba' matches 'soba noodles'
-        matched = set()
-        for u in ing_set:
-            for ri in recipe_ings_list:
-                if u == ri or u in ri or ri in u:
-                    matched.add(ri)
+    ranked = _rank_matches(CATALOG, ing_set, min_match, diet_norm, limit=limit)
+    # Fetched after ranking: ids from a just-grown index are all in this list
+    recipes = CATALOG.recipes
+    for rid, count in ranked:
+        yield recipes[rid], count
 
-        count = len(matched)
-        
-        # Keep recipe if it meets minimum threshold
+
+def _match_many_ids(
+    catalog: "RecipeCatalog",
+    pantries: List[List[str]],
+    min_match: int,
+    diet: Optional[str],
+    limit: Optional[int],
+) -> List[List[Tuple[int, int]]]:
+    """Rank recipe ids for several pantries, batching the scoring when vectorized."""
+    ing_sets = [set(normalize(i) for i in pantry) for pantry in pantries]
+    with catalog.reading():
+        scorer = catalog.scorer
+        if scorer is not None and len(ing_sets) > 1 and (limit is None or limit > 0):
+            scored = scorer.score_many(ing_sets)
+            return [scorer.rank(ids, counts, min_match, diet, limit=limit) for ids, counts in scored]
+        return [_rank_ids(catalog, ing_set, min_match, diet, limit) for ing_set in ing_sets]
+
+
+def _init_match_worker(path: str, snapshot_path: Optional[str], overlay_path: Optional[str] = None) -> None:
+    # Spawned workers (no fork available) map the same snapshot file instead
+    # of receiving the catalog through pickling
+    CATALOG.use(path, snapshot_path, overlay_path)
+    CATALOG.warm()
+
+
+def _match_chunk(task) -> List[List[Tuple[int, int]]]:
+    pantries, min_match, diet, limit = task
+    return _match_many_ids(CATALOG, pantries, min_match, diet, limit)
+
+
+class MatchPool:
+    """Worker processes for match_recipes_many, started once and reused across calls.
+
+    The shared catalog is fully built first. With the `fork` start method
+    every worker is forked here, inheriting the catalog copy-on-write, so
+    create the pool before starting any threads (forking a process with
+    other threads running can deadlock the child). Otherwise each worker
+    maps the compiled snapshot once at startup.
+
+    Workers rank against the catalog as it was when they started; recipes
+    added since (e.g. ingested AI recipes) are ranked in the parent and
+    merged in by match_recipes_many.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        CATALOG.warm()
+        self.workers = workers or os.cpu_count() or 1
+        self.size = len(CATALOG.recipes)
+        if "fork" in multiprocessing.get_all_start_methods():
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"))
+            # The first task launches every forked worker at once
+            self.executor.submit(int).result()
+        else:
+            self.executor = ProcessPoolExecutor(
+                self.workers,
+                initializer=_init_match_worker,
+                initargs=(CATALOG.path, CATALOG.snapshot_path, CATALOG.overlay_path),
+            )
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> "MatchPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _rank_added(
+    catalog: "RecipeCatalog",
+    ranked: List[Tuple[int, int]],
+    start: int,
+    ing_set: set,
+    min_match: int,
+    diet: Optional[str],
+    limit: Optional[int],
+) -> List[Tuple[int, int]]:
+    """Merge recipes from id `start` on into a worker's ranking (same rule and order as _rank_matches)."""
+    recipes, titles = catalog.recipes, catalog.titles
+    counts = dict(ranked)
+    for rid in range(start, len(recipes)):
+        recipe = recipes[rid]
+        if diet and diet not in {normalize(d) for d in recipe.get("diets", [])}:
+            continue
+        terms = {normalize(i) for i in recipe.get("ingredients", [])}
+        count = sum(1 for t in terms if any(u == t or u in t or t in u for u in ing_set))
         if count >= min_match:
-            matches.append((r, count))
-    
-    # Sort: most matches first, then alphabetical
-    matches.sort(key=lambda x: (-x[1], x[0]["title"]))
-    return matches
+            counts[rid] = count
+    merged = sorted(counts.items(), key=lambda x: (-x[1], titles[x[0]], x[0]))
+    return merged if limit is None else merged[:limit]
+
+
+def match_recipes_many(
+    pantries: List[List[str]],
+    diet: str = None,
+    min_match: int = 2,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    pool: Optional[MatchPool] = None,
+) -> List[List[Tuple[Dict[str, Any], int]]]:
+    """Run match_recipes for many pantries, fanned out over a process pool.
+
+    Tasks only carry chunks of pantries, and workers return (recipe_id,
+    count) pairs that are turned back into recipes here, so recipes are
+    never pickled. Pass a MatchPool to reuse its workers across calls;
+    otherwise one is started (see MatchPool) and closed for this call.
+
+    Args:
+        pantries: List of ingredient lists, one per pantry
+        diet: Optional dietary filter applied to every pantry
+        min_match: Minimum required ingredient matches (default: 2)
+        workers: Number of worker processes (default: CPU count; <= 1 runs
+            inline); ignored when `pool` is given
+        limit: Optional maximum number of results per pantry
+        pool: Optional running MatchPool to use
+
+    Returns:
+        One match_recipes-style result list per pantry, in input order
+    """
+    diet_norm = normalize(diet) if diet else None
+    CATALOG.warm()
+
+    if pool is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if min(workers, len(pantries)) > 1:
+            with MatchPool(min(workers, len(pantries))) as own:
+                return match_recipes_many(pantries, diet, min_match, limit=limit, pool=own)
+
+    if pool is None or len(pantries) <= 1:
+        ranked = _match_many_ids(CATALOG, pantries, min_match, diet_norm, limit)
+    else:
+        # A few chunks per worker keeps the pool busy without per-pantry tasks
+        size = max(1, -(-len(pantries) // (pool.workers * 4)))
+        tasks = [(pantries[i:i + size], min_match, diet_norm, limit) for i in range(0, len(pantries), size)]
+        ranked = [ids for chunk in pool.executor.map(_match_chunk, tasks) for ids in chunk]
+        with CATALOG.reading():
+            if len(CATALOG.recipes) > pool.size:
+                ranked = [
+                    _rank_added(CATALOG, ids, pool.size, set(normalize(i) for i in pantry), min_match, diet_norm, limit)
+                    for pantry, ids in zip(pantries, ranked)
+                ]
+
+    recipes = CATALOG.recipes
+    return [[(recipes[rid], count) for rid, count in ids] for ids in ranked]
 
 
 def explain_recipe(recipe: Dict[str, Any]) -> str:
@@ -238,51 +1334,80 @@ def suggest_substitute(ingredient: str) -> str:
     return f"I don't have a suggestion for '{ingredient}'. Try searching online for '{ingredient} substitute'"
 
 
-def find_recipe_by_title_or_index(query: str) -> Dict[str, Any]:
+def find_recipe_by_title_or_index(query: str, all_hits: bool = False):
     """Look up a recipe by numeric index (1-based) or partial title match.
     
     Matching:
     - "1" matches RECIPES[0] (1-based for user convenience)
     - "stir" matches "Tofu Stir-Fry" (case-insensitive substring)
     
+    Title matches come from the catalog's title index instead of a scan.
+    
     Args:
         query: Either a number string or recipe title (partial)
+        all_hits: Return every matching recipe, ranked (see search_recipes_by_title)
         
     Returns:
-        Recipe dict if found, empty dict otherwise
+        Recipe dict if found, empty dict otherwise; with all_hits, a list of
+        recipe dicts (empty if nothing matches)
     """
     q = normalize(query)
+    recipes = CATALOG.recipes
     
     # Try numeric index (1-based for user-friendly UX)
     if q.isdigit():
         idx = int(q) - 1
-        if 0 <= idx < len(RECIPES):
-            return RECIPES[idx]
+        if 0 <= idx < len(recipes):
+            return [recipes[idx]] if all_hits else recipes[idx]
+    
+    if all_hits:
+        return search_recipes_by_title(q)
+
+    # Try partial title match (first recipe in catalog order)
+    with CATALOG.reading():
+        rid = CATALOG.title_index.first(q)
+        return CATALOG.recipes[rid] if rid is not None else {}
+
+
+def search_recipes_by_title(query: str, prefix: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Find recipes whose title contains (or, with prefix=True, starts with) query.
     
-    # Try partial title match
-    for r in RECIPES:
-        if q in normalize(r.get("title", "")):
-            return r
+    Results are ranked: exact title, then title prefix, then a word starting
+    with the query, then other substring matches; shorter titles first.
     
-    return {}
+    Args:
+        query: Partial recipe title (case-insensitive)
+        prefix: Only match titles starting with the query
+        limit: Optional maximum number of recipes to return
+        
+    Returns:
+        List of recipe dicts, best match first
+    """
+    with CATALOG.reading():
+        rids = CATALOG.title_index.search(normalize(query), prefix=prefix)
+        recipes = CATALOG.recipes
+    if limit is not None:
+        rids = rids[:limit]
+    return [recipes[rid] for rid in rids]
 
 
 def get_available_diets() -> List[str]:
     """Get all dietary categories available in recipe database.
     
+    The tags are collected once when the catalog's diet index is built (or
+    read from the snapshot), so this does not rescan the recipes.
+    
     Returns:
         Sorted list of unique diet tags (e.g., ["halal", "kosher", "vegan", ...])
     """
-    diets = set()
-    for r in RECIPES:
-        diets.update(r.get("diets", []))
-    return sorted(list(diets))
+    return list(CATALOG.diets.labels)
 
 
 def validate_ingredients(ingredients: List[str]) -> Tuple[List[str], List[str]]:
     """Validate user ingredients against known ingredients in database.
     
-    Performs substring matching to catch variations (e.g., "soba" matches "soba noodles").
+    Performs substring matching to catch variations (e.g., "soba" matches "soba noodles")
+    through the n-gram lookup over the known ingredient vocabulary.
     
     Args:
         ingredients: List of user-provided ingredients
@@ -294,16 +1419,10 @@ def validate_ingredients(ingredients: List[str]) -> Tuple[List[str], List[str]]:
     invalid = []
     
     for ing in ingredients:
-        ing_norm = normalize(ing)
         # Check for exact match or substring match
-        found = False
-        for known_ing in VALID_INGREDIENTS:
-            if ing_norm == known_ing or ing_norm in known_ing or known_ing in ing_norm:
-                valid.append(ing)
-                found = True
-                break
-        
-        if not found:
+        if CATALOG.index.lookup.matches_any(normalize(ing)):
+            valid.append(ing)
+        else:
             invalid.append(ing)
     
     return valid, invalid
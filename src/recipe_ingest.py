@@ -0,0 +1,124 @@
+"""
+src/recipe_ingest.py
+====================
+Write-back of AI-generated recipes into the local catalog.
+
+Generated recipes used to be thrown away after the session, so the next
+user with the same pantry paid for another LLM call. `ingest_generated`
+keeps them instead:
+
+1. validate the shape (a title and a non-empty ingredient list)
+2. enrich with the same best-effort allergen flags and nutrition estimates
+   the bundled catalog uses (scripts/add_allergen_flags.py,
+   scripts/add_nutrition.py)
+3. drop duplicates of existing recipes (same normalized title or same
+   ingredient set) and of each other
+4. append the rest to the catalog's overlay file in one atomic write and
+   extend the in-memory indexes (see RecipeCatalog.add_recipes)
+
+Later sessions then find these recipes through the fast local match_recipes path.
+"""
+from typing import Any, Dict, List, Optional
+
+from scripts.add_allergen_flags import ALLERGEN_MAP, detect_allergens
+from scripts.add_nutrition import estimate_nutrition
+from src import recipe_helper
+from src.recipe_helper import RecipeCatalog, normalize
+
+# Common names models use for the ALLERGEN_MAP keys
+ALLERGEN_ALIASES = {
+    "dairy": "milk",
+    "lactose": "milk",
+    "eggs": "egg",
+    "gluten": "wheat_gluten",
+    "peanuts": "peanut",
+    "nuts": "tree_nuts",
+    "tree nut": "tree_nuts",
+    "tree nuts": "tree_nuts",
+    "crustacean": "shellfish",
+    "crustaceans": "shellfish",
+    "sulphites": "sulfites",
+}
+
+
+def canonical_allergens(labels: List[Any]) -> List[str]:
+    """Map free-form allergen labels ("Dairy", "gluten") onto ALLERGEN_MAP keys; unknown labels are dropped."""
+    found = set()
+    for label in labels:
+        if not isinstance(label, str):
+            continue
+        name = normalize(label).replace("_", " ")
+        key = name.replace(" ", "_")
+        if key in ALLERGEN_MAP:
+            found.add(key)
+        elif name in ALLERGEN_ALIASES:
+            found.add(ALLERGEN_ALIASES[name])
+        elif name:
+            # Ingredient-like labels ("wheat", "sesame seeds") go through the keyword map
+            found.update(detect_allergens([name]))
+    return sorted(found)
+
+
+def prepare_recipe(recipe: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return a cleaned, enriched copy of a generated recipe, or None if it is unusable.
+
+    Allergens are the union of keyword detection and the model's guess mapped
+    onto the same ALLERGEN_MAP keys, so an ingested recipe carries the same
+    labels as the bundled catalog; nutrition is re-estimated to match it.
+    """
+    if not isinstance(recipe, dict):
+        return None
+    title = recipe.get("title")
+    ingredients = recipe.get("ingredients")
+    if not isinstance(title, str) or not title.strip():
+        return None
+    if not isinstance(ingredients, list):
+        return None
+    ingredients = [i.strip() for i in ingredients if isinstance(i, str) and i.strip()]
+    if not ingredients:
+        return None
+
+    steps = recipe.get("steps")
+    diets = recipe.get("diets")
+    allergens = recipe.get("allergens")
+    prepared = {
+        "title": title.strip(),
+        "ingredients": ingredients,
+        "time": str(recipe.get("time") or ""),
+        "diets": [d for d in diets if isinstance(d, str)] if isinstance(diets, list) else [],
+        "steps": [s for s in steps if isinstance(s, str)] if isinstance(steps, list) else [],
+        "tags": ["ai-generated"],
+    }
+    guessed = canonical_allergens(allergens) if isinstance(allergens, list) else []
+    prepared["allergens"] = sorted(set(guessed) | set(detect_allergens(ingredients)))
+    prepared["nutrition"] = estimate_nutrition(ingredients)
+    return prepared
+
+
+def ingest_generated(recipes: List[Dict[str, Any]], catalog: Optional[RecipeCatalog] = None) -> List[Dict[str, Any]]:
+    """Add new generated recipes to the catalog (default: the shared CATALOG).
+
+    Returns:
+        The prepared recipes that were added (duplicates and invalid ones are skipped)
+    """
+    catalog = catalog or recipe_helper.CATALOG
+    fresh: List[Dict[str, Any]] = []
+    titles = set()
+    ingredient_sets = set()
+    for recipe in recipes:
+        prepared = prepare_recipe(recipe)
+        if prepared is None:
+            continue
+        title = normalize(prepared["title"])
+        ingredient_set = frozenset(normalize(i) for i in prepared["ingredients"])
+        if title in titles or ingredient_set in ingredient_sets:
+            continue
+        if catalog.find_duplicate(prepared) is not None:
+            continue
+        titles.add(title)
+        ingredient_sets.add(ingredient_set)
+        fresh.append(prepared)
+
+    if fresh:
+        catalog.add_recipes(fresh)
+    return fresh
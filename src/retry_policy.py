@@ -0,0 +1,236 @@
+"""
+src/retry_policy.py
+===================
+Reusable retry policy and circuit breaker for calls to remote services.
+
+RetryPolicy retries only transient failures (HTTP 408/409/429/5xx, timeouts,
+connection errors). Between attempts it sleeps with full jitter: a uniform
+random delay in [0, min(max_delay, base_delay * 2**attempt)]. A server's
+Retry-After / retry-after-ms hint replaces that delay. Every call may carry a
+deadline, an overall time budget covering attempts and sleeps. When the next
+sleep would overrun the budget, the policy gives up right away rather than
+waiting and failing anyway.
+
+A CircuitBreaker shared by several policies (or calls) stops calling a
+service that keeps failing. After `failure_threshold` consecutive failed
+calls it opens, and calls fail fast with CircuitOpenError for `cool_off`
+seconds. After that a single trial call is let through (half-open): success
+closes the breaker, failure opens it again.
+
+Nothing here depends on a particular client library; errors are classified
+by their `status_code`, `response.headers` and exception type.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit breaker is open."""
+
+
+class RetryCancelled(Exception):
+    """Raised when a call is cancelled before it could succeed."""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Return True for failures worth retrying: 408/409/429/5xx, timeouts and connection errors."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # Client libraries define their own timeout/connection errors
+    # (e.g. APITimeoutError, APIConnectionError, httpx.ConnectError)
+    return any(
+        "Timeout" in cls.__name__ or "Connect" in cls.__name__ for cls in type(exc).__mro__
+    )
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (retry-after-ms or Retry-After), if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then probe again after a cool-off period.
+
+    Args:
+        failure_threshold: Consecutive failed calls that open the breaker
+        cool_off: Seconds the breaker stays open before a trial call
+    """
+
+    def __init__(self, failure_threshold: int = 3, cool_off: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cool_off = cool_off
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        """"closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at < self.cool_off:
+                return "open"
+            return "half-open"
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead (claims the trial slot when half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cool_off or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+    def release(self):
+        """Give back a trial slot claimed by allow() without recording an outcome."""
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self):
+        self.record_success()
+
+
+class RetryPolicy:
+    """Retry transient failures with full jitter, Retry-After and an overall deadline.
+
+    Args:
+        max_attempts: Attempts per call, including the first
+        base_delay: Backoff cap for the first retry; doubles per attempt
+        max_delay: Upper bound on any single backoff delay
+        deadline: Default time budget per call in seconds (None: unbounded)
+        breaker: Optional CircuitBreaker consulted before, and updated after, each call
+        retryable: Predicate deciding which exceptions are retried
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 8.0,
+        deadline: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retryable: Callable[[BaseException], bool] = is_transient,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker
+        self.retryable = retryable
+        self._clock = clock
+        self._rng = rng
+
+    def backoff(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Delay before retry number `attempt` (0-based): Retry-After if given, else full jitter."""
+        hint = retry_after(exc) if exc is not None else None
+        if hint is not None:
+            return hint
+        return self._rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def call(
+        self,
+        func: Callable[[Optional[float]], Any],
+        deadline: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Any:
+        """Call func(timeout) until it succeeds, fails permanently or runs out of budget.
+
+        `timeout` is the time left in the budget (None when unbounded), for
+        use as the request's own timeout.
+
+        Raises:
+            CircuitOpenError: the breaker is open; func was not called
+            RetryCancelled: cancel_event was set before a successful attempt, or func
+                raised it to give up without calling the service
+            Exception: the last error from func when retries are exhausted
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError("circuit open; skipping call")
+
+        budget = self.deadline if deadline is None else deadline
+        end = None if budget is None else self._clock() + budget
+        attempt = 0
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                # Nothing was learned about the service's health
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise RetryCancelled()
+            remaining = None if end is None else max(0.0, end - self._clock())
+            try:
+                result = func(remaining)
+            except RetryCancelled:
+                # func gave up before reaching the service (e.g. waiting for rate-limit capacity)
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+            except Exception as e:
+                attempt += 1
+                transient = self.retryable(e)
+                delay = self.backoff(attempt - 1, e) if transient else 0.0
+                out_of_budget = end is not None and self._clock() + delay >= end
+                if not transient or attempt >= self.max_attempts or out_of_budget:
+                    if self.breaker is not None:
+                        if transient:
+                            self.breaker.record_failure()
+                        else:
+                            # The service answered; the request itself was bad
+                            self.breaker.record_success()
+                    raise
+                if cancel_event is not None:
+                    cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
@@ -0,0 +1,232 @@
+"""
+src/saved_store.py
+==================
+Append-only store for the user's saved recipes (saved_recipes.jsonl).
+
+Saving used to read the whole saved_recipes.json, append one entry and
+rewrite the file. That is O(n) per save. Two sessions saving at once lost
+one of the writes, and one parse error silently replaced the history with
+an empty list. The store instead keeps one JSON entry per line:
+
+- a save is a single O_APPEND write of one line, fsynced, under an
+  exclusive flock on a side lock file (saved_recipes.jsonl.lock); it
+  never reads the file, so it costs the same at any size
+- a line torn by a crash fails to parse and is skipped; the next append
+  starts on a fresh line
+- the in-memory index is built on the first read, then readers pick up
+  lines appended since (by any process) incrementally, reading only the
+  new bytes
+- entries are indexed in memory by normalized title and by saved_at
+- `compact()` rewrites the file without corrupt lines (and, optionally,
+  without older saves of the same title), atomically via a temp file and
+  os.replace. It holds the same lock, so no append is lost to the swap.
+
+A legacy saved_recipes.json (a JSON array) is migrated into the JSONL file
+the first time the store is opened. The legacy file is left untouched.
+"""
+import bisect
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.recipe_helper import normalize
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+DEFAULT_SAVED_PATH = "saved_recipes.jsonl"
+LEGACY_SAVED_PATH = "saved_recipes.json"
+
+
+class SavedStore:
+    """Saved recipes as an append-only JSONL file with title and saved_at indexes.
+
+    Args:
+        path: JSONL file of saved entries
+        legacy_path: JSON array file migrated into `path` if `path` doesn't exist yet
+    """
+
+    def __init__(self, path: str = DEFAULT_SAVED_PATH, legacy_path: Optional[str] = LEGACY_SAVED_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.lock_path = path + ".lock"
+        self._lock = threading.RLock()
+        self._reset()
+        self._migrate()
+
+    def _reset(self):
+        self._entries: List[Dict[str, Any]] = []
+        self._by_title: Dict[str, List[int]] = {}
+        self._by_time: List[tuple] = []  # sorted (saved_at, position)
+        self._offset = 0
+        self._inode = None
+        self.corrupt_lines = 0
+
+    # -- locking -----------------------------------------------------------
+
+    def _locked(self):
+        """Open and exclusively lock the side lock file; closing the fd releases it."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def _migrate(self):
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            # Never replace history we can't read; the file stays for manual repair
+            return
+        if not isinstance(legacy, list):
+            return
+        fd = self._locked()
+        try:
+            if not os.path.exists(self.path):  # another process may have migrated meanwhile
+                self._write_atomically([e for e in legacy if isinstance(e, dict)])
+        finally:
+            os.close(fd)
+
+    def _write_atomically(self, entries: List[Dict[str, Any]]):
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # -- reading -----------------------------------------------------------
+
+    def refresh(self) -> None:
+        """Index entries appended since the last read (by any process)."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Replaced by compaction: start over
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # A line without its newline is still being written (or torn); leave it
+            end = data.rfind(b"\n") + 1
+            indexed = len(self._by_time)
+            for line in data[:end].splitlines():
+                self._index_line(line)
+            if len(self._by_time) > indexed:
+                # One sort per read; after the first it merges two sorted runs
+                self._by_time.sort()
+            self._offset += end
+
+    def _index_line(self, line: bytes):
+        if not line.strip():
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            self.corrupt_lines += 1
+            return
+        if not isinstance(entry, dict):
+            self.corrupt_lines += 1
+            return
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._by_title.setdefault(normalize(str(entry.get("title") or "")), []).append(position)
+        self._by_time.append((str(entry.get("saved_at") or ""), position))
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entries)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """All saved entries, oldest save first."""
+        self.refresh()
+        with self._lock:
+            return list(self._entries)
+
+    def find_title(self, title: str) -> List[Dict[str, Any]]:
+        """Saved entries for a title (case-insensitive), oldest first."""
+        self.refresh()
+        with self._lock:
+            return [self._entries[i] for i in self._by_title.get(normalize(title), ())]
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entries with start <= saved_at < end (ISO-8601 strings; None: unbounded), by saved_at."""
+        self.refresh()
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(self._by_time, (start,))
+            hi = len(self._by_time) if end is None else bisect.bisect_left(self._by_time, (end,))
+            return [self._entries[i] for _, i in self._by_time[lo:hi]]
+
+    def latest(self, n: int = 10) -> List[Dict[str, Any]]:
+        """The n most recently saved entries, newest first."""
+        self.refresh()
+        with self._lock:
+            return [self._entries[i] for _, i in reversed(self._by_time[-n:])] if n > 0 else []
+
+    # -- writing -----------------------------------------------------------
+
+    def save(self, recipe: Dict[str, Any], saved_at: Optional[str] = None) -> Dict[str, Any]:
+        """Append a saved entry for a recipe and return it.
+
+        The index is not touched; the next read picks the line up with the rest.
+        """
+        entry = {
+            "title": recipe.get("title"),
+            "saved_at": saved_at or datetime.utcnow().isoformat(),
+            "allergens": recipe.get("allergens", []),
+        }
+        payload = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        lock = self._locked()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b"\n":
+                    payload = b"\n" + payload
+                os.write(fd, payload)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        finally:
+            os.close(lock)
+        return entry
+
+    def compact(self, dedupe: bool = False) -> Dict[str, int]:
+        """Rewrite the file without corrupt lines (and with dedupe, keep only each title's latest save).
+
+        Returns:
+            Counts of entries kept and lines dropped
+        """
+        lock = self._locked()
+        try:
+            with self._lock:
+                self._reset()
+                self.refresh()
+                entries = self._entries
+                corrupt = self.corrupt_lines
+                if dedupe:
+                    latest = {title: max(ids, key=lambda i: str(entries[i].get("saved_at") or ""))
+                              for title, ids in self._by_title.items()}
+                    keep = sorted(latest.values())
+                    entries = [entries[i] for i in keep]
+                self._write_atomically(entries)
+                dropped = len(self._entries) - len(entries)
+                self._reset()
+        finally:
+            os.close(lock)
+        self.refresh()
+        return {"kept": len(entries), "corrupt": corrupt, "duplicates": dropped}
@@ -0,0 +1,307 @@
+"""
+src/server.py
+=============
+Long-running local HTTP/JSON service around the recipe helpers (python main.py --serve).
+
+One process loads and warms the catalog once and then answers requests from
+memory. It avoids paying interpreter startup, imports and catalog loading
+per query.
+
+Endpoints (POST bodies and responses are JSON objects):
+- GET  /health      status, catalog size, AI availability and LLM breaker state
+- POST /parse       {"text"} -> {"ingredients"}
+- POST /match       a batch-style request (see src/batch.py): {"ingredients",
+                    "diet", "meal_type", "max_results", "ai"} -> {"ingredients",
+                    "options"}; "ai": true fills open slots with generated recipes
+- POST /search      {"query", "prefix", "limit"} -> {"recipes"} (title search)
+- POST /explain     {"title"} or {"recipe"} -> {"title", "text"}
+- POST /substitute  {"ingredient"} -> {"ingredient", "suggestion"}
+- POST /generate    {"ingredients", "diet", "meal_type", "count",
+                    "avoid_titles"} -> {"recipes"}
+- POST /plan        {"ingredients", "meals", "diet", "max_minutes"} -> a meal
+                    plan with one shopping list (see src/planner.py)
+
+Invalid requests get 400 with {"error": "..."}. Connections are handled by a
+bounded thread pool (`workers`). Up to `max_pending` further connections
+wait for a worker. Beyond that the server answers 503 at once rather than
+queueing without limit. Idle keep-alive connections are closed after
+KEEPALIVE_TIMEOUT seconds so they don't hold workers.
+
+Recipes generated for /match are ingested by one writer thread, after
+the response is built. Request threads only read the catalog; the
+catalog's reader/writer lock keeps them off the indexes while the writer
+extends them.
+"""
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src import recipe_helper
+from src.batch import ingest_recipes, run_chunk, validate_request
+from src.openai_helper import LLM_BREAKER, generate_recipes_from_ingredients, get_client
+from src.planner import plan_meals
+from src.recipe_helper import explain_recipe, find_recipe_by_title_or_index, parse_ingredients, search_recipes_by_title, suggest_substitute
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+KEEPALIVE_TIMEOUT = 5.0   # seconds an idle connection may hold a worker
+MAX_BODY = 1 << 20        # bytes
+
+_OVERLOADED = (
+    b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 27\r\nConnection: close\r\n\r\n"
+    b'{"error": "server is busy"}'
+)
+
+
+class BadRequest(ValueError):
+    """Raised by an endpoint for a request it can't answer (sent as 400)."""
+
+
+def _string(body: Dict[str, Any], name: str, required: bool = True) -> Optional[str]:
+    value = body.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise BadRequest(f"{name} must be a non-empty string")
+    return value
+
+
+def _count(body: Dict[str, Any], name: str, default: int) -> int:
+    value = body.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise BadRequest(f"{name} must be a positive integer")
+    return value
+
+
+def handle_parse(server, body):
+    return {"ingredients": parse_ingredients(_string(body, "text"))}
+
+
+def handle_match(server, body):
+    request = validate_request(body, 0, server.default_max)
+    if "error" in request:
+        raise BadRequest(request["error"])
+    allow_ai = server.allow_ai and body.get("ai") is True
+    result = run_chunk([request], workers=1, allow_ai=allow_ai, ingest=server.ingest)[0]
+    return {"ingredients": result["ingredients"], "options": result["options"]}
+
+
+def handle_search(server, body):
+    limit = _count(body, "limit", 10)
+    return {"recipes": search_recipes_by_title(_string(body, "query"), prefix=body.get("prefix") is True, limit=limit)}
+
+
+def handle_explain(server, body):
+    recipe = body.get("recipe")
+    if recipe is None:
+        recipe = find_recipe_by_title_or_index(_string(body, "title"))
+        if not recipe:
+            raise BadRequest("no recipe with that title")
+    elif not isinstance(recipe, dict):
+        raise BadRequest("recipe must be an object")
+    return {"title": recipe.get("title"), "text": explain_recipe(recipe)}
+
+
+def handle_substitute(server, body):
+    ingredient = _string(body, "ingredient")
+    return {"ingredient": ingredient, "suggestion": suggest_substitute(ingredient)}
+
+
+def handle_generate(server, body):
+    if not server.allow_ai:
+        raise BadRequest("AI generation is disabled on this server")
+    request = validate_request(body, 0, server.default_max)
+    if "error" in request:
+        raise BadRequest(request["error"])
+    avoid = body.get("avoid_titles") or []
+    if not isinstance(avoid, list) or not all(isinstance(t, str) for t in avoid):
+        raise BadRequest("avoid_titles must be a list of strings")
+    recipes = generate_recipes_from_ingredients(
+        request["ingredients"],
+        diet=request["diet"],
+        meal_type=request["meal_type"],
+        count=_count(body, "count", request["max_results"]),
+        avoid_titles=avoid,
+    )
+    return {"recipes": recipes or []}
+
+
+def handle_plan(server, body):
+    request = validate_request(body, 0, server.default_max)
+    if "error" in request:
+        raise BadRequest(request["error"])
+    max_minutes = body.get("max_minutes")
+    if max_minutes is not None:
+        max_minutes = _count(body, "max_minutes", 0)
+    return plan_meals(
+        request["ingredients"],
+        _count(body, "meals", 3),
+        diet=request["diet"],
+        max_minutes=max_minutes,
+    )
+
+
+ENDPOINTS: Dict[str, Callable[["RecipeServer", Dict[str, Any]], Dict[str, Any]]] = {
+    "/parse": handle_parse,
+    "/match": handle_match,
+    "/search": handle_search,
+    "/explain": handle_explain,
+    "/substitute": handle_substitute,
+    "/generate": handle_generate,
+    "/plan": handle_plan,
+}
+
+
+class RecipeRequestHandler(BaseHTTPRequestHandler):
+    server_version = "RecipeHelper/1.0"
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out as separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.health())
+        elif self.path in ENDPOINTS:
+            self._send_json(405, {"error": "use POST"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY:
+            self.close_connection = True
+            self._send_json(413, {"error": "request body too large"})
+            return
+        raw = self.rfile.read(length)
+        endpoint = ENDPOINTS.get(self.path)
+        if endpoint is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        status, body = self.server.dispatch(endpoint, raw)
+        self._send_json(status, body)
+
+
+class RecipeServer(HTTPServer):
+    """HTTP server answering requests on a bounded worker pool against the warm catalog."""
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+        workers: int = 8,
+        max_pending: int = 64,
+        allow_ai: bool = True,
+        default_max: int = 5,
+        verbose: bool = False,
+    ):
+        super().__init__(address, RecipeRequestHandler)
+        self.allow_ai = allow_ai
+        self.default_max = default_max
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="recipe-http")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="recipe-ingest")
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(_OVERLOADED)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        future = self._pool.submit(self._process, request, client_address)
+        future.add_done_callback(lambda f: f.cancelled() and self._drop(request))
+
+    def _drop(self, request):
+        """Close a queued connection whose worker task was cancelled by server_close."""
+        self.shutdown_request(request)
+        self._slots.release()
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def dispatch(self, endpoint, raw: bytes) -> Tuple[int, Dict[str, Any]]:
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            return 400, {"error": "invalid JSON body"}
+        if not isinstance(body, dict):
+            return 400, {"error": "request body must be a JSON object"}
+        try:
+            return 200, endpoint(self, body)
+        except BadRequest as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            print(f"[Debug] {endpoint.__name__} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            return 500, {"error": "internal error"}
+
+    def ingest(self, recipes):
+        """Queue generated recipes for the writer thread."""
+        self._writer.submit(ingest_recipes, recipes)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "recipes": len(recipe_helper.CATALOG.recipes),
+            "ai": self.allow_ai and get_client() is not None,
+            "llm_breaker": LLM_BREAKER.state,
+        }
+
+    def server_close(self):
+        super().server_close()
+        # Queued connections are closed by _drop rather than left open
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        # Finish queued ingests so no generated recipe is lost
+        self._writer.shutdown(wait=True)
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 8,
+    allow_ai: bool = True,
+    default_max: int = 5,
+    verbose: bool = False,
+):
+    """Warm the catalog, then serve until interrupted."""
+    recipe_helper.CATALOG.warm()
+    server = RecipeServer((host, port), workers=workers, allow_ai=allow_ai, default_max=default_max, verbose=verbose)
+    print(f"Serving recipes on http://{host}:{server.server_address[1]} "
+          f"({len(recipe_helper.CATALOG.recipes)} recipes, {workers} workers)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
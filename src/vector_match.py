@@ -0,0 +1,360 @@
+"""
+src/vector_match.py
+===================
+Vectorized recipe scoring with NumPy (and SciPy sparse matrices for batches).
+
+The catalog is viewed as a sparse recipe x ingredient incidence matrix A in
+CSC layout: column t holds the ids of recipes using ingredient term t, which
+is exactly the postings list of the ingredient index (for a snapshot, the
+mapped postings are used directly without copying). A pantry becomes a 0/1
+vector x over ingredient terms after expanding each token through the
+substring containment relation (`u == t or u in t or t in u`), so A @ x is
+the per-recipe match count used by match_recipes. Diet filtering is a
+boolean mask over recipes.
+
+NumPy is optional: when it is not installed, `available()` is False and
+recipe_helper falls back to its pure-Python postings scorer. SciPy is only
+used by `score_many` to score batches of pantries as sparse matrix products.
+Both are imported on the first `available()` call rather than with this
+module, so importing recipe_helper (e.g. for `--show-key`) stays cheap.
+"""
+import bisect
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+np = None
+sparse = None
+_imported = False
+
+
+def _import() -> None:
+    global np, sparse, _imported
+    if _imported:
+        return
+    try:
+        import numpy
+        np = numpy
+    except Exception:
+        pass
+    try:
+        from scipy import sparse as scipy_sparse
+        sparse = scipy_sparse
+    except Exception:
+        pass
+    _imported = True
+
+
+def available() -> bool:
+    """Return True if NumPy is installed and vectorized scoring can be used."""
+    _import()
+    return np is not None
+
+
+def has_sparse() -> bool:
+    """Return True if SciPy sparse matrices are available (batch scoring, `matrix`)."""
+    _import()
+    return sparse is not None
+
+
+class VectorScorer:
+    """Sparse incidence-matrix scorer over a catalog's ingredient and diet indexes.
+
+    Recipes appended after construction (`add_recipe`) are kept in a small
+    delta: per-term id lists plus a title-sorted tail. `score`, `score_many`
+    and `rank` merge it with the CSC arrays, and it is folded into them in
+    one pass once it holds `max(FOLD_MIN, n_base / 32)` recipes, so a write
+    costs O(terms + delta) instead of O(nnz + n_recipes).
+
+    Args:
+        index: recipe_helper ingredient index (terms, postings, related_terms)
+        diets: recipe_helper diet index (ids, bitmaps)
+        titles: Recipe titles by recipe id, used for tie-break ordering
+    """
+
+    FOLD_MIN = 256
+
+    def __init__(self, index, diets, titles):
+        _import()
+        self.index = index
+        self.diets = diets
+        self.titles = titles
+        self.n_recipes = len(titles)
+        self.n_terms = len(index.terms)
+
+        postings = index.postings
+        if hasattr(postings, "offsets") and hasattr(postings, "ids"):
+            # Snapshot postings: view the mapped CSC arrays without copying
+            self.indptr = np.frombuffer(postings.offsets, dtype=np.uint64).astype(np.int64, copy=False)
+            self.indices = np.frombuffer(postings.ids, dtype=np.uintc)
+        else:
+            lengths = np.fromiter((len(p) for p in postings), dtype=np.int64, count=len(postings))
+            self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=self.indptr[1:])
+            self.indices = np.fromiter(
+                (rid for p in postings for rid in p), dtype=np.uintc, count=int(self.indptr[-1])
+            )
+        # Recipes [0, n_base) live in the CSC arrays, the rest in the delta
+        self.n_base = self.n_recipes
+
+        self._delta: Dict[int, List[int]] = {}
+        # (title, recipe id, base position) per delta recipe, sorted by title
+        # and id; the base position is the number of base recipes sorting first
+        self._tail: List[Tuple[str, int, int]] = []
+        self._tail_ranks = None
+        self._title_rank = None
+        self._title_order = None
+        self._diet_masks: Dict[str, Any] = {}
+        self._matrix = None
+
+    @property
+    def title_rank(self):
+        """Position of each base recipe when sorted by (title, recipe id)."""
+        if self._title_rank is None:
+            order = sorted(range(self.n_base), key=lambda rid: (self.titles[rid], rid))
+            self._title_order = np.asarray(order, dtype=np.int64)
+            rank = np.empty(self.n_base, dtype=np.int64)
+            rank[self._title_order] = np.arange(self.n_base, dtype=np.int64)
+            self._title_rank = rank
+        return self._title_rank
+
+    @property
+    def matrix(self):
+        """The transposed incidence matrix A.T (ingredient x recipe) of the base recipes as SciPy CSR.
+
+        Its rows are exactly the postings lists, so no data is rearranged.
+        """
+        if self._matrix is None:
+            data = np.ones(len(self.indices), dtype=np.int32)
+            self._matrix = sparse.csr_matrix(
+                (data, self.indices, self.indptr), shape=(len(self.indptr) - 1, self.n_base)
+            )
+        return self._matrix
+
+    def add_recipe(self, rid: int, term_ids: List[int]) -> None:
+        """Add recipe `rid` (the next recipe id) with the given terms to the delta.
+
+        Terms added to the index since the scorer was built simply get a
+        delta list. The new title's place among the base titles is found by
+        binary search once, so ranking never re-sorts the catalog.
+        """
+        self.n_terms = max(self.n_terms, len(self.index.terms))
+        for t in term_ids:
+            self._delta.setdefault(t, []).append(rid)
+
+        title = self.titles[rid]
+        self.title_rank
+        order = self._title_order
+        # The new id is the largest, so it sorts after every equal base title
+        lo, hi = 0, self.n_base
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.titles[int(order[mid])] <= title:
+                lo = mid + 1
+            else:
+                hi = mid
+        bisect.insort(self._tail, (title, rid, lo))
+        self._tail_ranks = None
+        self.n_recipes += 1
+        if len(self._tail) >= max(self.FOLD_MIN, self.n_base >> 5):
+            self._fold()
+
+    def _merged_ranks(self):
+        """(base positions, {delta recipe id: title rank}) over base and delta recipes."""
+        if self._tail_ranks is None:
+            positions = np.fromiter((pos for _, _, pos in self._tail), dtype=np.int64, count=len(self._tail))
+            ranks = {rid: pos + i for i, (_, rid, pos) in enumerate(self._tail)}
+            self._tail_ranks = (positions, ranks)
+        return self._tail_ranks
+
+    def _title_ranks(self, ids):
+        """Title rank among all recipes (base and delta) of each recipe id."""
+        base = self.title_rank
+        if not self._tail:
+            return base[ids]
+        positions, ranks = self._merged_ranks()
+        out = np.empty(len(ids), dtype=np.int64)
+        in_base = ids < self.n_base
+        r = base[ids[in_base]]
+        # Each delta recipe placed at or before a base rank pushes it down one
+        out[in_base] = r + np.searchsorted(positions, r, side="right")
+        out[~in_base] = [ranks[rid] for rid in ids[~in_base].tolist()]
+        return out
+
+    def _fold(self) -> None:
+        """Merge the delta into the CSC arrays and the title ranks, then clear it."""
+        n_cols = len(self.indptr) - 1
+        if self.n_terms > n_cols:
+            self.indptr = np.concatenate([self.indptr, np.full(self.n_terms - n_cols, self.indptr[-1])])
+        cols = sorted(self._delta)
+        ends = np.asarray(cols, dtype=np.int64) + 1
+        rows = np.fromiter((rid for t in cols for rid in self._delta[t]), dtype=np.uintc)
+        counts = np.zeros(self.n_terms + 1, dtype=np.int64)
+        counts[ends] = [len(self._delta[t]) for t in cols]
+        # Each column's new ids are larger than its old ones, so they go at its end
+        at = np.repeat(self.indptr[ends], counts[ends])
+        self.indices = np.insert(self.indices, at, rows).astype(np.uintc, copy=False)
+        self.indptr = self.indptr + np.cumsum(counts)
+
+        if self._title_rank is not None:
+            rank = np.empty(self.n_recipes, dtype=np.int64)
+            ids = np.arange(self.n_recipes, dtype=np.int64)
+            rank[:] = self._title_ranks(ids)
+            order = np.empty(self.n_recipes, dtype=np.int64)
+            order[rank] = ids
+            self._title_rank, self._title_order = rank, order
+        self.n_base = self.n_recipes
+        self._delta = {}
+        self._tail = []
+        self._tail_ranks = None
+        self._diet_masks.clear()
+        self._matrix = None
+
+    def _base_mask(self, diet: str):
+        """Boolean mask over the base recipes of those tagged with the normalized diet name."""
+        mask = self._diet_masks.get(diet)
+        if mask is None:
+            did = self.diets.ids.get(diet)
+            mask = np.zeros(self.n_base, dtype=bool)
+            if did is not None:
+                bits = np.unpackbits(np.frombuffer(self.diets.bitmaps[did], dtype=np.uint8), bitorder="little")
+                n = min(len(bits), self.n_base)
+                mask[:n] = bits[:n]
+            self._diet_masks[diet] = mask
+        return mask
+
+    def _delta_in_diet(self, diet: str, ids):
+        """Diet membership of delta recipe ids, read from the diet bitmap directly."""
+        did = self.diets.ids.get(diet)
+        if did is None:
+            return np.zeros(len(ids), dtype=bool)
+        bits = np.frombuffer(self.diets.bitmaps[did], dtype=np.uint8)
+        return ((bits[ids >> 3] >> (ids & 7)) & 1) == 1
+
+    def diet_mask(self, diet: str):
+        """Boolean mask of recipes tagged with the normalized diet name."""
+        mask = self._base_mask(diet)
+        if self.n_recipes > self.n_base:
+            tail = np.arange(self.n_base, self.n_recipes, dtype=np.int64)
+            mask = np.concatenate([mask, self._delta_in_diet(diet, tail)])
+        return mask
+
+    def in_diet(self, diet: str, ids):
+        """Boolean array: which of the recipe ids are tagged with the normalized diet name."""
+        mask = self._base_mask(diet)
+        if self.n_recipes == self.n_base:
+            return mask[ids]
+        keep = np.empty(len(ids), dtype=bool)
+        in_base = ids < self.n_base
+        keep[in_base] = mask[ids[in_base]]
+        keep[~in_base] = self._delta_in_diet(diet, ids[~in_base])
+        return keep
+
+    def expand(self, tokens: Iterable[str]):
+        """Expand normalized pantry tokens to the sorted ids of related ingredient terms."""
+        terms = set()
+        for token in tokens:
+            terms.update(self.index.related_terms(token))
+        return np.fromiter(sorted(terms), dtype=np.int64, count=len(terms))
+
+    def _delta_rows(self, terms) -> List[Any]:
+        return [np.asarray(self._delta[t], dtype=np.uintc) for t in terms.tolist() if t in self._delta]
+
+    def score(self, tokens: Iterable[str], diet: Optional[str] = None):
+        """Sparse A @ x for one pantry.
+
+        Only the columns selected by the pantry vector are gathered, so the
+        cost follows the postings touched rather than the catalog size. With
+        a diet, rows outside the diet's partition are dropped before counting.
+
+        Returns:
+            (recipe_ids, counts) arrays for recipes with at least one match
+        """
+        terms = self.expand(tokens)
+        if len(terms) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        n_cols = len(self.indptr) - 1
+        parts = [self.indices[self.indptr[t]:self.indptr[t + 1]] for t in terms[terms < n_cols]]
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uintc)
+        if diet:
+            rows = rows[self._base_mask(diet)[rows]]
+        delta = self._delta_rows(terms) if self._delta else []
+        if delta:
+            extra = np.concatenate(delta)
+            if diet:
+                extra = extra[self._delta_in_diet(diet, extra)]
+            rows = np.concatenate([rows, extra])
+        ids, counts = np.unique(rows, return_counts=True)
+        return ids.astype(np.int64), counts.astype(np.int64)
+
+    def score_many(self, token_sets: List[Iterable[str]], chunk_size: int = 256) -> List[Tuple[Any, Any]]:
+        """Score many pantries with sparse matrix products (X @ A.T per chunk).
+
+        X holds one pantry vector per row, so row j of the product is pantry
+        j's scores. Chunks bound the size of the intermediate result. Delta
+        recipes are counted per pantry and appended. Recipe ids in each
+        result are not sorted (rank() does not need them to be). Falls back
+        to one `score` call per pantry when SciPy is unavailable.
+        """
+        if sparse is None:
+            return [self.score(tokens) for tokens in token_sets]
+
+        n_cols = len(self.indptr) - 1
+        results = []
+        for start in range(0, len(token_sets), chunk_size):
+            expanded = [self.expand(tokens) for tokens in token_sets[start:start + chunk_size]]
+            base = [e[e < n_cols] for e in expanded]
+            indptr = np.zeros(len(base) + 1, dtype=np.int64)
+            np.cumsum([len(e) for e in base], out=indptr[1:])
+            indices = np.concatenate(base) if indptr[-1] else np.zeros(0, dtype=np.int64)
+            pantries = sparse.csr_matrix(
+                (np.ones(len(indices), dtype=np.int32), indices, indptr),
+                shape=(len(base), n_cols),
+            )
+            scores = pantries @ self.matrix
+            for j, terms in enumerate(expanded):
+                row = slice(scores.indptr[j], scores.indptr[j + 1])
+                ids, counts = scores.indices[row].astype(np.int64), scores.data[row].astype(np.int64)
+                delta = self._delta_rows(terms) if self._delta else []
+                if delta:
+                    # Delta ids are all >= n_base, so they never collide with base ids
+                    extra, extra_counts = np.unique(np.concatenate(delta), return_counts=True)
+                    ids = np.concatenate([ids, extra.astype(np.int64)])
+                    counts = np.concatenate([counts, extra_counts.astype(np.int64)])
+                results.append((ids, counts))
+        return results
+
+    def rank(
+        self, ids, counts, min_match: int, diet: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """Apply min_match and the diet, then order by (-count, title, recipe id).
+
+        With `limit`, the top `limit` recipes are picked with a partial sort
+        (argpartition) before ordering, so only k results are fully sorted.
+
+        Returns:
+            List of (recipe_id, match_count) tuples
+        """
+        if min_match <= 0:
+            # Recipes with zero overlap also qualify: score the whole diet
+            # partition (or the whole catalog without a diet)
+            full = np.zeros(self.n_recipes, dtype=np.int64)
+            full[ids] = counts
+            if diet:
+                ids = np.flatnonzero(self.diet_mask(diet))
+            else:
+                ids = np.arange(self.n_recipes, dtype=np.int64)
+            counts = full[ids]
+        elif diet:
+            keep = self.in_diet(diet, ids)
+            ids, counts = ids[keep], counts[keep]
+
+        keep = counts >= min_match
+        ids, counts = ids[keep], counts[keep]
+
+        # Title ranks are unique per recipe, so one integer key encodes the order
+        key = self._title_ranks(ids) - counts * max(self.n_recipes, 1)
+        if limit is not None and limit < len(key):
+            top = np.argpartition(key, limit - 1)[:limit]
+            order = top[np.argsort(key[top])]
+        else:
+            order = np.argsort(key)
+        return list(zip(ids[order].tolist(), counts[order].tolist()))
@@ -1,5 +1,8 @@
+import os
 import unittest
 
+from src import batch, llm_cache, openai_helper, planner, rate_limiter, recipe_cards, recipe_helper, retry_policy, saved_store, server, vector_match
+
 
 def safe_default(ingredients):
     if len(ingredients) < 3:
@@ -26,5 +29,1148 @@ class TestValidateIngredients(unittest.TestCase):
         self.assertEqual(result, ["apple", "milk", "bread"])
 
 
+def brute_force_match(ingredients, min_match=2, diet=None):
+    # reference implementation: compare every pantry item with every recipe ingredient
+    norm = recipe_helper.normalize
+    ing_set = set(norm(i) for i in ingredients)
+    matches = []
+    for r in recipe_helper.RECIPES:
+        if diet and norm(diet) not in [norm(d) for d in r.get("diets", [])]:
+            continue
+        recipe_ings = [norm(i) for i in r.get("ingredients", [])]
+        matched = set(ri for u in ing_set for ri in recipe_ings if u == ri or u in ri or ri in u)
+        if len(matched) >= min_match:
+            matches.append((r, len(matched)))
+    matches.sort(key=lambda x: (-x[1], x[0]["title"]))
+    return matches
+
+
+class TestMatchRecipes(unittest.TestCase):
+
+    PANTRIES = [
+        ["chicken", "rice", "broccoli"],
+        ["tofu", "soba", "garlic", "oil"],
+        ["salt", "oil", "garlic", "onion", "pepper"],
+        ["Chicken Breast ", "SOY SAUCE"],
+    ]
+
+    def test_index_matches_brute_force(self):
+        for pantry in self.PANTRIES:
+            for diet in (None, "vegan", "halal"):
+                for min_match in (1, 2, 3):
+                    expected = brute_force_match(pantry, min_match=min_match, diet=diet)
+                    result = recipe_helper.match_recipes(pantry, min_match=min_match, diet=diet)
+                    self.assertEqual(result, expected)
+
+    def test_limit_keeps_top_k_in_order(self):
+        pantry = ["salt", "oil", "garlic", "onion"]
+        full = recipe_helper.match_recipes(pantry, min_match=1)
+        for limit in (0, 1, 5, len(full) + 3):
+            self.assertEqual(recipe_helper.match_recipes(pantry, min_match=1, limit=limit), full[:limit])
+            self.assertEqual(list(recipe_helper.iter_matches(pantry, min_match=1, limit=limit)), full[:limit])
+
+    def test_match_recipes_many_keeps_input_order(self):
+        pantries = self.PANTRIES * 3
+        expected = [recipe_helper.match_recipes(p, diet="vegan", limit=4) for p in pantries]
+        self.assertEqual(recipe_helper.match_recipes_many(pantries, diet="vegan", workers=1, limit=4), expected)
+        self.assertEqual(recipe_helper.match_recipes_many(pantries, diet="vegan", workers=2, limit=4), expected)
+
+
+@unittest.skipUnless(vector_match.available(), "NumPy not installed")
+class TestVectorScorer(unittest.TestCase):
+
+    def test_vectorized_ranking_matches_python_path(self):
+        python_catalog = recipe_helper.RecipeCatalog(vectorize=False)
+        vector_catalog = recipe_helper.RecipeCatalog()
+        scorer = vector_catalog.scorer
+        pantries = [set(p) for p in TestMatchRecipes.PANTRIES]
+        batch = scorer.score_many(pantries)
+        for pantry, (ids, counts) in zip(pantries, batch):
+            for diet in (None, "vegan"):
+                for min_match in (0, 1, 2):
+                    expected = recipe_helper._rank_matches(python_catalog, pantry, min_match, diet)
+                    self.assertEqual(recipe_helper._rank_matches(vector_catalog, pantry, min_match, diet), expected)
+                    self.assertEqual(scorer.rank(ids, counts, min_match, diet), expected)
+                    self.assertEqual(
+                        recipe_helper._rank_matches(python_catalog, pantry, min_match, diet, limit=3), expected[:3]
+                    )
+                    self.assertEqual(scorer.rank(ids, counts, min_match, diet, limit=3), expected[:3])
+
+    def test_appended_recipes_rank_like_python_path_across_folds(self):
+        python_catalog = recipe_helper.RecipeCatalog(vectorize=False)
+        vector_catalog = recipe_helper.RecipeCatalog()
+        scorer = vector_catalog.scorer
+        scorer.FOLD_MIN = 7
+        titles = [r["title"] for r in python_catalog.recipes[:5]] + ["Aardvark Stew", "Zucchini Bake", "Rice Bowl"]
+        extra = [{"title": titles[i % len(titles)],
+                  "ingredients": ["rice", "garlic", f"new spice {i % 4}"][:1 + i % 3],
+                  "diets": ["vegan"] if i % 2 else []} for i in range(40)]
+        pantries = [set(p) for p in TestMatchRecipes.PANTRIES] + [{"rice", "new spice 1"}]
+        for i in range(0, len(extra), 5):
+            for catalog in (python_catalog, vector_catalog):
+                catalog.add_recipes(extra[i:i + 5], persist=False)
+            for pantry, (ids, counts) in zip(pantries, scorer.score_many(pantries)):
+                for diet in (None, "vegan"):
+                    for min_match in (0, 1, 2):
+                        expected = recipe_helper._rank_matches(python_catalog, pantry, min_match, diet)
+                        self.assertEqual(recipe_helper._rank_matches(vector_catalog, pantry, min_match, diet), expected)
+                        self.assertEqual(scorer.rank(ids, counts, min_match, diet, limit=4), expected[:4])
+        self.assertLess(len(scorer._tail), 7)
+
+
+class TestTitleLookup(unittest.TestCase):
+
+    def test_first_title_hit_matches_linear_scan(self):
+        for query in ["stir", "CHICKEN", "bowl", "a", "", "ri", "no such recipe", "3", "9999"]:
+            q = recipe_helper.normalize(query)
+            expected = {}
+            if q.isdigit() and 0 < int(q) <= len(recipe_helper.RECIPES):
+                expected = recipe_helper.RECIPES[int(q) - 1]
+            else:
+                expected = next((r for r in recipe_helper.RECIPES if q in r["title"].lower()), {})
+            self.assertEqual(recipe_helper.find_recipe_by_title_or_index(query), expected)
+
+    def test_all_hits_are_ranked(self):
+        hits = recipe_helper.find_recipe_by_title_or_index("chicken", all_hits=True)
+        expected = [r for r in recipe_helper.RECIPES if "chicken" in r["title"].lower()]
+        self.assertCountEqual([id(r) for r in hits], [id(r) for r in expected])
+        self.assertTrue(hits[0]["title"].lower().startswith("chicken"))
+        for r in recipe_helper.search_recipes_by_title("chicken", prefix=True):
+            self.assertTrue(r["title"].lower().startswith("chicken"))
+
+
+class TestIngredientLookup(unittest.TestCase):
+
+    def test_related_terms_match_substring_rule(self):
+        terms = recipe_helper.CATALOG.index.terms
+        for token in ["soba", "oil", "s", "", "chicken breast", "unknownthing"]:
+            expected = {i for i, t in enumerate(terms) if token == t or token in t or t in token}
+            self.assertEqual(recipe_helper.CATALOG.index.related_terms(token), expected)
+
+    def test_validate_ingredients(self):
+        valid, invalid = recipe_helper.validate_ingredients(["soba", "Chicken", "xyzzy"])
+        self.assertEqual(valid, ["soba", "Chicken"])
+        self.assertEqual(invalid, ["xyzzy"])
+
+
+class TestRecipeCatalog(unittest.TestCase):
+
+    def test_catalog_loads_lazily_from_given_path(self):
+        import json
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recipes.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"title": "Toast", "ingredients": ["bread", "butter"], "diets": []}], f)
+            catalog = recipe_helper.RecipeCatalog(path)
+            self.assertFalse(catalog.loaded)
+            self.assertEqual(catalog.valid_ingredients, {"bread", "butter"})
+            self.assertTrue(catalog.loaded)
+
+    def test_snapshot_is_reused_and_rebuilt_when_json_changes(self):
+        import json
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recipes.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"title": "Toast", "ingredients": ["bread", "butter"], "diets": ["Vegetarian"]}], f)
+            recipe_helper.RecipeCatalog(path).recipes
+            self.assertTrue(os.path.exists(os.path.join(tmp, "recipes.rcat")))
+
+            mapped = recipe_helper.RecipeCatalog(path)
+            self.assertEqual(len(mapped.recipes), 1)
+            self.assertIsNotNone(mapped._snapshot)
+            self.assertEqual(mapped.recipes[0]["title"], "Toast")
+            self.assertTrue(mapped.diets.has("vegetarian", 0))
+            self.assertEqual(list(mapped.diets.members("vegetarian")), [0])
+            self.assertEqual(mapped.diets.labels, ["Vegetarian"])
+            self.assertEqual(mapped.index.score(["bread"]), {0: 1})
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"title": "Rice Bowl", "ingredients": ["rice", "egg"], "diets": []}], f)
+            os.utime(path, ns=(1, 1))
+            rebuilt = recipe_helper.RecipeCatalog(path)
+            self.assertEqual(rebuilt.titles[0], "Rice Bowl")
+            self.assertEqual(recipe_helper.RecipeCatalog(path).recipes[0]["ingredients"], ["rice", "egg"])
+
+
+class TestCatalogWriteBack(unittest.TestCase):
+
+    NEW = [
+        {"title": "Miso Glazed Eggplant", "ingredients": ["eggplant", "miso paste", "rice"], "diets": ["Vegan", "paleo-ish"]},
+        {"title": "Aaa First Title", "ingredients": ["chicken", "rice", "yuzu"], "diets": ["halal"]},
+        {"title": "Chicken Rice Plate", "ingredients": ["chicken", "rice"], "diets": []},
+    ]
+
+    def setUp(self):
+        import json
+        import os
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "recipes.json")
+        with open(recipe_helper.RECIPES_PATH, encoding="utf-8") as f:
+            self.base = json.load(f)[:40]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.base, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_results(self, catalog, reference):
+        for pantry in (["chicken", "rice"], ["miso", "eggplant", "garlic"], ["yuzu", "salt", "oil"]):
+            for diet in (None, "vegan", "halal", "paleo-ish", "kosher"):
+                for min_match in (0, 1, 2):
+                    self.assertEqual(
+                        recipe_helper._rank_matches(catalog, set(pantry), min_match, diet),
+                        recipe_helper._rank_matches(reference, set(pantry), min_match, diet),
+                    )
+        self.assertEqual(catalog.title_index.search("rice"), reference.title_index.search("rice"))
+        self.assertEqual(list(catalog.diets.labels), list(reference.diets.labels))
+
+    def test_added_recipes_update_built_indexes_and_persist(self):
+        import json
+        import os
+        live = recipe_helper.RecipeCatalog(self.path).warm()
+        live.title_index
+        self.assertEqual(live.add_recipes(self.NEW), [40, 41, 42])
+
+        full_path = os.path.join(self.tmp.name, "full.json")
+        with open(full_path, "w", encoding="utf-8") as f:
+            json.dump(self.base + self.NEW, f)
+        reference = recipe_helper.RecipeCatalog(full_path, use_snapshot=False, vectorize=False)
+        self.assert_same_results(live, reference)
+        # A new process loads the snapshot plus the overlay file
+        self.assert_same_results(recipe_helper.RecipeCatalog(self.path), reference)
+        self.assert_same_results(recipe_helper.RecipeCatalog(self.path, use_snapshot=False, vectorize=False), reference)
+
+    def test_matching_while_recipes_are_added_from_another_thread(self):
+        import sys
+        import threading
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads often so reads overlap the writes
+        self.addCleanup(sys.setswitchinterval, interval)
+        for vectorize in (True, False):
+            catalog = recipe_helper.RecipeCatalog(self.path, vectorize=vectorize).warm()
+            errors, stop = [], threading.Event()
+
+            def match():
+                while not stop.is_set():
+                    try:
+                        for diet in ("vegan", "halal", None):
+                            for min_match in (0, 1, 2):
+                                recipe_helper._rank_matches(catalog, {"rice", "garlic"}, min_match, diet, limit=5)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+
+            readers = [threading.Thread(target=match) for _ in range(4)]
+            for t in readers:
+                t.start()
+            for i in range(300):
+                diets = ["vegan"] if i % 2 else ["halal"]
+                catalog.add_recipes([{"title": f"Bowl {i}", "ingredients": ["rice", f"spice {i}"], "diets": diets}], persist=False)
+            stop.set()
+            for t in readers:
+                t.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(len(catalog.recipes), 340)
+            if catalog.scorer is not None:
+                self.assertEqual(len(catalog.scorer.diet_mask("vegan")), 340)
+            ranked = recipe_helper._rank_matches(catalog, {"rice"}, 1, "vegan")
+            self.assertTrue(all(catalog.diets.has("vegan", rid) for rid, _ in ranked))
+
+    def test_match_pool_is_reused_and_ranks_recipes_added_after_it_started(self):
+        recipe_helper.CATALOG.use(self.path)
+        self.addCleanup(recipe_helper.CATALOG.use, recipe_helper.RECIPES_PATH)
+        pantries = [["chicken", "rice"], ["miso", "eggplant", "garlic"], ["yuzu", "rice"]] * 2
+        with recipe_helper.MatchPool(2) as pool:
+            self.assertEqual(recipe_helper.match_recipes_many(pantries, pool=pool, limit=4),
+                             recipe_helper.match_recipes_many(pantries, workers=1, limit=4))
+            recipe_helper.CATALOG.add_recipes(self.NEW, persist=False)
+            for diet in ("vegan", "halal", None):
+                pooled = recipe_helper.match_recipes_many(pantries, diet=diet, min_match=1, pool=pool, limit=4)
+                self.assertEqual(pooled, recipe_helper.match_recipes_many(pantries, diet=diet, min_match=1, workers=1, limit=4))
+        self.assertIn("Chicken Rice Plate", [r["title"] for r, _ in pooled[0]])
+
+    def test_first_load_with_an_overlay_from_many_threads(self):
+        import sys
+        import threading
+        extra = [{"title": f"Overlay {i}", "ingredients": ["rice", f"herb {i}"], "diets": ["vegan"]} for i in range(300)]
+        recipe_helper.RecipeCatalog(self.path).add_recipes(extra)
+        expected = recipe_helper._rank_matches(
+            recipe_helper.RecipeCatalog(self.path, use_snapshot=False, vectorize=False), {"rice"}, 1, "vegan"
+        )
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads often so readers overlap the load
+        self.addCleanup(sys.setswitchinterval, interval)
+        for use_snapshot in (True, False):
+            for _ in range(5):
+                catalog = recipe_helper.RecipeCatalog(self.path, use_snapshot=use_snapshot, vectorize=False)
+                seen = []
+
+                def first_use():
+                    seen.append((len(catalog.recipes), len(catalog.titles),
+                                 recipe_helper._rank_matches(catalog, {"rice"}, 1, "vegan")))
+
+                readers = [threading.Thread(target=first_use) for _ in range(6)]
+                for t in readers:
+                    t.start()
+                for t in readers:
+                    t.join()
+                self.assertEqual(len(seen), 6)
+                for n_recipes, n_titles, ranked in seen:
+                    self.assertEqual((n_recipes, n_titles), (340, 340))
+                    self.assertEqual(ranked, expected)
+
+    def test_overlay_skips_torn_lines(self):
+        catalog = recipe_helper.RecipeCatalog(self.path)
+        catalog.add_recipes(self.NEW[:1])
+        with open(catalog.overlay_file, "a", encoding="utf-8") as f:
+            f.write('{"title": "Half wri')
+        catalog.add_recipes(self.NEW[1:2])
+        titles = recipe_helper.RecipeCatalog(self.path).titles[40:]
+        self.assertEqual(list(titles), ["Miso Glazed Eggplant", "Aaa First Title"])
+
+    def test_ingest_enriches_and_skips_duplicates(self):
+        from src import recipe_ingest
+        catalog = recipe_helper.RecipeCatalog(self.path)
+        generated = [
+            {"title": "Shrimp Pasta", "ingredients": ["Shrimp", "pasta", "garlic"], "allergens": ["Shellfish"]},
+            {"title": "shrimp pasta ", "ingredients": ["shrimp", "linguine"]},
+            {"title": self.base[1]["title"].upper(), "ingredients": ["something else"]},
+            dict(self.base[0], title="Renamed but same ingredients"),
+            {"title": "No ingredients", "ingredients": []},
+        ]
+        added = recipe_ingest.ingest_generated(generated, catalog)
+        self.assertEqual([r["title"] for r in added], ["Shrimp Pasta"])
+        self.assertEqual(added[0]["allergens"], ["shellfish", "wheat_gluten"])
+        labels = recipe_ingest.prepare_recipe(
+            {"title": "Cake", "ingredients": ["sugar"], "allergens": ["Dairy", "gluten", "Tree Nuts", "EGG", "wheat", "spicy"]}
+        )["allergens"]
+        self.assertEqual(labels, ["egg", "milk", "tree_nuts", "wheat_gluten"])
+        self.assertIn("calories", added[0]["nutrition"])
+        self.assertEqual(catalog.find_duplicate({"title": "x", "ingredients": ["pasta", "SHRIMP", "garlic"]}), 40)
+        # Already ingested: a fresh process finds them in the overlay
+        self.assertEqual(recipe_ingest.ingest_generated(generated, recipe_helper.RecipeCatalog(self.path)), [])
+
+
+class TestSavedStore(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "saved.jsonl")
+        self.legacy = os.path.join(self.tmp.name, "saved.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_legacy_file_is_migrated_and_saves_are_indexed(self):
+        import json
+        legacy = [{"title": "Pancakes", "saved_at": "2025-01-02T00:00:00"},
+                  {"title": "Tofu Stir-Fry", "saved_at": "2025-01-01T00:00:00"}]
+        with open(self.legacy, "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+        store = saved_store.SavedStore(self.path, self.legacy)
+        self.assertEqual(store.entries(), legacy)
+        other = saved_store.SavedStore(self.path, self.legacy)
+        other.save({"title": "pancakes", "allergens": ["egg"]}, saved_at="2025-01-03T00:00:00")
+        # Appends by another instance (or process) are picked up incrementally
+        self.assertEqual(len(store), 3)
+        self.assertEqual([e["saved_at"] for e in store.find_title("PANCAKES")], ["2025-01-02T00:00:00", "2025-01-03T00:00:00"])
+        self.assertEqual([e["title"] for e in store.between("2025-01-01T12:00:00", "2025-01-03")], ["Pancakes"])
+        self.assertEqual([e["title"] for e in store.latest(2)], ["pancakes", "Pancakes"])
+        with open(self.legacy, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), legacy)
+
+    def test_saves_only_append_and_the_index_is_built_on_first_read(self):
+        store = saved_store.SavedStore(self.path, None)
+        for day in (3, 1, 2):
+            store.save({"title": f"Day {day}"}, saved_at=f"2025-01-0{day}T00:00:00")
+        self.assertEqual(store._offset, 0)  # nothing read yet
+        self.assertEqual([e["title"] for e in store.latest(3)], ["Day 3", "Day 2", "Day 1"])
+        store.save({"title": "Day 0"}, saved_at="2024-12-31T00:00:00")
+        self.assertEqual([e["title"] for e in store.between(end="2025-01-02")], ["Day 0", "Day 1"])
+
+    def test_torn_lines_are_skipped_and_compaction_removes_them(self):
+        store = saved_store.SavedStore(self.path, None)
+        store.save({"title": "Soup"}, saved_at="2025-01-01")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"title": "Cut sh')
+        store.save({"title": "Soup"}, saved_at="2025-01-02")
+        store.save({"title": "Salad"}, saved_at="2025-01-03")
+        fresh = saved_store.SavedStore(self.path, None)
+        self.assertEqual([e["title"] for e in fresh.entries()], ["Soup", "Soup", "Salad"])
+        self.assertEqual(fresh.corrupt_lines, 1)
+        self.assertEqual(fresh.compact(dedupe=True), {"kept": 2, "corrupt": 1, "duplicates": 1})
+        self.assertEqual([e["saved_at"] for e in store.entries()], ["2025-01-02", "2025-01-03"])
+
+    def test_concurrent_saves_are_not_lost(self):
+        import threading
+
+        def save_many(n):
+            store = saved_store.SavedStore(self.path, None)
+            for i in range(25):
+                store.save({"title": f"Recipe {n}-{i}"})
+
+        threads = [threading.Thread(target=save_many, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(saved_store.SavedStore(self.path, None)), 100)
+
+
+class TestRecipeCards(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_card_text_matches_the_saved_card_format(self):
+        recipe = {"title": "Egg Fried Rice", "ingredients": ["rice", "egg"], "allergens": ["egg"],
+                  "steps": ["Fry.", "Serve."], "time": "15 minutes",
+                  "nutrition": {"calories": 400, "protein_g": 12, "carbs_g": 60, "fat_g": 10}}
+        self.assertEqual(recipe_cards.render_card(recipe), (
+            "Egg Fried Rice\nIngredients:\n - rice\n - egg\n\nAllergens:\n - egg\n\nSteps:\n - Fry.\n - Serve.\n"
+            "\nTime: 15 minutes\n\nNutrition (rough estimate):\n - Calories: 400\n - Protein: 12g\n"
+            " - Carbs: 60g\n - Fat: 10g\n\n(Nutrition estimates are best-effort and should NOT be used for medical/diet purposes.)\n"
+        ))
+        self.assertIn(" - (none detected)", recipe_cards.render_card({"title": "Plain"}))
+
+    def test_unchanged_cards_are_skipped_and_changed_ones_rewritten(self):
+        recipes = [{"title": "Soup", "ingredients": ["stock"]}, {"title": "Salad!", "ingredients": ["lettuce"]},
+                   {"title": "Salad?", "ingredients": ["kale"]}]
+        self.assertEqual(recipe_cards.export_cards(recipes, self.dir, workers=2),
+                         {"written": 2, "unchanged": 0, "duplicates": 1})
+        self.assertEqual(recipe_cards.export_cards(recipes, self.dir)["unchanged"], 2)
+        path = os.path.join(self.dir, "Soup.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("edited by hand")
+        recipes[1]["ingredients"].append("tomato")
+        self.assertEqual(recipe_cards.export_cards(recipes, self.dir)["written"], 2)
+        self.assertEqual(recipe_cards.write_card(recipes[0], self.dir), (path, False))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), recipe_cards.render_card(recipes[0]))
+        self.assertEqual(sorted(n for n in os.listdir(self.dir) if not n.startswith(".")), ["Salad.txt", "Soup.txt"])
+
+
+class TestPlanner(unittest.TestCase):
+
+    def test_plan_has_distinct_recipes_and_one_deduplicated_shopping_list(self):
+        pantry = ["tofu", "rice", "garlic", "broccoli"]
+        plan = planner.plan_meals(pantry, 3)
+        titles = [r["title"] for r in plan["recipes"]]
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(len(set(titles)), 3)
+        items = [item["ingredient"] for item in plan["shopping_list"]]
+        self.assertEqual(items, sorted(set(items)))
+        needed = {
+            recipe_helper.normalize(i)
+            for r in plan["recipes"] for i in r["ingredients"]
+            if not planner.has_ingredient(pantry, i)
+        }
+        self.assertEqual(set(items), needed)
+        self.assertEqual(sorted(plan["pantry_used"] + plan["pantry_unused"]), sorted(pantry))
+        self.assertEqual(plan["score"], len(plan["pantry_used"]) - len(items))
+
+    def test_diet_and_time_limits_are_applied(self):
+        plan = planner.plan_meals(["egg", "milk", "flour", "tomato"], 4, diet="vegetarian", max_minutes=15)
+        self.assertTrue(plan["recipes"])
+        for r in plan["recipes"]:
+            self.assertLessEqual(planner.recipe_minutes(r), 15)
+            self.assertIn("vegetarian", [d.lower() for d in r.get("diets", [])])
+        self.assertEqual(planner.plan_meals(["egg"], 0)["recipes"], [])
+
+    def test_near_miss_ingredients_go_on_the_shopping_list(self):
+        import json
+        import tempfile
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "recipes.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([
+                {"title": "Egg Fried Rice", "ingredients": ["egg", "rice", "oil"], "diets": []},
+                {"title": "Miso Eggplant", "ingredients": ["eggplant", "miso", "garlic"], "diets": []},
+                {"title": "Ham Plate", "ingredients": ["boiled ham", "mustard"], "diets": []},
+            ], f)
+        recipe_helper.CATALOG.use(path)
+        self.addCleanup(recipe_helper.CATALOG.use, recipe_helper.RECIPES_PATH)
+        plan = planner.plan_meals(["egg", "miso", "oil"], 3)
+        # "oil" only occurs inside "boiled ham", so that recipe uses no pantry item
+        self.assertEqual(sorted(r["title"] for r in plan["recipes"]), ["Egg Fried Rice", "Miso Eggplant"])
+        self.assertEqual(plan["shopping_list"], [
+            {"ingredient": "eggplant", "recipes": ["Miso Eggplant"]},
+            {"ingredient": "garlic", "recipes": ["Miso Eggplant"]},
+            {"ingredient": "rice", "recipes": ["Egg Fried Rice"]},
+        ])
+        self.assertEqual(plan["pantry_used"], ["egg", "miso", "oil"])
+
+    def test_word_rule_and_time_parsing(self):
+        self.assertTrue(planner.has_ingredient(["chicken"], "Chicken breast"))
+        self.assertTrue(planner.has_ingredient(["soba noodles"], "soba"))
+        self.assertTrue(planner.has_ingredient(["eggs"], "egg"))
+        self.assertTrue(planner.has_ingredient(["tomato"], "cherry tomatoes"))
+        self.assertFalse(planner.has_ingredient(["chicken"], "rice"))
+        self.assertFalse(planner.has_ingredient(["egg"], "eggplant"))
+        self.assertFalse(planner.has_ingredient(["oil"], "boiled ham"))
+        self.assertEqual(planner.recipe_minutes({"time": "25 minutes"}), 25)
+        self.assertEqual(planner.recipe_minutes({"time": "1 hour 10 min"}), 70)
+        self.assertEqual(planner.recipe_minutes({"time": "1.5 hours"}), 90)
+        self.assertIsNone(planner.recipe_minutes({}))
+
+
+@unittest.skipUnless(openai_helper.Groq is not None, "groq not installed")
+class TestGroqClient(unittest.TestCase):
+
+    def tearDown(self):
+        openai_helper.reset_client()
+
+    def test_client_is_shared_until_config_changes(self):
+        client = openai_helper.get_client(api_key="key-a", base_url="http://127.0.0.1:9")
+        self.assertIs(openai_helper.get_client(api_key="key-a", base_url="http://127.0.0.1:9"), client)
+        self.assertEqual(str(client.base_url).rstrip("/"), "http://127.0.0.1:9")
+        self.assertIsNot(openai_helper.get_client(api_key="key-b", base_url="http://127.0.0.1:9"), client)
+        rotated = openai_helper.get_client(api_key="key-b", base_url="http://127.0.0.1:9")
+        openai_helper.reset_client()
+        self.assertIsNot(openai_helper.get_client(api_key="key-b", base_url="http://127.0.0.1:9"), rotated)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_disk_tier_survives_a_new_cache_instance(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            cache = llm_cache.ResponseCache(path)
+            cache.set("generate", "k", [{"title": "Toast"}])
+            cache.close()
+            fresh = llm_cache.ResponseCache(path)
+            self.assertEqual(fresh.get("generate", "k"), [{"title": "Toast"}])
+            self.assertIs(fresh.get("other", "k"), llm_cache.MISSING)
+            self.assertEqual(fresh.stats["disk_hits"], 1)
+            self.assertEqual(fresh.get("generate", "k"), [{"title": "Toast"}])
+            self.assertEqual(fresh.stats["memory_hits"], 1)
+            fresh.close()
+
+    def test_ttl_and_size_eviction(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = llm_cache.ResponseCache(os.path.join(tmp, "cache.sqlite3"), max_memory=1, max_entries=2)
+            for key in "abc":
+                cache.set("ns", key, key)
+            # "a" was least recently used on disk and is evicted
+            self.assertIs(cache.get("ns", "a"), llm_cache.MISSING)
+            self.assertEqual(cache.get("ns", "b"), "b")
+            cache.ttl = -1
+            self.assertIs(cache.get("ns", "c"), llm_cache.MISSING)
+            cache.close()
+
+    def test_memory_hits_keep_entries_from_disk_eviction(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            cache = llm_cache.ResponseCache(path, max_memory=2, max_entries=2)
+            cache.set("ns", "a", "a")
+            cache.set("ns", "b", "b")
+            self.assertEqual(cache.get("ns", "a"), "a")
+            self.assertEqual(cache.stats["memory_hits"], 1)
+            cache.set("ns", "c", "c")
+            cache.close()
+            # "a" was read more recently than "b", so "b" is the one evicted
+            fresh = llm_cache.ResponseCache(path)
+            self.assertEqual(fresh.get("ns", "a"), "a")
+            self.assertIs(fresh.get("ns", "b"), llm_cache.MISSING)
+            fresh.close()
+
+    def test_writes_do_not_count_or_sweep_the_table(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = llm_cache.ResponseCache(os.path.join(tmp, "cache.sqlite3"), ttl=50, max_entries=3)
+            cache.set("ns", "old", 0)
+            statements = []
+            cache._db.set_trace_callback(statements.append)
+            for i in range(10):
+                cache.set("ns", str(i), i)
+            self.assertFalse([s for s in statements if "COUNT" in s or "created <" in s])
+            self.assertEqual(cache._db.execute("SELECT COUNT(*) FROM entries").fetchone(), (3,))
+            indexes = {name for (name,) in cache._db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            self.assertIn("entries_created", indexes)
+
+            # The periodic sweep drops expired rows nobody reads
+            cache._db.execute("UPDATE entries SET created = created - 100 WHERE key = '8'")
+            cache._last_sweep -= llm_cache.SWEEP_INTERVAL
+            cache.set("ns", "new", 1)
+            keys = {key for (key,) in cache._db.execute("SELECT key FROM entries")}
+            self.assertEqual(keys, {"7", "9", "new"})
+            cache.close()
+
+    def test_generation_is_served_from_cache_for_equivalent_pantries(self):
+        original = openai_helper.RESPONSE_CACHE
+        openai_helper.RESPONSE_CACHE = llm_cache.ResponseCache(None)
+        try:
+            key = openai_helper._generation_key(["Rice", "chicken", "rice "], "Vegan", None, "m")
+            self.assertEqual(key, openai_helper._generation_key(["chicken", "rice"], "vegan", "", "m"))
+            openai_helper.RESPONSE_CACHE.set(openai_helper.GENERATE_NAMESPACE, key, [{"title": "Bowl"}])
+            result = openai_helper.generate_recipes_from_ingredients(["rice", "Chicken"], diet="vegan", model="m")
+            self.assertEqual(result, [{"title": "Bowl"}])
+            result[0]["title"] = "changed"
+            self.assertEqual(openai_helper.generate_recipes_from_ingredients(["chicken", "rice"], "vegan", model="m"),
+                             [{"title": "Bowl"}])
+        finally:
+            openai_helper.RESPONSE_CACHE = original
+
+
+    def test_follow_up_answers_are_cached_by_normalized_question(self):
+        from types import SimpleNamespace
+        self.assertEqual(openai_helper.normalize_question("Can I freeze this?"), "freeze")
+        self.assertEqual(openai_helper.normalize_question("can i freeze it"), "freeze")
+        self.assertEqual(openai_helper.normalize_question("What can I serve WITHOUT rice?!"), "what serve without rice")
+        original = openai_helper.RESPONSE_CACHE
+        openai_helper.RESPONSE_CACHE = llm_cache.ResponseCache(None)
+        try:
+            recipe = {"title": "Toast", "time": "5 minutes", "ingredients": ["bread"], "steps": ["Toast it."]}
+            calls = []
+
+            def create(**request):
+                calls.append(request)
+                message = SimpleNamespace(content="Yes, for a month.")
+                return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+            get_client = openai_helper.get_client
+            client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+            openai_helper.get_client = lambda: client
+            try:
+                self.assertEqual(openai_helper.ask_openai("Can I freeze this?", recipe), "Yes, for a month.")
+                self.assertEqual(openai_helper.ask_openai("can i freeze it", dict(recipe)), "Yes, for a month.")
+            finally:
+                openai_helper.get_client = get_client
+            self.assertEqual(len(calls), 1)
+            stats = openai_helper.cache_stats()
+            self.assertEqual(stats["ask"]["hits"], 1)
+            self.assertEqual(stats["ask"]["hit_rate"], 0.5)
+        finally:
+            openai_helper.RESPONSE_CACHE = original
+
+
+
+class TestGenerationJob(unittest.TestCase):
+
+    def test_background_result_and_cancellation(self):
+        import threading
+        original = openai_helper.iter_generated_recipes
+        release = threading.Event()
+
+        def fake_iter(ingredients, diet=None, meal_type=None, model=None, cancel_event=None, **options):
+            yield {"title": ingredients[0]}
+            release.wait(5)
+            yield {"title": " & ".join(ingredients)}
+
+        openai_helper.iter_generated_recipes = fake_iter
+        try:
+            job = openai_helper.start_generation(["rice", "egg"])
+            arrivals = job.iter_recipes()
+            self.assertEqual(next(arrivals), {"title": "rice"})
+            self.assertFalse(job.done())
+            release.set()
+            self.assertEqual(list(arrivals), [{"title": "rice & egg"}])
+            self.assertEqual(job.result(timeout=5), [{"title": "rice"}, {"title": "rice & egg"}])
+
+            release.clear()
+            job = openai_helper.start_generation(["rice"])
+            job.cancel()
+            self.assertTrue(job.cancelled())
+            self.assertIsNone(job.result())
+            self.assertEqual(list(job.iter_recipes()), [])
+            release.set()
+        finally:
+            openai_helper.iter_generated_recipes = original
+
+    def test_cancel_event_stops_retries(self):
+        import threading
+        cancel = threading.Event()
+        cancel.set()
+        self.assertIsNone(openai_helper._call_llm(retry_policy.RetryPolicy(), lambda timeout: "answer", cancel))
+
+
+class TransientError(Exception):
+    def __init__(self, status_code=503, headers=None):
+        from types import SimpleNamespace
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def flaky(self, errors, result="ok"):
+        calls = []
+
+        def func(timeout):
+            calls.append(timeout)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return result
+        return func, calls
+
+    def test_retries_transient_errors_with_jitter_and_retry_after(self):
+        policy = retry_policy.RetryPolicy(max_attempts=3, base_delay=0.01, rng=lambda: 0.5)
+        func, calls = self.flaky([TransientError(503), TransientError(429, {"retry-after-ms": "5"})])
+        self.assertEqual(policy.call(func), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(policy.backoff(0), 0.005)
+        self.assertEqual(policy.backoff(3, TransientError(429, {"retry-after": "2"})), 2.0)
+
+    def test_permanent_errors_and_deadline_are_not_retried(self):
+        func, calls = self.flaky([TransientError(400)])
+        with self.assertRaises(TransientError):
+            retry_policy.RetryPolicy().call(func)
+        self.assertEqual(len(calls), 1)
+        # Retry-After beyond the remaining budget: give up instead of sleeping
+        func, calls = self.flaky([TransientError(429, {"retry-after": "60"})])
+        with self.assertRaises(TransientError):
+            retry_policy.RetryPolicy(deadline=1.0).call(func)
+        self.assertEqual(len(calls), 1)
+        self.assertLessEqual(calls[0], 1.0)
+
+    def test_circuit_breaker_opens_then_allows_a_trial_after_cool_off(self):
+        now = [0.0]
+        breaker = retry_policy.CircuitBreaker(failure_threshold=2, cool_off=30.0, clock=lambda: now[0])
+        policy = retry_policy.RetryPolicy(max_attempts=1, breaker=breaker)
+        for _ in range(2):
+            with self.assertRaises(TransientError):
+                policy.call(self.flaky([TransientError()])[0])
+        self.assertEqual(breaker.state, "open")
+        func, calls = self.flaky([])
+        with self.assertRaises(retry_policy.CircuitOpenError):
+            policy.call(func)
+        self.assertEqual(calls, [])
+        now[0] = 31.0
+        self.assertEqual(breaker.state, "half-open")
+        self.assertEqual(policy.call(func), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+def fake_streaming_client(pieces):
+    """A stand-in Groq client whose streamed completion yields `pieces`."""
+    from types import SimpleNamespace
+
+    def create(stream=False, **request):
+        assert stream
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))]) for p in pieces])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = openai_helper.RESPONSE_CACHE
+        self.get_client = openai_helper.get_client
+        openai_helper.RESPONSE_CACHE = llm_cache.ResponseCache(None)
+
+    def tearDown(self):
+        openai_helper.RESPONSE_CACHE = self.cache
+        openai_helper.get_client = self.get_client
+
+    def test_json_array_parser_yields_objects_across_chunks(self):
+        text = 'Sure!\n```json\n[{"title": "A {curly} \\"quoted\\" one", "n": {"k": [1]}}, {"title": "B"}]\n```'
+        parser = openai_helper.JsonArrayParser()
+        items = []
+        for ch in text:
+            items.extend(parser.feed(ch))
+        self.assertEqual(items, [{"title": 'A {curly} "quoted" one', "n": {"k": [1]}}, {"title": "B"}])
+        self.assertTrue(parser.finished)
+
+    def test_recipes_stream_in_and_complete_stream_is_cached(self):
+        pieces = ['[{"title": "One", "ingredients": ["rice"]}', ', {"tit', 'le": "Two"}]']
+        openai_helper.get_client = lambda: fake_streaming_client(pieces)
+        recipes = openai_helper.iter_generated_recipes(["rice"], model="m")
+        self.assertEqual(next(recipes), {"title": "One", "ingredients": ["rice"]})
+        self.assertEqual(list(recipes), [{"title": "Two"}])
+        openai_helper.get_client = lambda: None
+        self.assertEqual(openai_helper.generate_recipes_from_ingredients(["rice"], model="m", stream=True),
+                         [{"title": "One", "ingredients": ["rice"]}, {"title": "Two"}])
+
+    def test_need_sized_generation_fans_out_and_skips_listed_titles(self):
+        import json
+        import re
+        from types import SimpleNamespace
+        requests = []
+
+        def create(**request):
+            requests.append(request)
+            prompt = request["messages"][-1]["content"]
+            style = re.search(r"a (.+?) dish", prompt).group(1)
+            title = "Local Dish" if style == "one-pan" else style.title()
+            content = json.dumps([{"title": title, "ingredients": ["rice"]}])
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+        openai_helper.get_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        recipes = openai_helper.generate_recipes_from_ingredients(["rice"], model="m", count=3, avoid_titles=["Local Dish"])
+        self.assertEqual(sorted(r["title"] for r in recipes), ["Salad Or Bowl", "Soup Or Stew"])
+        self.assertEqual(len(requests), 3)
+        self.assertTrue(all("1 complete recipe using" in r["messages"][-1]["content"] for r in requests))
+        self.assertTrue(all("Do not repeat these recipes: Local Dish" in r["messages"][-1]["content"] for r in requests))
+        # Enough cached recipes: no request at all
+        openai_helper.get_client = lambda: None
+        recipes = openai_helper.generate_recipes_from_ingredients(["rice"], model="m", count=1, avoid_titles=["soup or stew"])
+        self.assertEqual([r["title"] for r in recipes], ["Salad Or Bowl"])
+        # A plain request is not answered from the partial fan-out results
+        self.assertIsNone(openai_helper.generate_recipes_from_ingredients(["rice"], model="m"))
+
+    def test_ask_openai_streams_tokens(self):
+        openai_helper.get_client = lambda: fake_streaming_client(["Yes", ", up to ", "3 months."])
+        tokens = []
+        recipe = {"title": "Soup", "ingredients": ["stock"], "steps": []}
+        answer = openai_helper.ask_openai("Can I freeze it?", recipe, stream=True, on_token=tokens.append)
+        self.assertEqual(tokens, ["Yes", ", up to ", "3 months."])
+        self.assertEqual(answer, "Yes, up to 3 months.")
+        tokens.clear()
+        self.assertEqual(openai_helper.ask_openai("can i freeze this", recipe, stream=True, on_token=tokens.append), answer)
+        self.assertEqual(tokens, [answer])
+
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "limits.state")
+        self.now = [1000.0]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def limiter(self, **kwargs):
+        return rate_limiter.RateLimiter(path=self.path, clock=lambda: self.now[0], **kwargs)
+
+    def test_buckets_refill_over_time_and_are_shared_through_the_file(self):
+        first, second = self.limiter(rpm=2, tpm=1000), self.limiter(rpm=2, tpm=1000)
+        self.assertEqual(first.try_acquire(400), 0.0)
+        self.assertEqual(second.try_acquire(400), 0.0)
+        # Both requests were taken from the same minute's quota
+        self.assertAlmostEqual(first.try_acquire(100), 30.0)
+        self.now[0] += 30.0
+        self.assertEqual(second.try_acquire(100), 0.0)
+        # Tokens: 200 left + 500 refilled - 100 taken = 600; a request is
+        # clamped to the 1000-token bucket, so 400 more take 24 s
+        tokens_only = self.limiter(tpm=1000)
+        self.assertAlmostEqual(tokens_only.try_acquire(1300), 24.0)
+        tokens_only.refund(400)
+        self.assertEqual(tokens_only.try_acquire(1300), 0.0)
+
+    def test_acquire_gives_up_when_capacity_comes_too_late(self):
+        limiter = self.limiter(rpm=1)
+        self.assertTrue(limiter.acquire(timeout=0.1))
+        self.assertFalse(limiter.acquire(timeout=0.1))
+
+    def test_no_capacity_skips_the_request_without_tripping_the_breaker(self):
+        from types import SimpleNamespace
+        calls = []
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **request: calls.append(request) or SimpleNamespace(usage=SimpleNamespace(total_tokens=10))
+        )))
+        limiter = rate_limiter.RateLimiter(rpm=1)
+        get_rate_limiter = openai_helper.get_rate_limiter
+        openai_helper.get_rate_limiter = lambda: limiter
+        try:
+            breaker = retry_policy.CircuitBreaker(failure_threshold=1)
+            policy = retry_policy.RetryPolicy(deadline=0.1, breaker=breaker)
+            messages = [{"role": "user", "content": "x" * 40}]
+            func = lambda timeout: openai_helper._create_completion(client, timeout, messages=messages, max_tokens=50)
+            self.assertIsNotNone(openai_helper._call_llm(policy, func))
+            self.assertEqual(rate_limiter.estimate_tokens(messages, 50), 60)
+            self.assertIsNone(openai_helper._call_llm(policy, func))
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(breaker.state, "closed")
+        finally:
+            openai_helper.get_rate_limiter = get_rate_limiter
+
+
+class TestBatchMode(unittest.TestCase):
+
+    def setUp(self):
+        self.generate = batch.generate_recipes_from_ingredients
+        self.ingest = batch.ingest_generated
+
+    def tearDown(self):
+        batch.generate_recipes_from_ingredients = self.generate
+        batch.ingest_generated = self.ingest
+
+    def run_lines(self, lines, **kwargs):
+        import io
+        import json
+        out = io.StringIO()
+        stats = batch.run_batch(lines, out, **kwargs)
+        return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_results_follow_input_order_and_bad_lines_become_errors(self):
+        lines = [
+            '{"id": 1, "ingredients": "chicken, rice, broccoli", "max_results": 2}',
+            "not json",
+            "",
+            '{"id": 3, "ingredients": ["egg", "milk", "flour"], "diet": "vegetarian"}',
+            '{"id": 4, "ingredients": "chicken, rice", "max_results": 0}',
+        ]
+        stats, results = self.run_lines(lines, allow_ai=False)
+        self.assertEqual([r.get("id") for r in results], [1, None, 3, 4])
+        self.assertEqual([r["line"] for r in results], [1, 2, 4, 5])
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[3])
+        expected = recipe_helper.match_recipes(["chicken", "rice", "broccoli"], min_match=2, limit=2)
+        self.assertEqual([(o["recipe"]["title"], o["matches"]) for o in results[0]["options"]],
+                         [(r["title"], c) for r, c in expected])
+        self.assertTrue(all("vegetarian" in o["recipe"]["diets"] for o in results[2]["options"]))
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["ai"], 0)
+
+    def test_list_items_keep_their_boundaries(self):
+        request = batch.validate_request({"ingredients": [" Bell Pepper", "sweet potato, mashed", "  ", "Rice"]}, 1)
+        self.assertEqual(request["ingredients"], ["bell pepper", "sweet potato, mashed", "rice"])
+        self.assertEqual(batch.validate_request({"ingredients": "bell pepper, rice"}, 1)["ingredients"],
+                         ["bell pepper", "rice"])
+        self.assertIn("error", batch.validate_request({"ingredients": [" ", ""]}, 1))
+
+    def test_ai_fills_only_the_missing_slots(self):
+        calls, ingested = [], []
+
+        def fake_generate(ingredients, diet=None, meal_type=None, count=None, avoid_titles=None):
+            calls.append((count, avoid_titles))
+            return [{"title": f"AI {i}", "ingredients": ingredients} for i in range(count)]
+
+        batch.generate_recipes_from_ingredients = fake_generate
+        batch.ingest_generated = ingested.extend
+        local = recipe_helper.match_recipes(["chicken", "rice", "broccoli"], min_match=2, limit=5)
+        stats, results = self.run_lines(['{"ingredients": "chicken, rice, broccoli", "max_results": 5}'])
+        options = results[0]["options"]
+        self.assertEqual(len(options), 5)
+        self.assertEqual(calls, [(5 - len(local), [r["title"] for r, _ in local])])
+        self.assertEqual([o["source"] for o in options], ["local"] * len(local) + ["ai"] * (5 - len(local)))
+        self.assertEqual(len(ingested), 5 - len(local))
+
+
+class TestRecipeServer(unittest.TestCase):
+
+    def start(self, **kwargs):
+        import threading
+        kwargs.setdefault("allow_ai", False)
+        httpd = server.RecipeServer(("127.0.0.1", 0), **kwargs)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        self.httpd = httpd
+        return httpd.server_address[1]
+
+    def post(self, port, path, body):
+        import http.client
+        import json
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            conn.request("POST", path, json.dumps(body))
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def test_endpoints_answer_from_the_warm_catalog(self):
+        port = self.start()
+        status, body = self.post(port, "/match", {"ingredients": "chicken, rice, broccoli", "max_results": 2})
+        self.assertEqual(status, 200)
+        expected = recipe_helper.match_recipes(["chicken", "rice", "broccoli"], min_match=2, limit=2)
+        self.assertEqual([o["recipe"]["title"] for o in body["options"]], [r["title"] for r, _ in expected])
+        status, body = self.post(port, "/substitute", {"ingredient": "butter"})
+        self.assertEqual(body["suggestion"], recipe_helper.suggest_substitute("butter"))
+        status, body = self.post(port, "/explain", {"title": "pancakes"})
+        self.assertTrue(body["text"].startswith("Pancakes"))
+        self.assertEqual(self.post(port, "/parse", {"text": "Egg, MILK"})[1], {"ingredients": ["egg", "milk"]})
+        self.assertEqual(self.post(port, "/match", {"ingredients": 3})[0], 400)
+        self.assertEqual(self.post(port, "/generate", {"ingredients": "egg"})[0], 400)
+        status, body = self.post(port, "/plan", {"ingredients": "tofu, rice, garlic", "meals": 2})
+        self.assertEqual(len(body["recipes"]), 2)
+        self.assertEqual(self.post(port, "/plan", {"ingredients": "tofu, rice", "meals": 0})[0], 400)
+        self.assertEqual(self.post(port, "/nope", {})[0], 404)
+
+    def test_concurrent_ai_matches_ingest_on_the_writer_thread(self):
+        import json
+        import tempfile
+        import threading
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "recipes.json")
+        with open(recipe_helper.RECIPES_PATH, encoding="utf-8") as f:
+            base = json.load(f)[:60]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(base, f)
+        recipe_helper.CATALOG.use(path)
+        self.addCleanup(recipe_helper.CATALOG.use, recipe_helper.RECIPES_PATH)
+        recipe_helper.CATALOG.warm()
+
+        generate, ingest = batch.generate_recipes_from_ingredients, batch.ingest_generated
+        self.addCleanup(setattr, batch, "generate_recipes_from_ingredients", generate)
+        self.addCleanup(setattr, batch, "ingest_generated", ingest)
+        counter = iter(range(10 ** 6))
+        ingest_threads = set()
+
+        def fake_generate(ingredients, diet=None, meal_type=None, count=None, avoid_titles=None):
+            return [{"title": f"Generated {next(counter)}", "ingredients": ingredients + ["rice"],
+                     "diets": [diet] if diet else []} for _ in range(count)]
+
+        def record_ingest(recipes):
+            ingest_threads.add(threading.current_thread().name)
+            return ingest(recipes)
+
+        batch.generate_recipes_from_ingredients = fake_generate
+        batch.ingest_generated = record_ingest
+        port = self.start(workers=4, allow_ai=True)
+        statuses = []
+
+        def client(n):
+            for i in range(15):
+                diet = ("vegan", "halal", None)[(n + i) % 3]
+                body = {"ingredients": f"rice, garlic, spice {n}-{i}", "diet": diet, "max_results": 8, "ai": True}
+                statuses.append(self.post(port, "/match", body)[0])
+
+        clients = [threading.Thread(target=client, args=(n,)) for n in range(6)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        self.assertEqual(statuses, [200] * 90)
+        self.assertTrue(ingest_threads)
+        self.assertTrue(all(name.startswith("recipe-ingest") for name in ingest_threads))
+        self.httpd._writer.submit(int).result()  # wait for queued ingests
+        status, body = self.post(port, "/match", {"ingredients": "rice, garlic, spice 0-0", "max_results": 3})
+        self.assertEqual(body["options"][0]["recipe"]["title"][:10], "Generated ")
+
+    def test_connections_beyond_the_pool_and_backlog_get_503(self):
+        import json
+        import socket
+        port = self.start(workers=1, max_pending=0)
+        # An idle keep-alive connection holds the only worker
+        idle = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(idle.close)
+        # The 503 is sent on accept, so read it without writing a request
+        # (a write can race the server closing the socket)
+        busy = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.addCleanup(busy.close)
+        response = b""
+        while True:
+            data = busy.recv(4096)
+            if not data:
+                break
+            response += data
+        head, body = response.split(b"\r\n\r\n", 1)
+        self.assertTrue(head.startswith(b"HTTP/1.1 503"))
+        self.assertEqual(json.loads(body), {"error": "server is busy"})
+
+    def test_invalid_content_length_gets_400(self):
+        import http.client
+        import json
+        port = self.start()
+        for value in ("abc", "-1"):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            self.addCleanup(conn.close)
+            conn.putrequest("POST", "/parse")
+            conn.putheader("Content-Length", value)
+            conn.endheaders()
+            response = conn.getresponse()
+            self.assertEqual(response.status, 400)
+            self.assertEqual(json.loads(response.read()), {"error": "invalid Content-Length"})
+
+    def test_close_shuts_connections_still_waiting_for_a_worker(self):
+        import socket
+        import time
+        import warnings
+        port = self.start(workers=1, max_pending=1)
+        idle = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(idle.close)
+        queued = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.addCleanup(queued.close)
+        queued.sendall(b"POST /parse HTTP/1.1\r\nHost: test\r\nContent-Length: 2\r\n\r\n{}")
+        while self.httpd._pool._work_queue.qsize() < 1:
+            time.sleep(0.01)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+        # Only the idle connection still holds a slot
+        self.assertTrue(self.httpd._slots.acquire(blocking=False))
+        self.assertFalse(self.httpd._slots.acquire(blocking=False))
+
+
+@unittest.skipUnless(openai_helper.Groq is not None, "groq not installed")
+class TestStubServer(unittest.TestCase):
+
+    def test_helpers_stream_and_recover_from_malformed_output_against_stub(self):
+        import os
+        from unittest import mock
+        from scripts.stub_groq_server import StubConfig, start_in_thread
+        server, base_url = start_in_thread(StubConfig(malformed=1.0))
+        env = {"GROQ_BASE_URL": base_url, "GROQ_API_KEY": "stub"}
+        cache = openai_helper.RESPONSE_CACHE
+        openai_helper.RESPONSE_CACHE = llm_cache.ResponseCache(None)
+        try:
+            with mock.patch.dict(os.environ, env):
+                openai_helper.reset_client()
+                recipes = list(openai_helper.iter_generated_recipes(["tofu", "rice", "kale"]))
+                self.assertGreaterEqual(len(recipes), 2)
+                self.assertTrue(all(set(r["ingredients"]) & {"tofu", "rice", "kale"} for r in recipes))
+                tokens = []
+                answer = openai_helper.ask_openai("Can I freeze it?", recipes[0], stream=True, on_token=tokens.append)
+                self.assertGreater(len(tokens), 1)
+                self.assertEqual(answer, "".join(tokens).strip())
+            self.assertEqual(server.config.stats["streamed"], 2)
+        finally:
+            openai_helper.RESPONSE_CACHE = cache
+            openai_helper.reset_client()
+            server.shutdown()
+            server.server_close()
+
+
+
+class TestGenerateRecipes(unittest.TestCase):
+
+    def test_same_seed_writes_the_same_catalog(self):
+        import json
+        import tempfile
+        from pathlib import Path
+        from scripts.generate_recipes import BASE_INGREDIENTS, DIETS, write_catalog
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second, other = (Path(tmp) / name for name in ("a.json", "b.json", "c.json"))
+            write_catalog(first, 500, seed=7)
+            write_catalog(second, 500, seed=7)
+            write_catalog(other, 500, seed=8)
+            self.assertEqual(first.read_bytes(), second.read_bytes())
+            self.assertNotEqual(first.read_bytes(), other.read_bytes())
+            with open(first, encoding="utf-8") as f:
+                recipes = json.load(f)
+        self.assertEqual(len(recipes), 500)
+        for recipe in recipes:
+            self.assertEqual(set(recipe), {"title", "ingredients", "time", "diets", "steps", "tags"})
+            self.assertTrue(4 <= len(recipe["ingredients"]) <= 7)
+            self.assertEqual(len(set(recipe["ingredients"])), len(recipe["ingredients"]))
+            self.assertIn(recipe["diets"], DIETS)
+            self.assertRegex(recipe["time"], r"^\d+ minutes$")
+        # Zipf popularity: staples like salt are far more common than the tail
+        counts = {}
+        for recipe in recipes:
+            for ingredient in recipe["ingredients"]:
+                counts[ingredient] = counts.get(ingredient, 0) + 1
+        self.assertGreater(counts["salt"], 10 * min(counts.values()))
+        self.assertTrue(set(counts) <= set(BASE_INGREDIENTS))
+
+
 if __name__ == "__main__":
     unittest.main()